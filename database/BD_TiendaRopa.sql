@@ -1,3 +1,7 @@
+-- Script original del esquema. Para BDs nuevas o existentes usa las migraciones versionadas:
+--   PYTHONPATH=src python -m mis_trapitos.database_conexion.migraciones aplicar
+-- (ver database/migraciones/)
+
 
 CREATE TYPE ROL_EMPLEADO AS ENUM ('empleado', 'admin');
 CREATE TYPE METODO_PAGO AS ENUM ('efectivo', 'tarjeta de credito', 'transferencia bancaria');
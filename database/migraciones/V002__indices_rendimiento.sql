@@ -0,0 +1,37 @@
+-- Índices para las consultas más frecuentes de caja, inventario y reportes.
+
+-- Reportes por periodo (fecha_venta >= CURRENT_DATE - INTERVAL ...)
+CREATE INDEX IF NOT EXISTS idx_ventas_fecha ON Ventas (fecha_venta);
+
+-- Historial de compras de un cliente
+CREATE INDEX IF NOT EXISTS idx_ventas_cliente ON Ventas (id_cliente);
+
+-- JOINs de detalles con su ticket y con la variante vendida
+CREATE INDEX IF NOT EXISTS idx_detalles_venta_venta ON Detalles_Venta (id_venta);
+CREATE INDEX IF NOT EXISTS idx_detalles_venta_variante ON Detalles_Venta (id_variante);
+
+-- Búsqueda de cliente por teléfono en caja y listado alfabético (solo activos)
+CREATE INDEX IF NOT EXISTS idx_clientes_telefono_activos ON Clientes (telefono) WHERE activo = TRUE;
+CREATE INDEX IF NOT EXISTS idx_clientes_nombre_activos ON Clientes (nombre_completo) WHERE activo = TRUE;
+
+-- Login: Empleados.usuario ya tiene índice por su restricción UNIQUE;
+-- el parcial evita visitar empleados dados de baja.
+CREATE INDEX IF NOT EXISTS idx_empleados_usuario_activos ON Empleados (usuario) WHERE activo = TRUE;
+
+-- Descuento vigente de un producto (id_producto + rango de fechas)
+CREATE INDEX IF NOT EXISTS idx_descuentos_producto_vigencia ON Descuentos (id_producto, fecha_inicio, fecha_fin);
+
+-- Catálogo visible (WHERE activo = TRUE ORDER BY id_producto DESC)
+CREATE INDEX IF NOT EXISTS idx_productos_activos ON Productos (id_producto DESC) WHERE activo = TRUE;
+CREATE INDEX IF NOT EXISTS idx_productos_categoria_activos ON Productos (id_categoria) WHERE activo = TRUE;
+
+-- Proveedores de un producto (la PK empieza por id_proveedor)
+CREATE INDEX IF NOT EXISTS idx_proveedores_productos_producto ON Proveedores_Productos (id_producto);
+
+ANALYZE Ventas;
+ANALYZE Detalles_Venta;
+ANALYZE Clientes;
+ANALYZE Empleados;
+ANALYZE Descuentos;
+ANALYZE Productos;
+ANALYZE Proveedores_Productos;
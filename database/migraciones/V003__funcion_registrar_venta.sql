@@ -0,0 +1,114 @@
+-- Función para registrar una venta completa en un solo viaje a la BD.
+-- Si no está instalada, SalesController usa el camino en Python (mismo resultado).
+
+-- Calcula las líneas del ticket con el descuento final ya aplicado.
+-- Regla: el descuento manual tiene prioridad sobre el automático (mayor oferta vigente).
+CREATE OR REPLACE FUNCTION lineas_venta_calculadas(p_lineas JSONB)
+RETURNS TABLE (
+    id_variante INT,
+    cantidad INT,
+    precio_final NUMERIC,
+    monto_descuento NUMERIC
+)
+LANGUAGE sql STABLE AS $$
+    SELECT l.id_variante,
+           l.cantidad,
+           l.precio - (l.precio * pf.porcentaje / 100) AS precio_final,
+           l.precio * pf.porcentaje / 100 AS monto_descuento
+    FROM jsonb_to_recordset(p_lineas)
+         AS l(id_variante INT, cantidad INT, precio NUMERIC, descuento_manual NUMERIC)
+    LEFT JOIN Variantes_Producto v ON v.id_variante = l.id_variante
+    LEFT JOIN LATERAL (
+        SELECT MAX(d.porcentaje) AS porcentaje
+        FROM Descuentos d
+        WHERE d.id_producto = v.id_producto
+          AND d.fecha_inicio <= CURRENT_DATE
+          AND d.fecha_fin >= CURRENT_DATE
+    ) auto ON TRUE
+    CROSS JOIN LATERAL (
+        SELECT CASE
+                   WHEN COALESCE(l.descuento_manual, 0) > 0 THEN l.descuento_manual
+                   ELSE COALESCE(auto.porcentaje, 0)
+               END AS porcentaje
+    ) pf
+    WHERE l.cantidad > 0
+$$;
+
+-- Registra ticket, detalles, descuento de stock y auditoría de forma atómica.
+-- p_lineas: [{"id_variante": 1, "cantidad": 2, "precio": 100.0, "descuento_manual": 0}, ...]
+CREATE OR REPLACE FUNCTION registrar_venta(
+    p_id_empleado INT,
+    p_id_cliente INT,
+    p_metodo_pago METODO_PAGO,
+    p_lineas JSONB
+)
+RETURNS TABLE (id_venta INT, total NUMERIC)
+LANGUAGE plpgsql AS $$
+#variable_conflict use_column
+DECLARE
+    v_id_venta INT;
+    v_total NUMERIC;
+    v_sin_stock TEXT;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM jsonb_to_recordset(p_lineas) AS l(descuento_manual NUMERIC)
+        WHERE l.descuento_manual > 100
+    ) THEN
+        RAISE EXCEPTION 'Descuento inválido en la venta';
+    END IF;
+
+    -- Bloqueo de las variantes en orden ascendente de id (evita deadlocks entre cajas)
+    PERFORM 1
+    FROM Variantes_Producto vp
+    WHERE vp.id_variante IN (
+        SELECT l.id_variante FROM jsonb_to_recordset(p_lineas) AS l(id_variante INT)
+    )
+    ORDER BY vp.id_variante
+    FOR UPDATE;
+
+    SELECT COALESCE(SUM(lc.precio_final * lc.cantidad), 0)
+    INTO v_total
+    FROM lineas_venta_calculadas(p_lineas) lc;
+
+    -- 1. Ticket
+    INSERT INTO Ventas (id_empleado, id_cliente, metodo_pago, monto_total_venta)
+    VALUES (p_id_empleado, p_id_cliente, p_metodo_pago, v_total)
+    RETURNING Ventas.id_venta INTO v_id_venta;
+
+    -- 2. Detalles
+    INSERT INTO Detalles_Venta (id_venta, id_variante, cantidad, precio_unitario_venta, descuento_aplicado)
+    SELECT v_id_venta, lc.id_variante, lc.cantidad, lc.precio_final, lc.monto_descuento
+    FROM lineas_venta_calculadas(p_lineas) lc;
+
+    -- 3. Stock (agrupado por variante, solo si alcanza)
+    WITH pedido AS (
+        SELECT lc.id_variante, SUM(lc.cantidad) AS cantidad
+        FROM lineas_venta_calculadas(p_lineas) lc
+        GROUP BY lc.id_variante
+    ), actualizadas AS (
+        UPDATE Variantes_Producto vp
+        SET stock_disponible = vp.stock_disponible - pedido.cantidad
+        FROM pedido
+        WHERE vp.id_variante = pedido.id_variante
+          AND vp.stock_disponible >= pedido.cantidad
+        RETURNING vp.id_variante
+    )
+    SELECT string_agg(pedido.id_variante::TEXT, ', ' ORDER BY pedido.id_variante)
+    INTO v_sin_stock
+    FROM pedido
+    WHERE pedido.id_variante NOT IN (SELECT a.id_variante FROM actualizadas a);
+
+    IF v_sin_stock IS NOT NULL THEN
+        RAISE EXCEPTION 'Stock insuficiente para variante(s) %', v_sin_stock;
+    END IF;
+
+    -- 4. Auditoría
+    INSERT INTO Log_Movimientos (id_empleado, accion, descripcion_detallada)
+    VALUES (
+        p_id_empleado, 'VENTA',
+        format('Venta ID %s registrada. Total: $%s', v_id_venta, to_char(v_total, 'FM9999999990.00'))
+    );
+
+    RETURN QUERY SELECT v_id_venta, ROUND(v_total, 2);
+END;
+$$;
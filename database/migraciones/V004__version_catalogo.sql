@@ -0,0 +1,34 @@
+-- Versión de catálogo para el cache de productos (logica/cache_catalogo.py).
+-- Cada INSERT/UPDATE en Productos o Variantes_Producto toma un número nuevo de una
+-- secuencia compartida; así el cache pide solo las filas con versión mayor a la última que vio.
+
+CREATE SEQUENCE IF NOT EXISTS seq_version_catalogo;
+
+ALTER TABLE Productos
+    ADD COLUMN IF NOT EXISTS version_catalogo BIGINT NOT NULL DEFAULT nextval('seq_version_catalogo');
+ALTER TABLE Variantes_Producto
+    ADD COLUMN IF NOT EXISTS version_catalogo BIGINT NOT NULL DEFAULT nextval('seq_version_catalogo');
+
+CREATE OR REPLACE FUNCTION marcar_version_catalogo()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.version_catalogo := nextval('seq_version_catalogo');
+    RETURN NEW;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_version_productos ON Productos;
+CREATE TRIGGER trg_version_productos
+    BEFORE INSERT OR UPDATE ON Productos
+    FOR EACH ROW EXECUTE FUNCTION marcar_version_catalogo();
+
+DROP TRIGGER IF EXISTS trg_version_variantes ON Variantes_Producto;
+CREATE TRIGGER trg_version_variantes
+    BEFORE INSERT OR UPDATE ON Variantes_Producto
+    FOR EACH ROW EXECUTE FUNCTION marcar_version_catalogo();
+
+-- Consulta de cambios: WHERE version_catalogo > :ultima_version
+CREATE INDEX IF NOT EXISTS idx_productos_version ON Productos (version_catalogo);
+CREATE INDEX IF NOT EXISTS idx_variantes_version ON Variantes_Producto (version_catalogo);
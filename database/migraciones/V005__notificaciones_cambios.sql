@@ -0,0 +1,94 @@
+-- Avisos entre terminales (LISTEN/NOTIFY) cuando cambian inventario, precios, ofertas o clientes.
+-- Cada sentencia manda UNA notificación con los ids afectados (no una por fila), p.ej.:
+--   canal cambios_variantes -> {"op": "UPDATE", "ids": [12, 15]}
+-- Si la lista no cabe en el límite de NOTIFY se manda "ids": null (= recargar todo).
+-- La escucha está en src/mis_trapitos/database_conexion/escucha_cambios.py
+
+CREATE OR REPLACE FUNCTION notificar_cambios()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    -- TG_ARGV[0] = canal, TG_ARGV[1] = columna con el id que interesa a la aplicación
+    ids JSONB;
+    carga TEXT;
+BEGIN
+    IF TG_OP = 'DELETE' THEN
+        EXECUTE format('SELECT jsonb_agg(DISTINCT (to_jsonb(f) ->> %L)::BIGINT) FROM filas_anteriores f', TG_ARGV[1])
+            INTO ids;
+    ELSE
+        EXECUTE format('SELECT jsonb_agg(DISTINCT (to_jsonb(f) ->> %L)::BIGINT) FROM filas_nuevas f', TG_ARGV[1])
+            INTO ids;
+    END IF;
+
+    IF ids IS NULL THEN
+        RETURN NULL; -- La sentencia no tocó filas
+    END IF;
+
+    carga := jsonb_build_object('op', TG_OP, 'ids', ids)::TEXT;
+    IF octet_length(carga) > 7000 THEN
+        carga := jsonb_build_object('op', TG_OP, 'ids', NULL)::TEXT;
+    END IF;
+
+    PERFORM pg_notify(TG_ARGV[0], carga);
+    RETURN NULL;
+END;
+$$;
+
+-- Los triggers con tablas de transición solo admiten un evento cada uno: tres por tabla.
+
+-- Variantes (stock)
+DROP TRIGGER IF EXISTS trg_notificar_variantes_ins ON Variantes_Producto;
+CREATE TRIGGER trg_notificar_variantes_ins AFTER INSERT ON Variantes_Producto
+    REFERENCING NEW TABLE AS filas_nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambios('cambios_variantes', 'id_variante');
+DROP TRIGGER IF EXISTS trg_notificar_variantes_upd ON Variantes_Producto;
+CREATE TRIGGER trg_notificar_variantes_upd AFTER UPDATE ON Variantes_Producto
+    REFERENCING NEW TABLE AS filas_nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambios('cambios_variantes', 'id_variante');
+DROP TRIGGER IF EXISTS trg_notificar_variantes_del ON Variantes_Producto;
+CREATE TRIGGER trg_notificar_variantes_del AFTER DELETE ON Variantes_Producto
+    REFERENCING OLD TABLE AS filas_anteriores
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambios('cambios_variantes', 'id_variante');
+
+-- Productos (precio, descripción, baja lógica)
+DROP TRIGGER IF EXISTS trg_notificar_productos_ins ON Productos;
+CREATE TRIGGER trg_notificar_productos_ins AFTER INSERT ON Productos
+    REFERENCING NEW TABLE AS filas_nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambios('cambios_productos', 'id_producto');
+DROP TRIGGER IF EXISTS trg_notificar_productos_upd ON Productos;
+CREATE TRIGGER trg_notificar_productos_upd AFTER UPDATE ON Productos
+    REFERENCING NEW TABLE AS filas_nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambios('cambios_productos', 'id_producto');
+DROP TRIGGER IF EXISTS trg_notificar_productos_del ON Productos;
+CREATE TRIGGER trg_notificar_productos_del AFTER DELETE ON Productos
+    REFERENCING OLD TABLE AS filas_anteriores
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambios('cambios_productos', 'id_producto');
+
+-- Descuentos (se avisa el id_producto al que aplica la oferta)
+DROP TRIGGER IF EXISTS trg_notificar_descuentos_ins ON Descuentos;
+CREATE TRIGGER trg_notificar_descuentos_ins AFTER INSERT ON Descuentos
+    REFERENCING NEW TABLE AS filas_nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambios('cambios_descuentos', 'id_producto');
+DROP TRIGGER IF EXISTS trg_notificar_descuentos_upd ON Descuentos;
+CREATE TRIGGER trg_notificar_descuentos_upd AFTER UPDATE ON Descuentos
+    REFERENCING NEW TABLE AS filas_nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambios('cambios_descuentos', 'id_producto');
+DROP TRIGGER IF EXISTS trg_notificar_descuentos_del ON Descuentos;
+CREATE TRIGGER trg_notificar_descuentos_del AFTER DELETE ON Descuentos
+    REFERENCING OLD TABLE AS filas_anteriores
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambios('cambios_descuentos', 'id_producto');
+
+-- Clientes
+DROP TRIGGER IF EXISTS trg_notificar_clientes_ins ON Clientes;
+CREATE TRIGGER trg_notificar_clientes_ins AFTER INSERT ON Clientes
+    REFERENCING NEW TABLE AS filas_nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambios('cambios_clientes', 'id_cliente');
+DROP TRIGGER IF EXISTS trg_notificar_clientes_upd ON Clientes;
+CREATE TRIGGER trg_notificar_clientes_upd AFTER UPDATE ON Clientes
+    REFERENCING NEW TABLE AS filas_nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambios('cambios_clientes', 'id_cliente');
+DROP TRIGGER IF EXISTS trg_notificar_clientes_del ON Clientes;
+CREATE TRIGGER trg_notificar_clientes_del AFTER DELETE ON Clientes
+    REFERENCING OLD TABLE AS filas_anteriores
+    FOR EACH STATEMENT EXECUTE FUNCTION notificar_cambios('cambios_clientes', 'id_cliente');
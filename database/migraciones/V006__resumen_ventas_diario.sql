@@ -0,0 +1,151 @@
+-- Resúmenes diarios de ventas mantenidos por triggers, para que los reportes no recorran
+-- todo el historial de Ventas / Detalles_Venta.
+--   Resumen_Ventas_Diario:          día x método de pago -> tickets y monto cobrado
+--   Resumen_Ventas_Producto_Diario: día x producto x método de pago -> tickets, unidades, ingresos y descuento
+-- Son dos tablas porque los tickets de un día NO se pueden sumar por producto
+-- (un ticket con dos productos contaría doble).
+--
+-- Los triggers solo siguen INSERT (así trabaja la aplicación: las ventas no se editan ni se borran).
+-- Si se corrige historial a mano, reconstruir con:
+--   PYTHONPATH=src python -m mis_trapitos.database_conexion.mantenimiento resumen-ventas [--desde AAAA-MM-DD]
+-- El día es fecha_venta::date en la zona horaria de la sesión (igual que CURRENT_DATE en los reportes).
+
+CREATE TABLE IF NOT EXISTS Resumen_Ventas_Diario (
+    fecha DATE NOT NULL,
+    metodo_pago METODO_PAGO NOT NULL,
+    tickets INT NOT NULL DEFAULT 0,
+    monto_total NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, metodo_pago)
+);
+
+CREATE TABLE IF NOT EXISTS Resumen_Ventas_Producto_Diario (
+    fecha DATE NOT NULL,
+    id_producto INT NOT NULL,
+    metodo_pago METODO_PAGO NOT NULL,
+    tickets INT NOT NULL DEFAULT 0,
+    unidades INT NOT NULL DEFAULT 0,
+    ingresos NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    descuento NUMERIC(14, 2) NOT NULL DEFAULT 0,
+    PRIMARY KEY (fecha, id_producto, metodo_pago)
+);
+
+-- Top de productos por periodo: se filtra por fecha y se agrupa por producto
+CREATE INDEX IF NOT EXISTS idx_resumen_producto_fecha
+    ON Resumen_Ventas_Producto_Diario (fecha, id_producto);
+
+
+-- Tickets: una fila por venta insertada
+CREATE OR REPLACE FUNCTION acumular_resumen_ventas()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    INSERT INTO Resumen_Ventas_Diario AS r (fecha, metodo_pago, tickets, monto_total)
+    SELECT n.fecha_venta::date, n.metodo_pago, COUNT(*), SUM(n.monto_total_venta)
+    FROM filas_nuevas n
+    GROUP BY n.fecha_venta::date, n.metodo_pago
+    ON CONFLICT (fecha, metodo_pago) DO UPDATE
+        SET tickets = r.tickets + EXCLUDED.tickets,
+            monto_total = r.monto_total + EXCLUDED.monto_total;
+    RETURN NULL;
+END;
+$$;
+
+-- Productos: las líneas nuevas agrupadas por día / producto / método.
+-- Un ticket cuenta una sola vez por producto aunque lleve varias variantes, o aunque
+-- sus líneas lleguen en varias sentencias (solo suma si el producto no estaba ya en ese ticket).
+CREATE OR REPLACE FUNCTION acumular_resumen_productos()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    WITH lineas AS (
+        SELECT n.id_venta, v.fecha_venta::date AS fecha, v.metodo_pago, vp.id_producto,
+               n.cantidad, n.precio_unitario_venta, n.descuento_aplicado
+        FROM filas_nuevas n
+        JOIN Ventas v ON v.id_venta = n.id_venta
+        JOIN Variantes_Producto vp ON vp.id_variante = n.id_variante
+    ), tickets_nuevos AS (
+        SELECT DISTINCT l.id_venta, l.id_producto
+        FROM lineas l
+        WHERE NOT EXISTS (
+            SELECT 1
+            FROM Detalles_Venta d
+            JOIN Variantes_Producto vp2 ON vp2.id_variante = d.id_variante
+            WHERE d.id_venta = l.id_venta
+              AND vp2.id_producto = l.id_producto
+              AND d.id_detalle_venta NOT IN (SELECT n2.id_detalle_venta FROM filas_nuevas n2)
+        )
+    )
+    INSERT INTO Resumen_Ventas_Producto_Diario AS r
+        (fecha, id_producto, metodo_pago, tickets, unidades, ingresos, descuento)
+    SELECT l.fecha, l.id_producto, l.metodo_pago,
+           COUNT(DISTINCT t.id_venta),
+           SUM(l.cantidad),
+           SUM(l.cantidad * l.precio_unitario_venta),
+           SUM(l.cantidad * l.descuento_aplicado)
+    FROM lineas l
+    LEFT JOIN tickets_nuevos t ON t.id_venta = l.id_venta AND t.id_producto = l.id_producto
+    GROUP BY l.fecha, l.id_producto, l.metodo_pago
+    ON CONFLICT (fecha, id_producto, metodo_pago) DO UPDATE
+        SET tickets = r.tickets + EXCLUDED.tickets,
+            unidades = r.unidades + EXCLUDED.unidades,
+            ingresos = r.ingresos + EXCLUDED.ingresos,
+            descuento = r.descuento + EXCLUDED.descuento;
+    RETURN NULL;
+END;
+$$;
+
+DROP TRIGGER IF EXISTS trg_resumen_ventas_ins ON Ventas;
+CREATE TRIGGER trg_resumen_ventas_ins AFTER INSERT ON Ventas
+    REFERENCING NEW TABLE AS filas_nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION acumular_resumen_ventas();
+
+DROP TRIGGER IF EXISTS trg_resumen_productos_ins ON Detalles_Venta;
+CREATE TRIGGER trg_resumen_productos_ins AFTER INSERT ON Detalles_Venta
+    REFERENCING NEW TABLE AS filas_nuevas
+    FOR EACH STATEMENT EXECUTE FUNCTION acumular_resumen_productos();
+
+
+-- Reconstrucción desde el historial (todo, o desde una fecha).
+-- Bloquea nuevas ventas mientras corre para que ninguna quede fuera ni se cuente doble.
+CREATE OR REPLACE FUNCTION reconstruir_resumen_ventas(p_desde DATE DEFAULT NULL)
+RETURNS TABLE (dias INT, filas_productos INT)
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_dias INT;
+    v_filas INT;
+BEGIN
+    LOCK TABLE Ventas, Detalles_Venta IN SHARE ROW EXCLUSIVE MODE;
+
+    DELETE FROM Resumen_Ventas_Diario WHERE p_desde IS NULL OR fecha >= p_desde;
+    DELETE FROM Resumen_Ventas_Producto_Diario WHERE p_desde IS NULL OR fecha >= p_desde;
+
+    INSERT INTO Resumen_Ventas_Diario (fecha, metodo_pago, tickets, monto_total)
+    SELECT v.fecha_venta::date, v.metodo_pago, COUNT(*), SUM(v.monto_total_venta)
+    FROM Ventas v
+    WHERE p_desde IS NULL OR v.fecha_venta >= p_desde
+    GROUP BY v.fecha_venta::date, v.metodo_pago;
+    GET DIAGNOSTICS v_dias = ROW_COUNT;
+
+    INSERT INTO Resumen_Ventas_Producto_Diario
+        (fecha, id_producto, metodo_pago, tickets, unidades, ingresos, descuento)
+    SELECT v.fecha_venta::date, vp.id_producto, v.metodo_pago,
+           COUNT(DISTINCT v.id_venta),
+           SUM(d.cantidad),
+           SUM(d.cantidad * d.precio_unitario_venta),
+           SUM(d.cantidad * d.descuento_aplicado)
+    FROM Detalles_Venta d
+    JOIN Ventas v ON v.id_venta = d.id_venta
+    JOIN Variantes_Producto vp ON vp.id_variante = d.id_variante
+    WHERE p_desde IS NULL OR v.fecha_venta >= p_desde
+    GROUP BY v.fecha_venta::date, vp.id_producto, v.metodo_pago;
+    GET DIAGNOSTICS v_filas = ROW_COUNT;
+
+    RETURN QUERY SELECT v_dias, v_filas;
+END;
+$$;
+
+-- Carga inicial con todo el historial existente
+SELECT * FROM reconstruir_resumen_ventas();
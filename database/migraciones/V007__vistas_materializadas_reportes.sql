@@ -0,0 +1,52 @@
+-- Vistas materializadas para los reportes pesados del tablero.
+-- Se refrescan con REFRESH MATERIALIZED VIEW CONCURRENTLY (los reportes se pueden seguir leyendo
+-- mientras tanto), cada REPORTES_REFRESCO_SEG o con el botón de la pestaña Reportes.
+-- El refresco está en src/mis_trapitos/database_conexion/reporte_queries.py (refrescarVistasReportes).
+-- Cada vista necesita un índice UNIQUE para poder refrescarse de forma concurrente.
+
+-- Cuándo se refrescó cada vista por última vez (el "datos al ..." del tablero)
+CREATE TABLE IF NOT EXISTS Refresco_Vistas (
+    nombre_vista VARCHAR(63) PRIMARY KEY,
+    fecha_refresco TIMESTAMPTZ NOT NULL,
+    duracion_ms INT NOT NULL DEFAULT 0
+);
+
+-- Top de productos vendidos (últimos 30 días al momento del refresco), desde el resumen de V006
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_top_ventas_mes AS
+    SELECT r.id_producto, p.descripcion, SUM(r.unidades) AS total_vendido
+    FROM Resumen_Ventas_Producto_Diario r
+    JOIN Productos p ON p.id_producto = r.id_producto
+    WHERE r.fecha >= CURRENT_DATE - 30
+    GROUP BY r.id_producto, p.descripcion
+WITH DATA;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_top_ventas_mes ON mv_top_ventas_mes (id_producto);
+CREATE INDEX IF NOT EXISTS idx_mv_top_ventas_mes_total ON mv_top_ventas_mes (total_vendido DESC);
+
+-- Uso de métodos de pago (últimos 30 días al momento del refresco)
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_metodos_pago_mes AS
+    SELECT r.metodo_pago, SUM(r.tickets) AS cantidad_uso
+    FROM Resumen_Ventas_Diario r
+    WHERE r.fecha >= CURRENT_DATE - 30
+    GROUP BY r.metodo_pago
+WITH DATA;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_metodos_pago_mes ON mv_metodos_pago_mes (metodo_pago);
+
+-- Última venta de cada variante (NULL = nunca vendida). Sirve para cualquier periodo de
+-- "productos estancados": WHERE ultima_venta IS NULL OR ultima_venta < CURRENT_DATE - dias
+CREATE MATERIALIZED VIEW IF NOT EXISTS mv_ultima_venta_variante AS
+    SELECT v.id_variante, p.descripcion, v.talla, v.color, u.ultima_venta
+    FROM Variantes_Producto v
+    JOIN Productos p ON p.id_producto = v.id_producto
+    LEFT JOIN (
+        SELECT dv.id_variante, MAX(ve.fecha_venta) AS ultima_venta
+        FROM Detalles_Venta dv
+        JOIN Ventas ve ON ve.id_venta = dv.id_venta
+        GROUP BY dv.id_variante
+    ) u ON u.id_variante = v.id_variante
+WITH DATA;
+CREATE UNIQUE INDEX IF NOT EXISTS uq_mv_ultima_venta_variante ON mv_ultima_venta_variante (id_variante);
+CREATE INDEX IF NOT EXISTS idx_mv_ultima_venta_variante_fecha ON mv_ultima_venta_variante (ultima_venta);
+
+INSERT INTO Refresco_Vistas (nombre_vista, fecha_refresco)
+VALUES ('mv_top_ventas_mes', now()), ('mv_metodos_pago_mes', now()), ('mv_ultima_venta_variante', now())
+ON CONFLICT (nombre_vista) DO UPDATE SET fecha_refresco = EXCLUDED.fecha_refresco;
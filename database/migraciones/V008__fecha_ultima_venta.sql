@@ -0,0 +1,126 @@
+-- Fecha de la última venta de cada variante, mantenida por el camino de venta
+-- (el mismo UPDATE que descuenta el stock la marca; ver registrar_venta y VentasQueries.descontarStockMasivo).
+-- Con ella el reporte de productos estancados deja de recorrer todo Detalles_Venta:
+--   WHERE fecha_ultima_venta IS NULL OR fecha_ultima_venta < CURRENT_DATE - dias
+-- es una búsqueda por rango en idx_variantes_fecha_ultima_venta.
+-- Reconstruir a mano (p.ej. tras corregir ventas):
+--   PYTHONPATH=src python -m mis_trapitos.database_conexion.mantenimiento ultima-venta
+
+ALTER TABLE Variantes_Producto ADD COLUMN IF NOT EXISTS fecha_ultima_venta TIMESTAMPTZ;
+
+-- Recalcula la columna desde el historial. Bloquea nuevas ventas mientras corre.
+CREATE OR REPLACE FUNCTION reconstruir_fecha_ultima_venta()
+RETURNS INT
+LANGUAGE plpgsql
+AS $$
+DECLARE
+    v_filas INT;
+BEGIN
+    LOCK TABLE Ventas, Detalles_Venta IN SHARE ROW EXCLUSIVE MODE;
+
+    UPDATE Variantes_Producto v
+    SET fecha_ultima_venta = u.ultima_venta
+    FROM (
+        SELECT vp.id_variante, MAX(ve.fecha_venta) AS ultima_venta
+        FROM Variantes_Producto vp
+        LEFT JOIN Detalles_Venta dv ON dv.id_variante = vp.id_variante
+        LEFT JOIN Ventas ve ON ve.id_venta = dv.id_venta
+        GROUP BY vp.id_variante
+    ) u
+    WHERE v.id_variante = u.id_variante
+      AND v.fecha_ultima_venta IS DISTINCT FROM u.ultima_venta;
+    GET DIAGNOSTICS v_filas = ROW_COUNT;
+
+    RETURN v_filas;
+END;
+$$;
+
+-- Carga inicial (antes del índice: así no se mantiene fila por fila)
+SELECT reconstruir_fecha_ultima_venta();
+
+CREATE INDEX IF NOT EXISTS idx_variantes_fecha_ultima_venta ON Variantes_Producto (fecha_ultima_venta);
+
+-- La vista mv_ultima_venta_variante (V007) ya no hace falta: la columna está siempre al día
+DROP MATERIALIZED VIEW IF EXISTS mv_ultima_venta_variante;
+DELETE FROM Refresco_Vistas WHERE nombre_vista = 'mv_ultima_venta_variante';
+
+-- registrar_venta (V003) ahora también marca fecha_ultima_venta en el mismo UPDATE del stock.
+-- Registra ticket, detalles, descuento de stock y auditoría de forma atómica.
+-- p_lineas: [{"id_variante": 1, "cantidad": 2, "precio": 100.0, "descuento_manual": 0}, ...]
+CREATE OR REPLACE FUNCTION registrar_venta(
+    p_id_empleado INT,
+    p_id_cliente INT,
+    p_metodo_pago METODO_PAGO,
+    p_lineas JSONB
+)
+RETURNS TABLE (id_venta INT, total NUMERIC)
+LANGUAGE plpgsql AS $$
+#variable_conflict use_column
+DECLARE
+    v_id_venta INT;
+    v_total NUMERIC;
+    v_sin_stock TEXT;
+BEGIN
+    IF EXISTS (
+        SELECT 1 FROM jsonb_to_recordset(p_lineas) AS l(descuento_manual NUMERIC)
+        WHERE l.descuento_manual > 100
+    ) THEN
+        RAISE EXCEPTION 'Descuento inválido en la venta';
+    END IF;
+
+    -- Bloqueo de las variantes en orden ascendente de id (evita deadlocks entre cajas)
+    PERFORM 1
+    FROM Variantes_Producto vp
+    WHERE vp.id_variante IN (
+        SELECT l.id_variante FROM jsonb_to_recordset(p_lineas) AS l(id_variante INT)
+    )
+    ORDER BY vp.id_variante
+    FOR UPDATE;
+
+    SELECT COALESCE(SUM(lc.precio_final * lc.cantidad), 0)
+    INTO v_total
+    FROM lineas_venta_calculadas(p_lineas) lc;
+
+    -- 1. Ticket
+    INSERT INTO Ventas (id_empleado, id_cliente, metodo_pago, monto_total_venta)
+    VALUES (p_id_empleado, p_id_cliente, p_metodo_pago, v_total)
+    RETURNING Ventas.id_venta INTO v_id_venta;
+
+    -- 2. Detalles
+    INSERT INTO Detalles_Venta (id_venta, id_variante, cantidad, precio_unitario_venta, descuento_aplicado)
+    SELECT v_id_venta, lc.id_variante, lc.cantidad, lc.precio_final, lc.monto_descuento
+    FROM lineas_venta_calculadas(p_lineas) lc;
+
+    -- 3. Stock (agrupado por variante, solo si alcanza)
+    WITH pedido AS (
+        SELECT lc.id_variante, SUM(lc.cantidad) AS cantidad
+        FROM lineas_venta_calculadas(p_lineas) lc
+        GROUP BY lc.id_variante
+    ), actualizadas AS (
+        UPDATE Variantes_Producto vp
+        SET stock_disponible = vp.stock_disponible - pedido.cantidad,
+            fecha_ultima_venta = now()
+        FROM pedido
+        WHERE vp.id_variante = pedido.id_variante
+          AND vp.stock_disponible >= pedido.cantidad
+        RETURNING vp.id_variante
+    )
+    SELECT string_agg(pedido.id_variante::TEXT, ', ' ORDER BY pedido.id_variante)
+    INTO v_sin_stock
+    FROM pedido
+    WHERE pedido.id_variante NOT IN (SELECT a.id_variante FROM actualizadas a);
+
+    IF v_sin_stock IS NOT NULL THEN
+        RAISE EXCEPTION 'Stock insuficiente para variante(s) %', v_sin_stock;
+    END IF;
+
+    -- 4. Auditoría
+    INSERT INTO Log_Movimientos (id_empleado, accion, descripcion_detallada)
+    VALUES (
+        p_id_empleado, 'VENTA',
+        format('Venta ID %s registrada. Total: $%s', v_id_venta, to_char(v_total, 'FM9999999990.00'))
+    );
+
+    RETURN QUERY SELECT v_id_venta, ROUND(v_total, 2);
+END;
+$$;
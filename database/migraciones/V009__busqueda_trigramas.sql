@@ -0,0 +1,34 @@
+-- Búsqueda de catálogo en el servidor (para catálogos demasiado grandes para tenerlos en cada caja).
+-- Coincidencia por subcadena sin importar mayúsculas ni acentos sobre descripción, talla, color
+-- y categoría, con índices GIN de trigramas. La consulta está en
+-- src/mis_trapitos/database_conexion/queries.py (InventarioQueries.buscarProductos).
+-- Requiere las extensiones pg_trgm y unaccent (paquete contrib de PostgreSQL).
+
+CREATE EXTENSION IF NOT EXISTS pg_trgm;
+CREATE EXTENSION IF NOT EXISTS unaccent;
+
+-- unaccent() es STABLE (depende del diccionario configurado) y no se puede usar en un índice.
+-- Esta envoltura fija el diccionario y se declara IMMUTABLE para poder indexar f_unaccent(columna).
+CREATE OR REPLACE FUNCTION f_unaccent(TEXT)
+RETURNS TEXT
+LANGUAGE sql IMMUTABLE PARALLEL SAFE STRICT
+AS $$
+    SELECT public.unaccent('public.unaccent'::regdictionary, $1)
+$$;
+
+-- Subcadenas de 3+ letras: ILIKE '%texto%' sobre f_unaccent(columna) usa estos índices
+CREATE INDEX IF NOT EXISTS idx_productos_descripcion_trgm
+    ON Productos USING gin (f_unaccent(descripcion) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_variantes_color_trgm
+    ON Variantes_Producto USING gin (f_unaccent(color) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_variantes_talla_trgm
+    ON Variantes_Producto USING gin (f_unaccent(talla) gin_trgm_ops);
+CREATE INDEX IF NOT EXISTS idx_categorias_nombre_trgm
+    ON Categorias USING gin (f_unaccent(nombre_categoria) gin_trgm_ops);
+
+-- Palabras de 1-2 letras (trigramas no sirven): se comparan enteras contra talla ("M", "XL")
+CREATE INDEX IF NOT EXISTS idx_variantes_talla_normalizada
+    ON Variantes_Producto (lower(f_unaccent(talla)));
+
+-- Variantes de un producto / productos de una categoría (para unir lo que encontró cada índice)
+CREATE INDEX IF NOT EXISTS idx_variantes_producto ON Variantes_Producto (id_producto);
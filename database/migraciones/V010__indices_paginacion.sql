@@ -0,0 +1,15 @@
+-- Índices para la paginación por llave (keyset) de las tablas virtuales (src/mis_trapitos/ui/tabla_virtual.py).
+-- Cada página pide "las N filas siguientes a la última que ya tengo"; con estos índices
+-- PostgreSQL salta directo a esa posición en lugar de recorrer (y descartar) las anteriores.
+
+-- Inventario: ORDER BY p.id_producto DESC, v.id_variante
+-- (idx_productos_activos de V002 recorre los productos; este entrega sus variantes ya ordenadas)
+CREATE INDEX IF NOT EXISTS idx_variantes_producto_variante ON Variantes_Producto (id_producto, id_variante);
+-- Lo cubre el índice compuesto
+DROP INDEX IF EXISTS idx_variantes_producto;
+
+-- Clientes: ORDER BY nombre_completo, id_cliente (dos clientes pueden llamarse igual)
+CREATE INDEX IF NOT EXISTS idx_clientes_nombre_id_activos ON Clientes (nombre_completo, id_cliente) WHERE activo = TRUE;
+DROP INDEX IF EXISTS idx_clientes_nombre_activos;
+
+-- Proveedores y empleados se paginan por su llave primaria: no necesitan índice nuevo
@@ -0,0 +1,25 @@
+-- Marca de cambios del cache de catálogo que no se salta transacciones lentas.
+-- version_catalogo (V004) se asigna ANTES del commit: si la transacción A toma la versión 10
+-- y confirma después que B (versión 11), un cache que ya vio la 11 nunca pedía el cambio de A.
+-- Ahora cada fila guarda además el id de la transacción que la escribió; el cache pide
+-- "todo lo escrito por transacciones >= la más antigua que seguía abierta en mi consulta anterior"
+-- (txid_snapshot_xmin), que por definición incluye a las que confirmaron tarde.
+
+-- 0 = escrita antes de esta migración (más vieja que cualquier marca que vaya a usar el cache)
+ALTER TABLE Productos ADD COLUMN IF NOT EXISTS txid_catalogo BIGINT NOT NULL DEFAULT 0;
+ALTER TABLE Variantes_Producto ADD COLUMN IF NOT EXISTS txid_catalogo BIGINT NOT NULL DEFAULT 0;
+
+CREATE OR REPLACE FUNCTION marcar_version_catalogo()
+RETURNS trigger
+LANGUAGE plpgsql
+AS $$
+BEGIN
+    NEW.version_catalogo := nextval('seq_version_catalogo');
+    NEW.txid_catalogo := txid_current();
+    RETURN NEW;
+END;
+$$;
+
+-- Consulta de cambios: WHERE txid_catalogo >= :marca
+CREATE INDEX IF NOT EXISTS idx_productos_txid ON Productos (txid_catalogo);
+CREATE INDEX IF NOT EXISTS idx_variantes_txid ON Variantes_Producto (txid_catalogo);
@@ -6,6 +6,9 @@ from mis_trapitos.database_conexion.db_manager import DBManager
 # Importamos las vistas
 from mis_trapitos.ui.login_view import LoginView
 from mis_trapitos.ui.main_window import MainWindow 
+from mis_trapitos.ui.puente_cambios import ChangeBridge
+from mis_trapitos.ui.tareas_fondo import BackgroundExecutor
+from mis_trapitos.logica.refresco_reportes import ReportRefreshScheduler
 
 
 class MisTrapitosApp:
@@ -30,6 +33,15 @@ class MisTrapitosApp:
             return
 
         self.root.protocol("WM_DELETE_WINDOW", self.cerrarAplicacion)
+
+        # Avisos de cambios hechos en otras terminales (stock, precios, clientes)
+        ChangeBridge.obtenerInstancia().iniciar(self.root)
+
+        # Hilos de trabajo para que las consultas de las vistas no congelen la ventana
+        BackgroundExecutor.obtenerInstancia().iniciar(self.root)
+
+        # Recalcular las vistas de reportes de vez en cuando (V007)
+        ReportRefreshScheduler.obtenerInstancia().iniciar()
         
         # Variable para almacenar la vista actual
         self.vista_actual = None
@@ -84,4 +96,8 @@ class MisTrapitosApp:
 
     def cerrarAplicacion(self):
         if messagebox.askokcancel("Salir", "¿Desea cerrar el sistema?"):
-            self.root.destroy()
\ No newline at end of file
+            ChangeBridge.obtenerInstancia().detener()
+            BackgroundExecutor.obtenerInstancia().detener()
+            ReportRefreshScheduler.obtenerInstancia().detener()
+            self.root.destroy()
+            DBManager.cerrarPool() # Liberamos las conexiones del pool
\ No newline at end of file
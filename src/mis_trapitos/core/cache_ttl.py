@@ -0,0 +1,86 @@
+##Cache en memoria con caducidad (TTL) y tamaño máximo (LRU)
+
+import time
+import threading
+from collections import OrderedDict
+
+
+class CacheTTL:
+    """
+    Guarda resultados por clave durante 'ttl' segundos. Al pasar de 'maximo' entradas
+    se desaloja la usada hace más tiempo. Es seguro usarlo desde varios hilos.
+
+    Las claves son tuplas cuyo primer elemento es el nombre del grupo, p.ej.
+    ('top_ventas_mes',) o ('productos_estancados', 90), para poder invalidar por grupo.
+    """
+
+    _SIN_VALOR = object()
+
+    def __init__(self, maximo=128, ttl_por_defecto=60.0):
+        self.maximo = maximo
+        self.ttl_por_defecto = ttl_por_defecto
+        self._candado = threading.Lock()
+        self._entradas = OrderedDict() # {clave: (valor, vence_en)}
+        self._generacion = 0 # Sube en cada invalidar()
+        self.estadisticas = {'aciertos': 0, 'fallos': 0, 'expirados': 0, 'desalojos': 0, 'invalidaciones': 0}
+
+    def obtener(self, clave, por_defecto=None):
+        with self._candado:
+            entrada = self._entradas.get(clave)
+            if entrada is None:
+                self.estadisticas['fallos'] += 1
+                return por_defecto
+            valor, vence_en = entrada
+            if time.monotonic() >= vence_en:
+                del self._entradas[clave]
+                self.estadisticas['expirados'] += 1
+                self.estadisticas['fallos'] += 1
+                return por_defecto
+            self._entradas.move_to_end(clave) # Recién usada
+            self.estadisticas['aciertos'] += 1
+            return valor
+
+    def guardar(self, clave, valor, ttl=None):
+        segundos = self.ttl_por_defecto if ttl is None else ttl
+        if segundos <= 0:
+            return
+        with self._candado:
+            self._entradas[clave] = (valor, time.monotonic() + segundos)
+            self._entradas.move_to_end(clave)
+            while len(self._entradas) > self.maximo:
+                self._entradas.popitem(last=False)
+                self.estadisticas['desalojos'] += 1
+
+    def obtenerOCalcular(self, clave, funcion, ttl=None, guardar_si=None):
+        """
+        Retorna lo guardado o, si no hay (o ya venció), llama a funcion() y guarda su resultado.
+        Si funcion() lanza una excepción, o guardar_si(resultado) es falso, no se guarda nada.
+        """
+        valor = self.obtener(clave, self._SIN_VALOR)
+        if valor is not self._SIN_VALOR:
+            return valor
+        generacion = self._generacion
+        valor = funcion()
+        # Si alguien invalidó mientras se calculaba, el resultado puede ser viejo: se entrega pero no se guarda
+        if generacion == self._generacion and (guardar_si is None or guardar_si(valor)):
+            self.guardar(clave, valor, ttl)
+        return valor
+
+    def invalidar(self, grupo=None):
+        """Borra todo, o solo las entradas cuyo primer elemento de clave sea 'grupo'."""
+        with self._candado:
+            if grupo is None:
+                self._entradas.clear()
+            else:
+                for clave in [c for c in self._entradas if c[0] == grupo]:
+                    del self._entradas[clave]
+            self._generacion += 1
+            self.estadisticas['invalidaciones'] += 1
+
+    def obtenerEstadisticas(self):
+        with self._candado:
+            datos = dict(self.estadisticas)
+            datos['entradas'] = len(self._entradas)
+        consultas = datos['aciertos'] + datos['fallos']
+        datos['tasa_aciertos'] = round(datos['aciertos'] / consultas, 3) if consultas else 0.0
+        return datos
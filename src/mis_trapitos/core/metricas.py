@@ -0,0 +1,178 @@
+##Métricas de tiempo de las consultas
+
+import json
+import threading
+from datetime import datetime
+from mis_trapitos.core.logger import log
+
+# Límites superiores (ms) de cada cubeta del histograma; la última cubeta recibe todo lo demás
+LIMITES_CUBETAS_MS = (1, 2, 5, 10, 20, 50, 100, 200, 500, 1000, 2000, 5000)
+
+
+class HistogramaLatencias:
+    """
+    Histograma de cubetas fijas: memoria constante sin importar cuántas consultas se midan.
+    Los percentiles son aproximados (límite superior de la cubeta donde caen).
+    """
+
+    def __init__(self):
+        self.cubetas = [0] * (len(LIMITES_CUBETAS_MS) + 1)
+        self.cantidad = 0
+        self.suma_ms = 0.0
+        self.maximo_ms = 0.0
+
+    def agregar(self, valor_ms):
+        indice = 0
+        while indice < len(LIMITES_CUBETAS_MS) and valor_ms > LIMITES_CUBETAS_MS[indice]:
+            indice += 1
+        self.cubetas[indice] += 1
+        self.cantidad += 1
+        self.suma_ms += valor_ms
+        if valor_ms > self.maximo_ms:
+            self.maximo_ms = valor_ms
+
+    def percentil(self, porcentaje):
+        if not self.cantidad:
+            return 0.0
+        objetivo = self.cantidad * porcentaje / 100
+        acumulado = 0
+        for indice, conteo in enumerate(self.cubetas):
+            acumulado += conteo
+            if acumulado >= objetivo:
+                if indice < len(LIMITES_CUBETAS_MS):
+                    return float(min(LIMITES_CUBETAS_MS[indice], self.maximo_ms))
+                return self.maximo_ms
+        return self.maximo_ms
+
+    def resumen(self):
+        return {
+            'cantidad': self.cantidad,
+            'promedio_ms': round(self.suma_ms / self.cantidad, 3) if self.cantidad else 0.0,
+            'p50_ms': round(self.percentil(50), 3),
+            'p95_ms': round(self.percentil(95), 3),
+            'p99_ms': round(self.percentil(99), 3),
+            'max_ms': round(self.maximo_ms, 3),
+        }
+
+
+class MetricasConsultas:
+    """
+    Acumula por etiqueta (método *Queries que originó la consulta) los tiempos de
+    conexión, ejecución y lectura de filas. Es seguro usarlo desde varios hilos.
+    """
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._datos = {}
+        self._hilo_registro = None
+        self._detener_registro = threading.Event()
+        self.desde = datetime.now()
+
+    def registrar(self, etiqueta, conexion_ms, ejecucion_ms, lectura_ms, filas, error=False):
+        with self._candado:
+            datos = self._datos.get(etiqueta)
+            if datos is None:
+                datos = self._datos[etiqueta] = {
+                    'llamadas': 0, 'errores': 0, 'filas': 0,
+                    'conexion': HistogramaLatencias(),
+                    'ejecucion': HistogramaLatencias(),
+                    'lectura': HistogramaLatencias(),
+                    'total': HistogramaLatencias(),
+                }
+            datos['llamadas'] += 1
+            datos['filas'] += filas or 0
+            if error:
+                datos['errores'] += 1
+            if conexion_ms is not None:
+                datos['conexion'].agregar(conexion_ms)
+            datos['ejecucion'].agregar(ejecucion_ms)
+            datos['lectura'].agregar(lectura_ms)
+            datos['total'].agregar((conexion_ms or 0.0) + ejecucion_ms + lectura_ms)
+
+    def obtenerResumen(self):
+        """Retorna {etiqueta: {llamadas, errores, filas, conexion, ejecucion, lectura, total}}"""
+        with self._candado:
+            return {
+                etiqueta: {
+                    'llamadas': datos['llamadas'],
+                    'errores': datos['errores'],
+                    'filas': datos['filas'],
+                    'conexion': datos['conexion'].resumen(),
+                    'ejecucion': datos['ejecucion'].resumen(),
+                    'lectura': datos['lectura'].resumen(),
+                    'total': datos['total'].resumen(),
+                }
+                for etiqueta, datos in self._datos.items()
+            }
+
+    def reiniciar(self):
+        with self._candado:
+            self._datos = {}
+            self.desde = datetime.now()
+
+    def volcarArchivo(self, ruta_archivo):
+        """Guarda el resumen actual en un archivo JSON."""
+        contenido = {
+            'desde': self.desde.isoformat(timespec='seconds'),
+            'hasta': datetime.now().isoformat(timespec='seconds'),
+            'consultas': self.obtenerResumen(),
+        }
+        with open(ruta_archivo, 'w', encoding='utf-8') as archivo:
+            json.dump(contenido, archivo, ensure_ascii=False, indent=2)
+
+    def registrarEnLog(self, limite=10):
+        """Escribe en el log las 'limite' etiquetas con más tiempo acumulado."""
+        resumen = self.obtenerResumen()
+        if not resumen:
+            return
+        ordenadas = sorted(
+            resumen.items(),
+            key=lambda item: item[1]['total']['promedio_ms'] * item[1]['llamadas'],
+            reverse=True
+        )
+        log.info(f"Métricas de consultas ({len(resumen)} distintas desde {self.desde:%H:%M:%S}):")
+        for etiqueta, datos in ordenadas[:limite]:
+            total = datos['total']
+            log.info(
+                f"  {etiqueta}: {datos['llamadas']} llamadas, {datos['errores']} errores, {datos['filas']} filas | "
+                f"p50 {total['p50_ms']:.0f} ms, p95 {total['p95_ms']:.0f} ms, máx {total['max_ms']:.1f} ms"
+            )
+
+    def iniciarRegistroPeriodico(self, segundos):
+        """Lanza (una sola vez) un hilo demonio que llama a registrarEnLog cada 'segundos'."""
+        if segundos <= 0 or (self._hilo_registro and self._hilo_registro.is_alive()):
+            return
+        self._detener_registro.clear()
+
+        def ciclo():
+            while not self._detener_registro.wait(segundos):
+                self.registrarEnLog()
+
+        self._hilo_registro = threading.Thread(target=ciclo, name="registro_metricas", daemon=True)
+        self._hilo_registro.start()
+
+    def detenerRegistroPeriodico(self):
+        self._detener_registro.set()
+
+
+def describirParametros(parametros):
+    """
+    Forma de los parámetros sin sus valores (para no dejar datos de clientes en el log).
+    Ej: (5, 'Ana', [1, 2, 3]) -> "(int, str, list[3])"
+    """
+    if parametros is None:
+        return "()"
+    if isinstance(parametros, dict):
+        return "{" + ", ".join(f"{clave}: {describirParametros((valor,))[1:-1]}" for clave, valor in parametros.items()) + "}"
+
+    partes = []
+    for valor in parametros:
+        if isinstance(valor, (list, tuple, set)):
+            partes.append(f"{type(valor).__name__}[{len(valor)}]")
+        else:
+            partes.append(type(valor).__name__)
+    return "(" + ", ".join(partes) + ")"
+
+
+# Instancia global lista para importar (igual que 'log')
+metricas = MetricasConsultas()
@@ -0,0 +1,362 @@
+## Auditoría de planes de ejecución
+
+"""
+Recorre las clases *Queries, captura el SELECT que ejecuta cada método de lectura
+y lo corre bajo EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) contra la BD configurada en el .env.
+Reporta escaneos secuenciales, errores de estimación de filas y tiempos.
+
+Cada EXPLAIN ANALYZE corre dentro de una transacción que se revierte (rollback),
+así que no deja cambios ni candados aunque la consulta sea FOR UPDATE.
+
+Uso (desde la raíz del proyecto, con una BD sembrada):
+    PYTHONPATH=src python -m mis_trapitos.database_conexion.auditoria_consultas
+    PYTHONPATH=src python -m mis_trapitos.database_conexion.auditoria_consultas --json plan.json --estricto
+    PYTHONPATH=src python -m mis_trapitos.database_conexion.auditoria_consultas --ramas optimizadas
+
+Los reportes tienen dos versiones de varias consultas (tablas de resumen/vistas o el historial crudo).
+Por defecto se audita la que usaría la app contra esta BD; --ramas fuerza una u otra.
+"""
+
+import os
+import sys
+import json
+import inspect
+import argparse
+from psycopg2 import Error
+from mis_trapitos.database_conexion.db_manager import DBManager
+from mis_trapitos.database_conexion.queries import (
+    InventarioQueries, ClientesQueries, VentasQueries,
+    UsuariosQueries, ProveedoresQueries, DescuentosQueries
+)
+from mis_trapitos.database_conexion.reporte_queries import ReportQueries
+from mis_trapitos.core.logger import log
+
+CLASES_AUDITADAS = [
+    InventarioQueries, ClientesQueries, VentasQueries,
+    UsuariosQueries, ProveedoresQueries, DescuentosQueries, ReportQueries
+]
+
+# Parámetros de ejemplo por método. Los valores 'muestra:<clave>' se resuelven
+# con datos reales de la BD (ver obtenerMuestras) para que el plan sea representativo.
+PARAMETROS_EJEMPLO = {
+    'ClientesQueries.buscarClientePorTelefono': {'telefono': 'muestra:telefono'},
+    'ClientesQueries.obtenerHistorialCliente': {'id_cliente': 'muestra:id_cliente'},
+    'VentasQueries.bloquearVariantes': {'lista_id_variantes': 'muestra:ids_variantes', 'conexion_externa': None},
+    'InventarioQueries.obtenerCambiosInventario': {'desde_version': 'muestra:version_catalogo'},
+    'InventarioQueries.buscarProductos': {'texto': 'muestra:texto_busqueda'},
+    'UsuariosQueries.obtenerUsuarioPorUser': {'usuario': 'muestra:usuario'},
+    'ProveedoresQueries.obtenerProveedoresDeProducto': {'id_producto': 'muestra:id_producto'},
+    'DescuentosQueries.obtenerDescuentoActivo': {'id_variante': 'muestra:id_variante'},
+    'DescuentosQueries.obtenerDescuentosActivos': {'lista_id_variantes': 'muestra:ids_variantes'},
+    'ReportQueries.obtenerProductosRecurrentesCliente': {'id_cliente': 'muestra:id_cliente'},
+    'ReportQueries.buscarProductosCarosEnStock': {'precio_minimo': 500},
+}
+
+# Ramas de los reportes (V006/V007/V008): 'bd' = lo que haya instalado, 'optimizadas' = resumen y vistas,
+# 'respaldo' = consultas sobre el historial
+RAMAS_REPORTES = ('bd', 'optimizadas', 'respaldo')
+BANDERAS_REPORTES = ('_usar_resumen', '_usar_vistas', '_usar_fecha_ultima_venta')
+
+# Un nodo cuya estimación se aleja de lo real más de este factor se marca como sospechoso
+FACTOR_ERROR_ESTIMACION = 10.0
+# En tablas chicas PostgreSQL prefiere el escaneo secuencial (y está bien): no se reporta
+MIN_FILAS_SEQ_SCAN = 1000
+
+
+class GrabadorConsultas:
+    """
+    Sustituto de DBManager que no toca la BD: solo anota el SQL y los parámetros
+    que le pasan los métodos de lectura, y devuelve resultados vacíos.
+    """
+
+    def __init__(self):
+        self.capturas = []
+
+    def obtenerDatos(self, query_sql, parametros=None, conexion_externa=None):
+        self.capturas.append((query_sql, parametros))
+        return []
+
+    def obtenerDatosStream(self, query_sql, parametros=None, itersize=None, conexion_externa=None):
+        self.capturas.append((query_sql, parametros))
+        return iter([])
+
+
+def obtenerMuestras(db):
+    """
+    Elige valores reales para los parámetros: la variante, el cliente y el producto
+    con más movimiento, un teléfono y un usuario existentes.
+    """
+    muestras = {}
+
+    fila = db.obtenerDatos("""
+        SELECT dv.id_variante, vp.id_producto
+        FROM Detalles_Venta dv JOIN Variantes_Producto vp ON vp.id_variante = dv.id_variante
+        GROUP BY dv.id_variante, vp.id_producto ORDER BY COUNT(*) DESC LIMIT 1
+    """) or db.obtenerDatos("SELECT id_variante, id_producto FROM Variantes_Producto LIMIT 1")
+    muestras['id_variante'], muestras['id_producto'] = fila[0] if fila else (1, 1)
+
+    fila = db.obtenerDatos("SELECT id_variante FROM Variantes_Producto ORDER BY random() LIMIT 5")
+    muestras['ids_variantes'] = [f[0] for f in fila] or [muestras['id_variante']]
+
+    fila = db.obtenerDatos("""
+        SELECT id_cliente FROM Ventas WHERE id_cliente IS NOT NULL
+        GROUP BY id_cliente ORDER BY COUNT(*) DESC LIMIT 1
+    """)
+    muestras['id_cliente'] = fila[0][0] if fila else 1
+
+    fila = db.obtenerDatos("SELECT telefono FROM Clientes WHERE activo = TRUE AND telefono IS NOT NULL LIMIT 1")
+    muestras['telefono'] = fila[0][0] if fila else '0000000000'
+
+    fila = db.obtenerDatos("SELECT usuario FROM Empleados WHERE activo = TRUE LIMIT 1")
+    muestras['usuario'] = fila[0][0] if fila else 'admin'
+
+    # Lo que teclearía un cajero: el comienzo de una palabra de alguna descripción
+    fila = db.obtenerDatos("SELECT left(split_part(descripcion, ' ', 1), 4) FROM Productos WHERE activo = TRUE LIMIT 1")
+    muestras['texto_busqueda'] = fila[0][0] if fila and fila[0][0] else 'cami'
+
+    # Un refresco típico del cache de catálogo: desde la transacción más antigua abierta ahora (V011)
+    fila = db.obtenerDatos("SELECT txid_snapshot_xmin(txid_current_snapshot())")
+    muestras['version_catalogo'] = fila[0][0] if fila else 0
+
+    return muestras
+
+
+def _resolverParametros(parametros, muestras):
+    return {
+        nombre: muestras[valor.split(':', 1)[1]] if isinstance(valor, str) and valor.startswith('muestra:') else valor
+        for nombre, valor in parametros.items()
+    }
+
+
+def _esLectura(metodo):
+    """True si el código del método consulta con obtenerDatos/obtenerDatosStream."""
+    try:
+        codigo = inspect.getsource(metodo)
+    except (OSError, TypeError):
+        return False
+    return 'obtenerDatos' in codigo
+
+
+def _requiereArgumentos(metodo):
+    """True si el método tiene parámetros obligatorios (sin valor por defecto)."""
+    return any(
+        p.default is inspect.Parameter.empty
+        for p in inspect.signature(metodo).parameters.values()
+        if p.kind in (p.POSITIONAL_OR_KEYWORD, p.KEYWORD_ONLY)
+    )
+
+
+def detectarRamasReportes():
+    """Resuelve contra la BD real qué ramas de ReportQueries están instaladas (quedan en caché de clase)."""
+    reportes = ReportQueries()
+    reportes.existeResumenVentas()
+    reportes.existenVistasReportes()
+    reportes.existeFechaUltimaVenta()
+
+
+def _atributosInstancia(clase, ramas):
+    """Lo que pondría el __init__ de la clase (salvo self.db), según las ramas pedidas."""
+    if clase is ReportQueries:
+        if ramas == 'bd':
+            return {'vistas_activas': os.getenv('REPORTES_VISTAS', '1') != '0'}
+        return {'vistas_activas': ramas == 'optimizadas'}
+    return {}
+
+
+def _capturarClase(clase, ramas, muestras, consultas, omitidos):
+    """Captura los SELECT de una clase; acumula en consultas y omitidos."""
+    instancia = clase.__new__(clase) # Sin __init__: no abre el pool
+    instancia.__dict__.update(_atributosInstancia(clase, ramas))
+    for nombre, metodo in inspect.getmembers(instancia, inspect.ismethod):
+        if nombre.startswith('_') or not _esLectura(metodo):
+            continue
+        clave = f"{clase.__name__}.{nombre}"
+
+        if clave in PARAMETROS_EJEMPLO:
+            argumentos = _resolverParametros(PARAMETROS_EJEMPLO[clave], muestras)
+        elif _requiereArgumentos(metodo):
+            omitidos.append({'metodo': clave, 'motivo': "sin parámetros de ejemplo", 'fallo': False})
+            continue
+        else:
+            argumentos = {}
+
+        grabador = GrabadorConsultas()
+        instancia.db = grabador
+        try:
+            resultado = metodo(**argumentos)
+            if inspect.isgenerator(resultado):
+                list(resultado)
+        except Exception as e:
+            log.warning(f"No se pudo capturar {clave}: {e}")
+            omitidos.append({'metodo': clave, 'motivo': f"falló la captura: {e}", 'fallo': True})
+            continue
+
+        for sql, parametros in grabador.capturas:
+            if not sql.lstrip().upper().startswith('SELECT'):
+                continue
+            entrada = consultas.setdefault(sql, {'metodos': [], 'sql': sql, 'parametros': parametros})
+            entrada['metodos'].append(clave)
+
+
+def capturarConsultas(muestras, ramas='bd'):
+    """
+    Llama a cada método público de las clases auditadas con un GrabadorConsultas en lugar de DBManager.
+    ramas: ver RAMAS_REPORTES. Con 'bd' conviene llamar antes a detectarRamasReportes
+    (el grabador responde vacío y las verificaciones caerían siempre en el respaldo).
+    Retorna (consultas, omitidos):
+      consultas: lista de {'metodos': [...], 'sql': str, 'parametros': tuple}, sin SQL repetido
+      omitidos: lista de {'metodo', 'motivo', 'fallo'}: métodos sin ejemplo en PARAMETROS_EJEMPLO
+                (fallo=False) o cuya captura lanzó una excepción (fallo=True)
+    """
+    consultas = {}
+    omitidos = []
+
+    banderas_previas = {bandera: getattr(ReportQueries, bandera) for bandera in BANDERAS_REPORTES}
+    if ramas != 'bd':
+        for bandera in BANDERAS_REPORTES:
+            setattr(ReportQueries, bandera, ramas == 'optimizadas')
+
+    try:
+        for clase in CLASES_AUDITADAS:
+            _capturarClase(clase, ramas, muestras, consultas, omitidos)
+    finally:
+        for bandera, valor in banderas_previas.items():
+            setattr(ReportQueries, bandera, valor)
+
+    return list(consultas.values()), omitidos
+
+
+def _recorrerNodos(nodo):
+    yield nodo
+    for hijo in nodo.get('Plans', []):
+        yield from _recorrerNodos(hijo)
+
+
+def analizarPlan(plan_json, factor_error=FACTOR_ERROR_ESTIMACION, min_filas_seq_scan=MIN_FILAS_SEQ_SCAN):
+    """
+    Resume un plan de EXPLAIN (FORMAT JSON).
+    Retorna {tiempo_ms, planeacion_ms, seq_scans, errores_estimacion, bloques_leidos, bloques_cache}
+    """
+    raiz = plan_json[0]
+    plan = raiz['Plan']
+    seq_scans = []
+    errores_estimacion = []
+
+    for nodo in _recorrerNodos(plan):
+        if nodo['Node Type'] == 'Seq Scan':
+            # Filas que el escaneo tuvo que leer (las que pasaron el filtro + las descartadas)
+            leidas = (nodo.get('Actual Rows', 0) + nodo.get('Rows Removed by Filter', 0)) * nodo.get('Actual Loops', 1)
+            if leidas >= min_filas_seq_scan:
+                seq_scans.append(f"{nodo.get('Relation Name')} ({leidas} filas leídas)")
+
+        # Ambos valores son por ciclo (loop); se comparan en la misma escala
+        estimadas = max(nodo.get('Plan Rows', 0), 1)
+        reales = max(nodo.get('Actual Rows', 0), 1)
+        factor = max(estimadas, reales) / min(estimadas, reales)
+        if nodo.get('Actual Loops', 0) and factor >= factor_error:
+            errores_estimacion.append(
+                f"{nodo['Node Type']} {nodo.get('Relation Name', '')}".strip()
+                + f": estimadas {nodo.get('Plan Rows')} vs reales {nodo.get('Actual Rows')}"
+            )
+
+    return {
+        'tiempo_ms': raiz.get('Execution Time', 0.0),
+        'planeacion_ms': raiz.get('Planning Time', 0.0),
+        'seq_scans': seq_scans,
+        'errores_estimacion': errores_estimacion,
+        'bloques_cache': plan.get('Shared Hit Blocks', 0),
+        'bloques_leidos': plan.get('Shared Read Blocks', 0),
+    }
+
+
+def auditarConsultas(factor_error=FACTOR_ERROR_ESTIMACION, min_filas_seq_scan=MIN_FILAS_SEQ_SCAN, ramas='bd'):
+    """
+    Ejecuta la auditoría completa (ramas: ver RAMAS_REPORTES).
+    Retorna (resultados, omitidos); cada resultado es el dict de analizarPlan más 'metodos' y 'error'.
+    """
+    db = DBManager()
+    conn = db.obtenerConexion()
+    if not conn:
+        raise ConnectionError("No hay conexión a la BD.")
+
+    resultados = []
+    try:
+        muestras = obtenerMuestras(db)
+        if ramas == 'bd':
+            detectarRamasReportes()
+        consultas, omitidos = capturarConsultas(muestras, ramas)
+
+        cursor = conn.cursor()
+        for consulta in consultas:
+            resultado = {'metodos': consulta['metodos'], 'error': None}
+            try:
+                cursor.execute(
+                    "EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + consulta['sql'],
+                    consulta['parametros']
+                )
+                resultado.update(analizarPlan(cursor.fetchone()[0], factor_error, min_filas_seq_scan))
+            except Error as e:
+                resultado['error'] = str(e).strip()
+            finally:
+                conn.rollback() # ANALYZE ejecuta la consulta: no dejar rastro
+            resultados.append(resultado)
+        cursor.close()
+    finally:
+        db.cerrarConexion(conn)
+
+    resultados.sort(key=lambda r: r.get('tiempo_ms', 0.0), reverse=True)
+    return resultados, omitidos
+
+
+def imprimirReporte(resultados, omitidos):
+    print("--- AUDITORÍA DE PLANES (EXPLAIN ANALYZE) ---")
+    for r in resultados:
+        print(f"\n{', '.join(r['metodos'])}")
+        if r['error']:
+            print(f"   ERROR: {r['error']}")
+            continue
+        print(f"   Tiempo: {r['tiempo_ms']:.2f} ms (planeación {r['planeacion_ms']:.2f} ms) | "
+              f"Bloques: {r['bloques_cache']} en caché, {r['bloques_leidos']} leídos")
+        for scan in r['seq_scans']:
+            print(f"   [SEQ SCAN] {scan}")
+        for error in r['errores_estimacion']:
+            print(f"   [ESTIMACIÓN] {error}")
+
+    sin_ejemplo = [o['metodo'] for o in omitidos if not o['fallo']]
+    if sin_ejemplo:
+        print(f"\nSin parámetros de ejemplo (no auditados): {', '.join(sin_ejemplo)}")
+    for o in omitidos:
+        if o['fallo']:
+            print(f"[CAPTURA] {o['metodo']}: {o['motivo']}")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Auditoría EXPLAIN ANALYZE de las consultas de Mis Trapitos")
+    parser.add_argument('--factor-error', type=float, default=FACTOR_ERROR_ESTIMACION,
+                        help="Factor entre filas estimadas y reales a partir del cual se reporta")
+    parser.add_argument('--min-filas', type=int, default=MIN_FILAS_SEQ_SCAN,
+                        help="Solo reportar escaneos secuenciales que lean al menos estas filas")
+    parser.add_argument('--json', dest='ruta_json', default=None, help="Guardar el resultado en un archivo JSON")
+    parser.add_argument('--estricto', action='store_true',
+                        help="Salir con código 1 si hay escaneos secuenciales, errores de estimación o fallos")
+    parser.add_argument('--ramas', choices=RAMAS_REPORTES, default='bd',
+                        help="Qué consultas de reportes auditar: las que use esta BD, las optimizadas o las de respaldo")
+    opciones = parser.parse_args(argumentos)
+
+    resultados, omitidos = auditarConsultas(opciones.factor_error, opciones.min_filas, opciones.ramas)
+    imprimirReporte(resultados, omitidos)
+
+    if opciones.ruta_json:
+        with open(opciones.ruta_json, 'w', encoding='utf-8') as archivo:
+            json.dump({'consultas': resultados, 'omitidos': omitidos}, archivo, ensure_ascii=False, indent=2)
+
+    if opciones.estricto and (
+        any(r['error'] or r.get('seq_scans') or r.get('errores_estimacion') for r in resultados)
+        or any(o['fallo'] for o in omitidos)
+    ):
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
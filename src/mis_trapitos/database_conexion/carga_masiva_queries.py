@@ -0,0 +1,430 @@
+## Consultas para cargas masivas desde archivo (catálogo de temporada, entregas de proveedores)
+
+from mis_trapitos.database_conexion.db_manager import DBManager
+
+# Columnas del archivo de catálogo (el encabezado puede traerlas en cualquier orden)
+COLUMNAS_CATALOGO = ('categoria', 'descripcion', 'precio', 'talla', 'color', 'stock')
+
+# Columnas del archivo de entrega de un proveedor (proveedor = su ID o su nombre)
+COLUMNAS_ENTREGA = ('id_variante', 'cantidad', 'proveedor')
+
+# Candado de asesoría: dos importaciones a la vez podrían crear el mismo producto dos veces
+CLAVE_CANDADO_IMPORTACION = 72_601_003
+
+# Literal SQL de cada separador aceptado (COPY no acepta el separador como parámetro)
+_DELIMITADORES = {',': "','", ';': "';'", '\t': "E'\\t'"}
+
+# Categoría -> id, una sola por nombre sin importar mayúsculas (la más antigua si hay repetidas)
+_SQL_CATEGORIAS_POR_NOMBRE = """
+    SELECT DISTINCT ON (lower(nombre_categoria)) lower(nombre_categoria) AS clave, id_categoria
+    FROM Categorias
+    ORDER BY lower(nombre_categoria), id_categoria
+"""
+
+
+class BulkLoadQueries:
+    """
+    Todo trabaja sobre tablas temporales de la conexión recibida (ON COMMIT DROP):
+    siempre hay que pasar 'conexion_externa' y confirmar o deshacer desde quien llama.
+    El archivo entra completo con COPY; la validación y la aplicación son un puñado de
+    sentencias sobre todas las filas a la vez, sin un INSERT/UPDATE por fila.
+    """
+
+    def __init__(self):
+        self.db = DBManager()
+
+    # --- IMPORTACIÓN DE CATÁLOGO ---
+
+    def prepararImportacionCatalogo(self, conexion_externa):
+        """Toma el candado de importación y crea la tabla temporal donde cae el archivo (todo como texto)."""
+        self.db.obtenerDatos("SELECT pg_advisory_xact_lock(%s)", (CLAVE_CANDADO_IMPORTACION,), conexion_externa)
+        sql = """
+            CREATE TEMP TABLE tmp_importacion_catalogo (
+                linea BIGINT GENERATED ALWAYS AS IDENTITY,
+                categoria TEXT,
+                descripcion TEXT,
+                precio TEXT,
+                talla TEXT,
+                color TEXT,
+                stock TEXT,
+                precio_num DECIMAL(10, 2),
+                stock_num INT,
+                id_categoria INT,
+                motivo TEXT -- NULL = fila válida
+            ) ON COMMIT DROP
+        """
+        self.db.ejecutarConsulta(sql, None, conexion_externa)
+
+    def _copiar(self, tabla, columnas_validas, archivo, columnas, delimitador, conexion_externa):
+        """
+        Copia el archivo (abierto en modo texto) a la tabla temporal con COPY.
+        'columnas' es el encabezado del archivo, ya validado contra 'columnas_validas'.
+        Retorna el número de filas leídas.
+        """
+        # Los nombres van dentro del SQL: solo se aceptan los conocidos
+        if not set(columnas) <= set(columnas_validas) or delimitador not in _DELIMITADORES:
+            raise ValueError("Columnas o separador no válidos para el archivo.")
+        sql = (
+            f"COPY {tabla} ({', '.join(columnas)}) "
+            f"FROM STDIN WITH (FORMAT csv, HEADER true, DELIMITER {_DELIMITADORES[delimitador]})"
+        )
+        return self.db.ejecutarCopy(sql, archivo, conexion_externa)
+
+    def copiarCatalogo(self, archivo, columnas, delimitador, conexion_externa):
+        return self._copiar('tmp_importacion_catalogo', COLUMNAS_CATALOGO, archivo, columnas, delimitador, conexion_externa)
+
+    def validarCatalogo(self, conexion_externa):
+        """
+        Marca con un motivo cada fila que no se puede importar. Retorna cuántas quedaron rechazadas.
+        Precio: número positivo con hasta 2 decimales (acepta coma decimal). Stock: entero >= 0.
+        """
+        # 1. Limpiar espacios; los vacíos cuentan como faltantes
+        self.db.ejecutarConsulta("""
+            UPDATE tmp_importacion_catalogo SET
+                categoria = nullif(btrim(categoria), ''),
+                descripcion = nullif(btrim(descripcion), ''),
+                talla = nullif(btrim(talla), ''),
+                color = nullif(btrim(color), ''),
+                precio = replace(btrim(precio), ',', '.'),
+                stock = btrim(stock)
+        """, None, conexion_externa)
+
+        # 2. Revisión fila por fila (la primera falla que encuentre es el motivo)
+        self.db.ejecutarConsulta("""
+            UPDATE tmp_importacion_catalogo SET motivo = CASE
+                WHEN categoria IS NULL THEN 'Falta la categoría'
+                WHEN length(categoria) > 100 THEN 'Categoría de más de 100 caracteres'
+                WHEN descripcion IS NULL THEN 'Falta la descripción'
+                WHEN talla IS NULL OR color IS NULL THEN 'Falta la talla o el color'
+                WHEN length(talla) > 50 OR length(color) > 50 THEN 'Talla o color de más de 50 caracteres'
+                WHEN precio IS NULL OR precio !~ '^[0-9]{1,8}([.][0-9]{1,2})?$' THEN 'Precio inválido'
+                WHEN precio::numeric <= 0 THEN 'El precio debe ser mayor a 0'
+                WHEN stock IS NULL OR stock !~ '^[0-9]{1,9}$' THEN 'Stock inválido (entero de 0 en adelante)'
+            END
+        """, None, conexion_externa)
+
+        self.db.ejecutarConsulta("""
+            UPDATE tmp_importacion_catalogo SET precio_num = precio::numeric, stock_num = stock::int
+            WHERE motivo IS NULL
+        """, None, conexion_externa)
+
+        # 3. Conflictos dentro del mismo archivo (producto = categoría + descripción, sin mayúsculas)
+        self.db.ejecutarConsulta("""
+            UPDATE tmp_importacion_catalogo t SET motivo = 'El mismo producto aparece con precios distintos'
+            FROM (
+                SELECT lower(categoria) AS categoria, lower(descripcion) AS descripcion
+                FROM tmp_importacion_catalogo
+                WHERE motivo IS NULL
+                GROUP BY 1, 2
+                HAVING count(DISTINCT precio_num) > 1
+            ) x
+            WHERE t.motivo IS NULL
+              AND lower(t.categoria) = x.categoria AND lower(t.descripcion) = x.descripcion
+        """, None, conexion_externa)
+
+        self.db.ejecutarConsulta("""
+            UPDATE tmp_importacion_catalogo t SET motivo = 'Variante repetida en el archivo'
+            FROM (
+                SELECT lower(categoria) AS categoria, lower(descripcion) AS descripcion,
+                       lower(talla) AS talla, lower(color) AS color
+                FROM tmp_importacion_catalogo
+                WHERE motivo IS NULL
+                GROUP BY 1, 2, 3, 4
+                HAVING count(*) > 1
+            ) x
+            WHERE t.motivo IS NULL
+              AND lower(t.categoria) = x.categoria AND lower(t.descripcion) = x.descripcion
+              AND lower(t.talla) = x.talla AND lower(t.color) = x.color
+        """, None, conexion_externa)
+
+        # Las tablas temporales no las analiza autovacuum: sin esto los JOIN siguientes se planean a ciegas
+        self.db.ejecutarConsulta("ANALYZE tmp_importacion_catalogo", None, conexion_externa)
+
+        res = self.db.obtenerDatos(
+            "SELECT count(*) FROM tmp_importacion_catalogo WHERE motivo IS NOT NULL", None, conexion_externa
+        )
+        return res[0][0] if res else 0
+
+    def obtenerRechazosCatalogo(self, conexion_externa):
+        """Filas rechazadas: (línea del archivo, motivo, categoria, descripcion, precio, talla, color, stock)."""
+        sql = """
+            SELECT linea + 1, motivo, categoria, descripcion, precio, talla, color, stock
+            FROM tmp_importacion_catalogo
+            WHERE motivo IS NOT NULL
+            ORDER BY linea
+        """ # +1: la línea 1 es el encabezado
+        return self.db.obtenerDatos(sql, None, conexion_externa)
+
+    def aplicarCatalogo(self, conexion_externa):
+        """
+        Da de alta o actualiza categorías, productos y variantes con las filas válidas.
+        Las coincidencias no distinguen mayúsculas; se conserva como está escrito en la BD.
+        El stock del archivo es el stock final de la variante (no se suma).
+        Retorna un dict con lo creado y lo actualizado.
+        """
+        resumen = {}
+
+        # 1. Categorías que faltan
+        res = self.db.obtenerDatos("""
+            WITH nuevas AS (
+                INSERT INTO Categorias (nombre_categoria)
+                SELECT min(t.categoria)
+                FROM tmp_importacion_catalogo t
+                WHERE t.motivo IS NULL
+                  AND NOT EXISTS (SELECT 1 FROM Categorias c WHERE lower(c.nombre_categoria) = lower(t.categoria))
+                GROUP BY lower(t.categoria)
+                ON CONFLICT (nombre_categoria) DO NOTHING
+                RETURNING 1
+            )
+            SELECT count(*) FROM nuevas
+        """, None, conexion_externa)
+        resumen['categorias_creadas'] = res[0][0]
+
+        self.db.ejecutarConsulta(f"""
+            UPDATE tmp_importacion_catalogo t SET id_categoria = c.id_categoria
+            FROM ({_SQL_CATEGORIAS_POR_NOMBRE}) c
+            WHERE t.motivo IS NULL AND c.clave = lower(t.categoria)
+        """, None, conexion_externa)
+
+        # 2. Un renglón por producto del archivo (con la forma en que aparece la primera vez)
+        self.db.ejecutarConsulta("""
+            CREATE TEMP TABLE tmp_importacion_productos ON COMMIT DROP AS
+            SELECT DISTINCT ON (id_categoria, lower(descripcion))
+                   id_categoria, lower(descripcion) AS clave, descripcion, precio_num AS precio,
+                   NULL::INT AS id_producto
+            FROM tmp_importacion_catalogo
+            WHERE motivo IS NULL
+            ORDER BY id_categoria, lower(descripcion), linea
+        """, None, conexion_externa)
+
+        # Si el producto ya existe (varias veces), se usa el activo más reciente
+        self.db.ejecutarConsulta("""
+            UPDATE tmp_importacion_productos tp SET id_producto = m.id_producto
+            FROM (
+                SELECT DISTINCT ON (p.id_categoria, lower(p.descripcion))
+                       p.id_categoria, lower(p.descripcion) AS clave, p.id_producto
+                FROM Productos p
+                JOIN tmp_importacion_productos t
+                  ON t.id_categoria = p.id_categoria AND t.clave = lower(p.descripcion)
+                ORDER BY p.id_categoria, lower(p.descripcion), p.activo IS TRUE DESC, p.id_producto DESC
+            ) m
+            WHERE m.id_categoria = tp.id_categoria AND m.clave = tp.clave
+        """, None, conexion_externa)
+
+        # 3. Productos existentes: precio nuevo y de vuelta a activos (solo los que cambian)
+        resumen['productos_actualizados'] = self.db.ejecutarConsulta("""
+            UPDATE Productos p SET precio_base = tp.precio, activo = TRUE
+            FROM tmp_importacion_productos tp
+            WHERE p.id_producto = tp.id_producto
+              AND (p.precio_base <> tp.precio OR p.activo IS NOT TRUE)
+        """, None, conexion_externa)
+
+        # 4. Productos nuevos
+        resumen['productos_creados'] = self.db.ejecutarConsulta("""
+            WITH nuevos AS (
+                INSERT INTO Productos (id_categoria, descripcion, precio_base)
+                SELECT id_categoria, descripcion, precio
+                FROM tmp_importacion_productos
+                WHERE id_producto IS NULL
+                RETURNING id_producto, id_categoria, lower(descripcion) AS clave
+            )
+            UPDATE tmp_importacion_productos tp SET id_producto = n.id_producto
+            FROM nuevos n
+            WHERE n.id_categoria = tp.id_categoria AND n.clave = tp.clave
+        """, None, conexion_externa)
+
+        # 5. Variantes: talla/color con la escritura que ya tiene la BD ("rojo" -> "Rojo")
+        self.db.ejecutarConsulta("""
+            UPDATE tmp_importacion_catalogo t SET talla = v.talla, color = v.color
+            FROM tmp_importacion_productos tp
+            JOIN Variantes_Producto v ON v.id_producto = tp.id_producto
+            WHERE t.motivo IS NULL
+              AND tp.id_categoria = t.id_categoria AND tp.clave = lower(t.descripcion)
+              AND lower(v.talla) = lower(t.talla) AND lower(v.color) = lower(t.color)
+              AND (v.talla, v.color) IS DISTINCT FROM (t.talla, t.color)
+        """, None, conexion_externa)
+
+        # Las variantes que ya existen se bloquean antes en el mismo orden que las ventas (id ascendente);
+        # el upsert las tomaría por (id_producto, talla, color) y podría cruzarse con una caja cobrando
+        self.db.obtenerDatos("""
+            SELECT count(*) FROM (
+                SELECT 1 FROM Variantes_Producto v
+                WHERE (v.id_producto, v.talla, v.color) IN (
+                    SELECT tp.id_producto, t.talla, t.color
+                    FROM tmp_importacion_catalogo t
+                    JOIN tmp_importacion_productos tp
+                      ON tp.id_categoria = t.id_categoria AND tp.clave = lower(t.descripcion)
+                    WHERE t.motivo IS NULL
+                )
+                ORDER BY v.id_variante
+                FOR UPDATE
+            ) bloqueadas
+        """, None, conexion_externa)
+
+        # xmax = 0 solo en las filas recién insertadas; las que no cambian de stock no se reescriben
+        res = self.db.obtenerDatos("""
+            WITH escritas AS (
+                INSERT INTO Variantes_Producto (id_producto, talla, color, stock_disponible)
+                SELECT tp.id_producto, t.talla, t.color, t.stock_num
+                FROM tmp_importacion_catalogo t
+                JOIN tmp_importacion_productos tp
+                  ON tp.id_categoria = t.id_categoria AND tp.clave = lower(t.descripcion)
+                WHERE t.motivo IS NULL
+                ORDER BY tp.id_producto, t.talla, t.color
+                ON CONFLICT (id_producto, talla, color) DO UPDATE
+                    SET stock_disponible = EXCLUDED.stock_disponible
+                    WHERE Variantes_Producto.stock_disponible <> EXCLUDED.stock_disponible
+                RETURNING (xmax = 0) AS insertada
+            )
+            SELECT count(*) FILTER (WHERE insertada), count(*) FILTER (WHERE NOT insertada)
+            FROM escritas
+        """, None, conexion_externa)
+        resumen['variantes_creadas'], resumen['variantes_actualizadas'] = res[0]
+
+        return resumen
+
+    # --- ENTREGAS DE PROVEEDORES (RESURTIDO) ---
+
+    def prepararEntrega(self, conexion_externa):
+        """Crea la tabla temporal donde cae el archivo de la entrega (todo como texto)."""
+        sql = """
+            CREATE TEMP TABLE tmp_entrega_proveedor (
+                linea BIGINT GENERATED ALWAYS AS IDENTITY,
+                id_variante TEXT,
+                cantidad TEXT,
+                proveedor TEXT,
+                id_variante_num INT,
+                cantidad_num INT,
+                id_producto INT,
+                id_proveedor INT,
+                motivo TEXT -- NULL = fila válida
+            ) ON COMMIT DROP
+        """
+        self.db.ejecutarConsulta(sql, None, conexion_externa)
+
+    def copiarEntrega(self, archivo, columnas, delimitador, conexion_externa):
+        return self._copiar('tmp_entrega_proveedor', COLUMNAS_ENTREGA, archivo, columnas, delimitador, conexion_externa)
+
+    def validarEntrega(self, conexion_externa):
+        """
+        Marca con un motivo cada fila que no se puede aplicar. Retorna cuántas quedaron rechazadas.
+        La variante debe existir y su producto estar activo; el proveedor (ID o nombre) estar activo.
+        """
+        self.db.ejecutarConsulta("""
+            UPDATE tmp_entrega_proveedor SET
+                id_variante = btrim(id_variante),
+                cantidad = btrim(cantidad),
+                proveedor = nullif(btrim(proveedor), '')
+        """, None, conexion_externa)
+
+        self.db.ejecutarConsulta("""
+            UPDATE tmp_entrega_proveedor SET motivo = CASE
+                WHEN id_variante IS NULL OR id_variante !~ '^[0-9]{1,9}$' THEN 'Variante (SKU) inválida'
+                WHEN cantidad IS NULL OR cantidad !~ '^[0-9]{1,6}$' THEN 'Cantidad inválida (entero de 1 a 999999)'
+                WHEN cantidad::int = 0 THEN 'La cantidad debe ser mayor a 0'
+                WHEN proveedor IS NULL THEN 'Falta el proveedor'
+            END
+        """, None, conexion_externa)
+
+        self.db.ejecutarConsulta("""
+            UPDATE tmp_entrega_proveedor SET id_variante_num = id_variante::int, cantidad_num = cantidad::int
+            WHERE motivo IS NULL
+        """, None, conexion_externa)
+
+        # Variante -> producto (solo productos a la venta)
+        self.db.ejecutarConsulta("""
+            UPDATE tmp_entrega_proveedor t SET id_producto = v.id_producto
+            FROM Variantes_Producto v
+            JOIN Productos p ON p.id_producto = v.id_producto
+            WHERE t.motivo IS NULL AND v.id_variante = t.id_variante_num AND p.activo = TRUE
+        """, None, conexion_externa)
+        self.db.ejecutarConsulta("""
+            UPDATE tmp_entrega_proveedor SET motivo = 'La variante no existe o su producto está dado de baja'
+            WHERE motivo IS NULL AND id_producto IS NULL
+        """, None, conexion_externa)
+
+        # Proveedor por ID, o por nombre (sin mayúsculas) si no hay dos activos que se llamen igual
+        self.db.ejecutarConsulta("""
+            UPDATE tmp_entrega_proveedor t SET id_proveedor = pr.id_proveedor
+            FROM (
+                SELECT id_proveedor, id_proveedor::text AS clave
+                FROM Proveedores WHERE activo = TRUE
+                UNION ALL
+                SELECT min(id_proveedor), lower(nombre_proveedor)
+                FROM Proveedores WHERE activo = TRUE
+                GROUP BY lower(nombre_proveedor)
+                HAVING count(*) = 1
+            ) pr
+            WHERE t.motivo IS NULL AND pr.clave = lower(t.proveedor)
+        """, None, conexion_externa)
+        self.db.ejecutarConsulta("""
+            UPDATE tmp_entrega_proveedor SET motivo = 'Proveedor desconocido (si hay dos con el mismo nombre, use su ID)'
+            WHERE motivo IS NULL AND id_proveedor IS NULL
+        """, None, conexion_externa)
+
+        self.db.ejecutarConsulta("ANALYZE tmp_entrega_proveedor", None, conexion_externa)
+
+        res = self.db.obtenerDatos(
+            "SELECT count(*) FROM tmp_entrega_proveedor WHERE motivo IS NOT NULL", None, conexion_externa
+        )
+        return res[0][0] if res else 0
+
+    def obtenerRechazosEntrega(self, conexion_externa):
+        """Filas rechazadas: (línea del archivo, motivo, id_variante, cantidad, proveedor)."""
+        sql = """
+            SELECT linea + 1, motivo, id_variante, cantidad, proveedor
+            FROM tmp_entrega_proveedor
+            WHERE motivo IS NOT NULL
+            ORDER BY linea
+        """ # +1: la línea 1 es el encabezado
+        return self.db.obtenerDatos(sql, None, conexion_externa)
+
+    def aplicarEntrega(self, conexion_externa):
+        """
+        Suma al stock lo recibido (si una variante viene en varias filas, se suman todas)
+        y vincula cada producto con el proveedor que lo entregó.
+        Retorna un dict con variantes resurtidas, unidades, proveedores y vínculos nuevos.
+        """
+        resumen = {}
+
+        # Mismo orden de bloqueo que las ventas (id ascendente): una caja cobrando no provoca deadlock
+        self.db.obtenerDatos("""
+            SELECT count(*) FROM (
+                SELECT 1 FROM Variantes_Producto
+                WHERE id_variante IN (SELECT id_variante_num FROM tmp_entrega_proveedor WHERE motivo IS NULL)
+                ORDER BY id_variante
+                FOR UPDATE
+            ) bloqueadas
+        """, None, conexion_externa)
+
+        # Incremento relativo: lo que se vendió mientras tanto se respeta
+        resumen['variantes'] = self.db.ejecutarConsulta("""
+            UPDATE Variantes_Producto v SET stock_disponible = v.stock_disponible + e.cantidad
+            FROM (
+                SELECT id_variante_num AS id_variante, sum(cantidad_num) AS cantidad
+                FROM tmp_entrega_proveedor
+                WHERE motivo IS NULL
+                GROUP BY id_variante_num
+            ) e
+            WHERE v.id_variante = e.id_variante
+        """, None, conexion_externa)
+
+        resumen['vinculos_nuevos'] = self.db.ejecutarConsulta("""
+            INSERT INTO Proveedores_Productos (id_proveedor, id_producto)
+            SELECT DISTINCT id_proveedor, id_producto
+            FROM tmp_entrega_proveedor
+            WHERE motivo IS NULL
+            ORDER BY id_proveedor, id_producto
+            ON CONFLICT (id_proveedor, id_producto) DO NOTHING
+        """, None, conexion_externa)
+
+        res = self.db.obtenerDatos("""
+            SELECT coalesce(sum(t.cantidad_num), 0),
+                   string_agg(DISTINCT p.nombre_proveedor, ', ')
+            FROM tmp_entrega_proveedor t
+            JOIN Proveedores p ON p.id_proveedor = t.id_proveedor
+            WHERE t.motivo IS NULL
+        """, None, conexion_externa)
+        resumen['unidades'], resumen['proveedores'] = res[0][0], res[0][1] or ''
+
+        return resumen
@@ -1,15 +1,30 @@
 ## Administrador de la base de datos
 
 import os
+import sys
+import time
+import uuid
+import threading
 import psycopg2
 from psycopg2 import Error
+from psycopg2.extras import execute_values
+from psycopg2.pool import PoolError
 from dotenv import load_dotenv
 from mis_trapitos.core.logger import log
+from mis_trapitos.core.metricas import metricas, describirParametros
+from mis_trapitos.database_conexion.pool_conexiones import ConnectionPool
 
 load_dotenv()
 
 class DBManager:
-    """Clase responsable de gestionar la conexión con la base de datos PostgreSQL"""
+    """
+    Clase responsable de gestionar la conexión con la base de datos PostgreSQL.
+    Todas las instancias comparten un mismo pool de conexiones por proceso,
+    así cada *Queries reutiliza conexiones ya abiertas.
+    """
+
+    _pool = None
+    _candado_pool = threading.Lock()
 
     def __init__(self):
         """Inicializa los parámetros de conexión cargados desde el archivo .env"""
@@ -19,25 +34,132 @@ class DBManager:
         self.password = os.getenv('DB_PASS')
         self.port = os.getenv('DB_PORT')
 
+        # Configuración del pool (valores por defecto pensados para una caja con pocas ventanas)
+        self.pool_minimo = int(os.getenv('DB_POOL_MIN', '1'))
+        self.pool_maximo = int(os.getenv('DB_POOL_MAX', '10'))
+        self.pool_timeout = float(os.getenv('DB_POOL_TIMEOUT', '30'))
+        self.pool_verificacion = float(os.getenv('DB_POOL_VERIFICACION_SEG', '60'))
+        # Filas que trae cada viaje de un cursor de servidor (obtenerDatosStream)
+        self.cursor_itersize = int(os.getenv('DB_CURSOR_ITERSIZE', '2000'))
+
+        # Métricas por consulta (ver core/metricas.py)
+        self.metricas_activas = os.getenv('DB_METRICAS', '1') != '0'
+        self.umbral_consulta_lenta_ms = float(os.getenv('DB_CONSULTA_LENTA_MS', '500'))
+
+    def _parametrosConexion(self):
+        return {
+            'host': self.host,
+            'database': self.database,
+            'user': self.user,
+            'password': self.password,
+            'port': self.port
+        }
+
+    def _obtenerPool(self):
+        """Crea el pool compartido la primera vez que se necesita (inicialización perezosa)"""
+        if DBManager._pool is None:
+            with DBManager._candado_pool:
+                if DBManager._pool is None:
+                    DBManager._pool = ConnectionPool(
+                        self._parametrosConexion(),
+                        minimo=self.pool_minimo,
+                        maximo=self.pool_maximo,
+                        timeout=self.pool_timeout,
+                        segundos_verificacion=self.pool_verificacion
+                    )
+                    if self.metricas_activas:
+                        metricas.iniciarRegistroPeriodico(float(os.getenv('DB_METRICAS_LOG_SEG', '0')))
+        return DBManager._pool
+
     def obtenerConexion(self):
-        """Establece conexión con la BD y retorna el objeto conexión"""
+        """Toma prestada una conexión del pool y la retorna (None si falla)"""
         try:
-            conexion_bd = psycopg2.connect(
-                host=self.host,
-                database=self.database,
-                user=self.user,
-                password=self.password,
-                port=self.port
-            )
-            return conexion_bd
-        except Error as error_detectado:
+            return self._obtenerPool().prestar()
+        except (Error, PoolError) as error_detectado:
             log.error(f"Fallo crítico de conexión a BD: {error_detectado}")
             return None
 
     def cerrarConexion(self, conexion_activa):
-        """Cierra la conexión activa si existe para liberar recursos"""
+        """Devuelve la conexión al pool para que otra consulta la reutilice"""
         if conexion_activa:
-            conexion_activa.close()
+            self._obtenerPool().devolver(conexion_activa)
+
+    def abrirConexionDedicada(self):
+        """
+        Abre una conexión propia, FUERA del pool (p.ej. para LISTEN, que la ocupa indefinidamente).
+        Quien la pide es responsable de cerrarla con .close(). Retorna None si falla.
+        """
+        try:
+            return psycopg2.connect(**self._parametrosConexion())
+        except Error as error_detectado:
+            log.error(f"No se pudo abrir una conexión dedicada: {error_detectado}")
+            return None
+
+    def obtenerEstadisticasPool(self):
+        """Retorna los contadores del pool (préstamos, esperas, conexiones abiertas, etc.)"""
+        return self._obtenerPool().obtenerEstadisticas()
+
+    @classmethod
+    def cerrarPool(cls):
+        """Cierra todas las conexiones del pool compartido (al salir de la aplicación)"""
+        with cls._candado_pool:
+            if cls._pool is not None:
+                cls._pool.cerrarTodas()
+                cls._pool = None
+
+        metricas.detenerRegistroPeriodico()
+        ruta_metricas = os.getenv('DB_METRICAS_ARCHIVO')
+        if ruta_metricas:
+            try:
+                metricas.volcarArchivo(ruta_metricas)
+            except OSError as e:
+                log.error(f"No se pudieron guardar las métricas en {ruta_metricas}: {e}")
+
+    # --- MÉTRICAS ---
+
+    @staticmethod
+    def _etiquetaLlamador():
+        """
+        Nombre del método *Queries que pidió la consulta (ej. 'VentasQueries.bloquearVariantes').
+        Si la llamada no viene de un *Queries se usa el primer método fuera de este archivo.
+        """
+        marco = sys._getframe(2)
+        primero_externo = None
+        while marco is not None:
+            if marco.f_code.co_filename != __file__:
+                instancia = marco.f_locals.get('self')
+                if instancia is not None and type(instancia).__name__.endswith('Queries'):
+                    return f"{type(instancia).__name__}.{marco.f_code.co_name}"
+                if primero_externo is None:
+                    primero_externo = marco
+            marco = marco.f_back
+        if primero_externo is None:
+            return 'desconocido'
+        modulo = primero_externo.f_globals.get('__name__', '?').rsplit('.', 1)[-1]
+        return f"{modulo}.{primero_externo.f_code.co_name}"
+
+    def _conectarMedido(self, conexion_externa):
+        """Retorna (conexion, ms_para_obtenerla). Con conexión externa el tiempo es None."""
+        if conexion_externa:
+            return conexion_externa, None
+        inicio = time.perf_counter()
+        conn = self.obtenerConexion()
+        return conn, (time.perf_counter() - inicio) * 1000
+
+    def _registrarMetrica(self, etiqueta, query_sql, parametros, conexion_ms, ejecucion_ms, lectura_ms, filas, error):
+        """Acumula la medición y avisa en el log si la consulta superó el umbral de lenta."""
+        if not self.metricas_activas:
+            return
+        metricas.registrar(etiqueta, conexion_ms, ejecucion_ms, lectura_ms, filas, error)
+
+        total_ms = (conexion_ms or 0.0) + ejecucion_ms + lectura_ms
+        if total_ms >= self.umbral_consulta_lenta_ms:
+            sql_compacto = " ".join(query_sql.split())
+            log.warning(
+                f"Consulta lenta ({total_ms:.0f} ms) en {etiqueta}: conexión {conexion_ms or 0:.0f} ms, "
+                f"ejecución {ejecucion_ms:.0f} ms, lectura {lectura_ms:.0f} ms, {filas} filas | "
+                f"SQL: {sql_compacto} | Parámetros: {describirParametros(parametros)}"
+            )
 
     def ejecutarConsulta(self, query_sql, parametros=None, conexion_externa=None):
         """
@@ -45,12 +167,16 @@ class DBManager:
         Si recibe 'conexion_externa', NO hace commit ni cierra (parte de una transacción).
         Si NO recibe 'conexion_externa', crea una nueva, hace commit y cierra (operación simple).
         """
+        etiqueta = self._etiquetaLlamador()
         # Si nos pasan una conexión, la usamos. Si no, creamos una nueva.
-        conn = conexion_externa if conexion_externa else self.obtenerConexion()
+        conn, conexion_ms = self._conectarMedido(conexion_externa)
         usar_conexion_externa = conexion_externa is not None
         registros_afectados = 0
 
         if conn:
+            cursor = None
+            hubo_error = False
+            inicio = time.perf_counter()
             try:
                 cursor = conn.cursor()
                 if parametros:
@@ -66,17 +192,21 @@ class DBManager:
                     # print("Consulta ejecutada y guardada (Auto-commit)")
 
             except Error as e:
+                hubo_error = True
                 log.error(f"Error SQL en ejecutarConsulta: {e} | Query: {query_sql}")
                 # Si es conexión externa, el error debe propagarse para que el controlador haga rollback
                 if usar_conexion_externa:
                     raise e 
                 return None
             finally:
+                ejecucion_ms = (time.perf_counter() - inicio) * 1000
                 if cursor:
                     cursor.close()
                 # SOLO cerramos si la conexión es nuestra
                 if not usar_conexion_externa:
                     self.cerrarConexion(conn)
+                self._registrarMetrica(etiqueta, query_sql, parametros, conexion_ms, ejecucion_ms, 0.0,
+                                       max(registros_afectados, 0), hubo_error)
         
         return registros_afectados
 
@@ -85,11 +215,16 @@ class DBManager:
         Ejecuta INSERT con RETURNING (para obtener IDs).
         Soporta transacciones externas.
         """
-        conn = conexion_externa if conexion_externa else self.obtenerConexion()
+        etiqueta = self._etiquetaLlamador()
+        conn, conexion_ms = self._conectarMedido(conexion_externa)
         usar_conexion_externa = conexion_externa is not None
         resultado = None
 
         if conn:
+            cursor = None
+            hubo_error = False
+            inicio = time.perf_counter()
+            lectura_ms = 0.0
             try:
                 cursor = conn.cursor()
                 if parametros:
@@ -97,30 +232,131 @@ class DBManager:
                 else:
                     cursor.execute(query_sql)
                 
+                inicio_lectura = time.perf_counter()
                 resultado = cursor.fetchone()
+                lectura_ms = (time.perf_counter() - inicio_lectura) * 1000
                 
                 if not usar_conexion_externa:
                     conn.commit()
 
             except Error as e:
+                hubo_error = True
                 log.error(f"Error SQL en ejecutarInsertReturning: {e} | Query: {query_sql}")
                 if usar_conexion_externa:
                     raise e
             finally:
+                ejecucion_ms = (time.perf_counter() - inicio) * 1000 - lectura_ms
                 if cursor:
                     cursor.close()
                 if not usar_conexion_externa:
                     self.cerrarConexion(conn)
+                self._registrarMetrica(etiqueta, query_sql, parametros, conexion_ms, ejecucion_ms, lectura_ms,
+                                       1 if resultado else 0, hubo_error)
         
         return resultado
 
+    def ejecutarLote(self, query_sql, lista_valores, plantilla=None, retornar_filas=False, conexion_externa=None):
+        """
+        Ejecuta una sentencia con 'VALUES %s' expandida con todas las filas de lista_valores
+        en UN solo viaje a la BD (execute_values con una única página).
+        Retorna las filas de RETURNING si retornar_filas=True, o el número de registros afectados.
+        Soporta transacciones externas igual que ejecutarConsulta.
+        """
+        if not lista_valores:
+            return [] if retornar_filas else 0
+
+        etiqueta = self._etiquetaLlamador()
+        conn, conexion_ms = self._conectarMedido(conexion_externa)
+        usar_conexion_externa = conexion_externa is not None
+        resultado = [] if retornar_filas else None
+
+        if conn:
+            cursor = None
+            hubo_error = False
+            inicio = time.perf_counter()
+            try:
+                cursor = conn.cursor()
+                filas = execute_values(
+                    cursor, query_sql, lista_valores,
+                    template=plantilla,
+                    page_size=len(lista_valores), # Una sola sentencia para todo el lote
+                    fetch=retornar_filas
+                )
+                resultado = filas if retornar_filas else cursor.rowcount
+
+                if not usar_conexion_externa:
+                    conn.commit()
+
+            except Error as e:
+                hubo_error = True
+                log.error(f"Error SQL en ejecutarLote: {e} | Query: {query_sql}")
+                if usar_conexion_externa:
+                    raise e
+            finally:
+                # execute_values ejecuta y lee en el mismo paso: todo cuenta como ejecución
+                ejecucion_ms = (time.perf_counter() - inicio) * 1000
+                if cursor:
+                    cursor.close()
+                if not usar_conexion_externa:
+                    self.cerrarConexion(conn)
+                filas_medidas = len(resultado) if retornar_filas else max(resultado or 0, 0)
+                self._registrarMetrica(etiqueta, query_sql, (lista_valores,), conexion_ms, ejecucion_ms, 0.0,
+                                       filas_medidas, hubo_error)
+
+        return resultado
+
+    def ejecutarCopy(self, query_sql, archivo, conexion_externa=None):
+        """
+        Ejecuta un 'COPY ... FROM STDIN' leyendo de 'archivo' (cualquier objeto con read()).
+        Es la forma más rápida de cargar miles de filas: viajan en un solo flujo, sin un INSERT por fila.
+        Para copiar a una tabla temporal hay que pasar 'conexion_externa' (la tabla vive en esa conexión).
+        Retorna el número de filas copiadas.
+        """
+        etiqueta = self._etiquetaLlamador()
+        conn, conexion_ms = self._conectarMedido(conexion_externa)
+        usar_conexion_externa = conexion_externa is not None
+        filas_copiadas = 0
+
+        if conn:
+            cursor = None
+            hubo_error = False
+            inicio = time.perf_counter()
+            try:
+                cursor = conn.cursor()
+                cursor.copy_expert(query_sql, archivo)
+                filas_copiadas = cursor.rowcount
+
+                if not usar_conexion_externa:
+                    conn.commit()
+
+            except Error as e:
+                hubo_error = True
+                log.error(f"Error SQL en ejecutarCopy: {e} | Query: {query_sql}")
+                if usar_conexion_externa:
+                    raise e
+            finally:
+                ejecucion_ms = (time.perf_counter() - inicio) * 1000
+                if cursor:
+                    cursor.close()
+                if not usar_conexion_externa:
+                    self.cerrarConexion(conn)
+                self._registrarMetrica(etiqueta, query_sql, None, conexion_ms, ejecucion_ms, 0.0,
+                                       max(filas_copiadas, 0), hubo_error)
+
+        return filas_copiadas
+
     def obtenerDatos(self, query_sql, parametros=None, conexion_externa=None):
         """Ejecuta SELECT y retorna resultados. Soporta conexión externa."""
-        conn = conexion_externa if conexion_externa else self.obtenerConexion()
+        etiqueta = self._etiquetaLlamador()
+        conn, conexion_ms = self._conectarMedido(conexion_externa)
         usar_conexion_externa = conexion_externa is not None
         resultados = []
 
         if conn:
+            cursor = None
+            hubo_error = False
+            inicio = time.perf_counter()
+            lectura_ms = 0.0
             try:
                 cursor = conn.cursor()
                 if parametros:
@@ -128,15 +364,75 @@ class DBManager:
                 else:
                     cursor.execute(query_sql)
                 
+                inicio_lectura = time.perf_counter()
                 resultados = cursor.fetchall()
+                lectura_ms = (time.perf_counter() - inicio_lectura) * 1000
             except Error as e:
+                hubo_error = True
                 log.error(f"Error SQL en obtenerDatos: {e}")
                 if usar_conexion_externa:
                     raise e
             finally:
+                ejecucion_ms = (time.perf_counter() - inicio) * 1000 - lectura_ms
                 if cursor:
                     cursor.close()
                 if not usar_conexion_externa:
                     self.cerrarConexion(conn)
+                self._registrarMetrica(etiqueta, query_sql, parametros, conexion_ms, ejecucion_ms, lectura_ms,
+                                       len(resultados), hubo_error)
         
-        return resultados
\ No newline at end of file
+        return resultados
+
+    def obtenerDatosStream(self, query_sql, parametros=None, itersize=None, conexion_externa=None):
+        """
+        Ejecuta un SELECT con un cursor con nombre (del lado del servidor) y entrega las filas
+        como generador, trayéndolas en bloques de 'itersize' en lugar de cargar todo con fetchall().
+        La conexión queda ocupada hasta que se consume (o se abandona) el generador.
+        """
+        # La etiqueta se toma aquí: cuando el generador empiece a correr el *Queries ya habrá retornado
+        etiqueta = self._etiquetaLlamador()
+        return self._iterarCursorServidor(etiqueta, query_sql, parametros, itersize, conexion_externa)
+
+    def _iterarCursorServidor(self, etiqueta, query_sql, parametros, itersize, conexion_externa):
+        conn, conexion_ms = self._conectarMedido(conexion_externa)
+        usar_conexion_externa = conexion_externa is not None
+
+        if not conn:
+            return
+
+        cursor = None
+        hubo_error = False
+        ejecucion_ms = 0.0
+        lectura_ms = 0.0 # Solo el tiempo esperando filas, no el que tarda quien consume el generador
+        filas = 0
+        try:
+            inicio = time.perf_counter()
+            cursor = conn.cursor(name=f"cursor_stream_{uuid.uuid4().hex}")
+            cursor.itersize = itersize or self.cursor_itersize
+            cursor.execute(query_sql, parametros)
+            ejecucion_ms = (time.perf_counter() - inicio) * 1000
+
+            iterador = iter(cursor)
+            while True:
+                inicio_lectura = time.perf_counter()
+                fila = next(iterador, None)
+                lectura_ms += (time.perf_counter() - inicio_lectura) * 1000
+                if fila is None:
+                    break
+                filas += 1
+                yield fila
+        except Error as e:
+            hubo_error = True
+            log.error(f"Error SQL en obtenerDatosStream: {e}")
+            if usar_conexion_externa:
+                raise e
+        finally:
+            if cursor and not cursor.closed:
+                try:
+                    cursor.close()
+                except Error:
+                    pass # La transacción ya estaba abortada; el rollback al devolverla limpia todo
+            if not usar_conexion_externa:
+                self.cerrarConexion(conn)
+            self._registrarMetrica(etiqueta, query_sql, parametros, conexion_ms, ejecucion_ms, lectura_ms,
+                                   filas, hubo_error)
@@ -0,0 +1,113 @@
+## Escucha de cambios entre terminales (LISTEN/NOTIFY)
+
+import json
+import time
+import select
+import threading
+from psycopg2 import Error, sql
+from mis_trapitos.database_conexion.db_manager import DBManager
+from mis_trapitos.core.logger import log
+
+# Canales que disparan los triggers de la migración V005
+CANAL_VARIANTES = 'cambios_variantes'
+CANAL_PRODUCTOS = 'cambios_productos'
+CANAL_DESCUENTOS = 'cambios_descuentos'
+CANAL_CLIENTES = 'cambios_clientes'
+CANALES = (CANAL_VARIANTES, CANAL_PRODUCTOS, CANAL_DESCUENTOS, CANAL_CLIENTES)
+
+# Operación especial que se entrega (con canal None) al recuperar la conexión:
+# mientras estuvo caída se pudieron perder avisos, así que hay que recargar todo
+OPERACION_RECONEXION = 'RECONEXION'
+
+
+class ChangeListener(threading.Thread):
+    """
+    Hilo demonio con una conexión dedicada (fuera del pool) que hace LISTEN en los canales
+    y llama a al_recibir(canal, operacion, ids) por cada aviso.
+    ids es una lista de enteros, o None cuando el aviso significa "cambió todo".
+    al_recibir se ejecuta en ESTE hilo: no debe tocar widgets de Tkinter directamente.
+    """
+
+    def __init__(self, al_recibir, canales=CANALES, segundos_latido=30.0):
+        super().__init__(name="escucha_cambios", daemon=True)
+        self.db = DBManager()
+        self.al_recibir = al_recibir
+        self.canales = canales
+        self.segundos_latido = segundos_latido # Sin tráfico, cada cuánto verificar que la conexión siga viva
+        self._detener = threading.Event()
+        self._conexion = None
+
+    def detener(self):
+        self._detener.set()
+
+    def run(self):
+        espera_reconexion = 1.0
+        conectado_antes = False
+
+        while not self._detener.is_set():
+            conn = self.db.abrirConexionDedicada()
+            if not conn:
+                self._detener.wait(espera_reconexion)
+                espera_reconexion = min(espera_reconexion * 2, 30.0)
+                continue
+
+            self._conexion = conn
+            try:
+                conn.autocommit = True # LISTEN solo surte efecto fuera de una transacción abierta
+                cursor = conn.cursor()
+                for canal in self.canales:
+                    cursor.execute(sql.SQL("LISTEN {}").format(sql.Identifier(canal)))
+
+                if conectado_antes:
+                    log.warning("Escucha de cambios reconectada; se recargan los caches.")
+                    self._entregar(None, OPERACION_RECONEXION, None)
+                conectado_antes = True
+                espera_reconexion = 1.0
+
+                self._escuchar(conn, cursor)
+
+            except (Error, OSError) as e:
+                if not self._detener.is_set():
+                    log.warning(f"Se perdió la conexión de escucha de cambios: {e}")
+                    self._detener.wait(espera_reconexion)
+                    espera_reconexion = min(espera_reconexion * 2, 30.0)
+            finally:
+                self._conexion = None
+                try:
+                    conn.close()
+                except Error:
+                    pass
+
+    def _escuchar(self, conn, cursor):
+        """Espera avisos sin consumir CPU (select sobre el socket) hasta que se pida detener."""
+        ultimo_trafico = time.monotonic()
+        while not self._detener.is_set():
+            # Timeout corto para revisar _detener; no se consulta la BD en cada vuelta
+            listos, _, _ = select.select([conn], [], [], 1.0)
+            if not listos:
+                if time.monotonic() - ultimo_trafico >= self.segundos_latido:
+                    cursor.execute("SELECT 1") # Lanza error si el servidor ya no está
+                    ultimo_trafico = time.monotonic()
+                continue
+
+            conn.poll()
+            ultimo_trafico = time.monotonic()
+            while conn.notifies:
+                aviso = conn.notifies.pop(0)
+                self._procesarAviso(aviso.channel, aviso.payload)
+
+    def _procesarAviso(self, canal, carga):
+        try:
+            datos = json.loads(carga) if carga else {}
+        except ValueError:
+            log.warning(f"Aviso con formato inesperado en {canal}: {carga!r}")
+            datos = {}
+        ids = datos.get('ids')
+        self._entregar(canal, datos.get('op', ''), [int(i) for i in ids] if ids is not None else None)
+
+    def _entregar(self, canal, operacion, ids):
+        try:
+            self.al_recibir(canal, operacion, ids)
+        except Exception as e:
+            # Un error del receptor no debe matar el hilo de escucha
+            log.error(f"Error al procesar aviso de {canal}: {e}")
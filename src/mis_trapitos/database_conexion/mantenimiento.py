@@ -0,0 +1,112 @@
+## Tareas de mantenimiento de la BD
+
+"""
+Comandos para reconstruir datos derivados (resúmenes) a partir del historial.
+
+Uso (desde la raíz del proyecto):
+    PYTHONPATH=src python -m mis_trapitos.database_conexion.mantenimiento resumen-ventas [--desde AAAA-MM-DD]
+    PYTHONPATH=src python -m mis_trapitos.database_conexion.mantenimiento ultima-venta
+"""
+
+import sys
+import time
+import argparse
+from datetime import datetime
+from psycopg2 import Error
+from mis_trapitos.database_conexion.db_manager import DBManager
+from mis_trapitos.core.logger import log
+
+
+class MaintenanceRunner:
+    """
+    Cada tarea corre en su propia transacción: si falla no queda nada a medias.
+    """
+
+    def __init__(self):
+        self.db = DBManager()
+
+    def reconstruirResumenVentas(self, desde=None):
+        """
+        Vuelve a calcular los resúmenes diarios de ventas (migración V006) desde el historial,
+        completos o solo a partir de 'desde' (date). Las ventas nuevas esperan mientras tanto.
+        Retorna: (exito, mensaje)
+        """
+        conn = self.db.obtenerConexion()
+        if not conn:
+            return False, "No hay conexión a la BD."
+
+        cursor = conn.cursor()
+        try:
+            inicio = time.perf_counter()
+            cursor.execute("SELECT dias, filas_productos FROM reconstruir_resumen_ventas(%s)", (desde,))
+            dias, filas = cursor.fetchone()
+            conn.commit()
+            segundos = time.perf_counter() - inicio
+            alcance = f"desde {desde}" if desde else "completo"
+            log.info(f"Resumen de ventas reconstruido ({alcance}): {dias} filas día/método, {filas} filas por producto en {segundos:.1f}s")
+            return True, f"Resumen reconstruido ({alcance}): {dias} filas día/método y {filas} por producto en {segundos:.1f}s."
+        except Error as e:
+            conn.rollback()
+            log.error(f"Error al reconstruir el resumen de ventas: {e}")
+            return False, f"No se pudo reconstruir el resumen (¿está aplicada la migración V006?): {e}"
+        finally:
+            cursor.close()
+            self.db.cerrarConexion(conn)
+
+
+    def reconstruirFechaUltimaVenta(self):
+        """
+        Recalcula Variantes_Producto.fecha_ultima_venta (migración V008) desde el historial.
+        Retorna: (exito, mensaje)
+        """
+        conn = self.db.obtenerConexion()
+        if not conn:
+            return False, "No hay conexión a la BD."
+
+        cursor = conn.cursor()
+        try:
+            inicio = time.perf_counter()
+            cursor.execute("SELECT reconstruir_fecha_ultima_venta()")
+            filas = cursor.fetchone()[0]
+            conn.commit()
+            segundos = time.perf_counter() - inicio
+            log.info(f"fecha_ultima_venta reconstruida: {filas} variantes corregidas en {segundos:.1f}s")
+            return True, f"Última venta reconstruida: {filas} variantes corregidas en {segundos:.1f}s."
+        except Error as e:
+            conn.rollback()
+            log.error(f"Error al reconstruir fecha_ultima_venta: {e}")
+            return False, f"No se pudo reconstruir la última venta (¿está aplicada la migración V008?): {e}"
+        finally:
+            cursor.close()
+            self.db.cerrarConexion(conn)
+
+
+def _leerFecha(texto):
+    try:
+        return datetime.strptime(texto, '%Y-%m-%d').date()
+    except ValueError:
+        raise argparse.ArgumentTypeError("Formato de fecha inválido. Use AAAA-MM-DD.")
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Mantenimiento de la BD de Mis Trapitos")
+    subcomandos = parser.add_subparsers(dest='accion', required=True)
+
+    resumen = subcomandos.add_parser('resumen-ventas', help="Reconstruye los resúmenes diarios de ventas")
+    resumen.add_argument('--desde', type=_leerFecha, default=None, help="Solo desde esta fecha (AAAA-MM-DD)")
+
+    subcomandos.add_parser('ultima-venta', help="Reconstruye la fecha de última venta de cada variante")
+
+    opciones = parser.parse_args(argumentos)
+    runner = MaintenanceRunner()
+
+    if opciones.accion == 'resumen-ventas':
+        exito, mensaje = runner.reconstruirResumenVentas(opciones.desde)
+    else:
+        exito, mensaje = runner.reconstruirFechaUltimaVenta()
+    print(mensaje)
+    return 0 if exito else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
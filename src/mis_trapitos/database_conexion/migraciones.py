@@ -0,0 +1,194 @@
+## Migraciones versionadas del esquema
+
+"""
+Aplica en orden los archivos database/migraciones/V<numero>__<descripcion>.sql
+y registra cuáles ya se aplicaron en la tabla Esquema_Migraciones.
+
+Uso (desde la raíz del proyecto):
+    PYTHONPATH=src python -m mis_trapitos.database_conexion.migraciones estado
+    PYTHONPATH=src python -m mis_trapitos.database_conexion.migraciones aplicar [--hasta N]
+"""
+
+import os
+import re
+import sys
+import hashlib
+import argparse
+from psycopg2 import Error
+from mis_trapitos.database_conexion.db_manager import DBManager
+from mis_trapitos.core.logger import log
+
+# Carpeta por defecto: <raíz del proyecto>/database/migraciones
+DIRECTORIO_MIGRACIONES = os.path.abspath(
+    os.path.join(os.path.dirname(__file__), '..', '..', '..', 'database', 'migraciones')
+)
+
+# Clave del candado de asesoría para que dos terminales no migren a la vez
+CLAVE_CANDADO_MIGRACIONES = 72_601_001
+
+PATRON_ARCHIVO = re.compile(r'^V(\d+)__(.+)\.sql$')
+
+
+class MigrationRunner:
+    """
+    Ejecuta las migraciones SQL pendientes, cada una en su propia transacción.
+    """
+
+    def __init__(self, directorio=None):
+        self.db = DBManager()
+        self.directorio = directorio or DIRECTORIO_MIGRACIONES
+
+    def listarMigraciones(self):
+        """
+        Lee la carpeta de migraciones.
+        Retorna una lista ordenada de diccionarios: {version, descripcion, ruta}
+        """
+        migraciones = []
+        for nombre_archivo in os.listdir(self.directorio):
+            coincidencia = PATRON_ARCHIVO.match(nombre_archivo)
+            if not coincidencia:
+                continue
+            migraciones.append({
+                'version': int(coincidencia.group(1)),
+                'descripcion': coincidencia.group(2).replace('_', ' '),
+                'ruta': os.path.join(self.directorio, nombre_archivo)
+            })
+
+        migraciones.sort(key=lambda m: m['version'])
+
+        versiones = [m['version'] for m in migraciones]
+        if len(versiones) != len(set(versiones)):
+            raise ValueError("Hay dos archivos de migración con el mismo número de versión.")
+        return migraciones
+
+    def _leerArchivo(self, ruta):
+        with open(ruta, encoding='utf-8') as archivo:
+            return archivo.read()
+
+    def _calcularChecksum(self, contenido):
+        return hashlib.sha256(contenido.encode('utf-8')).hexdigest()
+
+    def _asegurarTablaVersiones(self, conn):
+        cursor = conn.cursor()
+        cursor.execute("""
+            CREATE TABLE IF NOT EXISTS Esquema_Migraciones (
+                version INT PRIMARY KEY,
+                descripcion TEXT NOT NULL,
+                checksum CHAR(64) NOT NULL,
+                aplicada_en TIMESTAMPTZ NOT NULL DEFAULT CURRENT_TIMESTAMP
+            )
+        """)
+        cursor.close()
+        conn.commit()
+
+    def obtenerVersionesAplicadas(self, conn):
+        """Retorna {version: checksum} de las migraciones ya registradas."""
+        self._asegurarTablaVersiones(conn)
+        filas = self.db.obtenerDatos("SELECT version, checksum FROM Esquema_Migraciones", conexion_externa=conn)
+        conn.commit()
+        return {fila[0]: fila[1] for fila in filas}
+
+    def obtenerEstado(self):
+        """
+        Retorna una lista de (version, descripcion, estado) donde estado es
+        'aplicada', 'pendiente' o 'modificada' (el archivo cambió después de aplicarse).
+        """
+        conn = self.db.obtenerConexion()
+        if not conn:
+            raise ConnectionError("No hay conexión a la BD.")
+        try:
+            aplicadas = self.obtenerVersionesAplicadas(conn)
+        finally:
+            self.db.cerrarConexion(conn)
+
+        estado = []
+        for migracion in self.listarMigraciones():
+            checksum = self._calcularChecksum(self._leerArchivo(migracion['ruta']))
+            if migracion['version'] not in aplicadas:
+                situacion = 'pendiente'
+            elif aplicadas[migracion['version']].strip() != checksum:
+                situacion = 'modificada'
+            else:
+                situacion = 'aplicada'
+            estado.append((migracion['version'], migracion['descripcion'], situacion))
+        return estado
+
+    def aplicarPendientes(self, hasta_version=None):
+        """
+        Aplica en orden todas las migraciones pendientes (opcionalmente solo hasta 'hasta_version').
+        Si una falla se revierte solo esa y se detiene el proceso.
+        Retorna: (exito, lista_de_versiones_aplicadas, mensaje)
+        """
+        conn = self.db.obtenerConexion()
+        if not conn:
+            return False, [], "No hay conexión a la BD."
+
+        aplicadas_ahora = []
+        cursor = conn.cursor()
+        try:
+            # Candado de sesión: otra terminal esperará a que terminemos
+            cursor.execute("SELECT pg_advisory_lock(%s)", (CLAVE_CANDADO_MIGRACIONES,))
+            conn.commit()
+
+            ya_aplicadas = self.obtenerVersionesAplicadas(conn)
+
+            for migracion in self.listarMigraciones():
+                version = migracion['version']
+                if version in ya_aplicadas:
+                    continue
+                if hasta_version is not None and version > hasta_version:
+                    break
+
+                contenido = self._leerArchivo(migracion['ruta'])
+                log.info(f"Aplicando migración V{version:03d}: {migracion['descripcion']}")
+                try:
+                    # Sin parámetros psycopg2 envía el script tal cual (admite varias sentencias)
+                    cursor.execute(contenido)
+                    cursor.execute(
+                        "INSERT INTO Esquema_Migraciones (version, descripcion, checksum) VALUES (%s, %s, %s)",
+                        (version, migracion['descripcion'], self._calcularChecksum(contenido))
+                    )
+                    conn.commit()
+                    aplicadas_ahora.append(version)
+                except Error as e:
+                    conn.rollback()
+                    log.error(f"Migración V{version:03d} fallida: {e}")
+                    return False, aplicadas_ahora, f"Error en V{version:03d} ({migracion['descripcion']}): {e}"
+
+            if aplicadas_ahora:
+                return True, aplicadas_ahora, f"Se aplicaron {len(aplicadas_ahora)} migraciones."
+            return True, aplicadas_ahora, "El esquema ya está al día."
+
+        finally:
+            try:
+                cursor.execute("SELECT pg_advisory_unlock(%s)", (CLAVE_CANDADO_MIGRACIONES,))
+                conn.commit()
+            except Error:
+                pass # Si la conexión se cayó el candado se libera solo
+            cursor.close()
+            self.db.cerrarConexion(conn)
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Migraciones del esquema de Mis Trapitos")
+    parser.add_argument('accion', choices=['estado', 'aplicar'], nargs='?', default='estado')
+    parser.add_argument('--hasta', type=int, default=None, help="Aplicar solo hasta esta versión")
+    parser.add_argument('--directorio', default=None, help="Carpeta con los archivos V###__*.sql")
+    opciones = parser.parse_args(argumentos)
+
+    runner = MigrationRunner(opciones.directorio)
+
+    if opciones.accion == 'estado':
+        for version, descripcion, situacion in runner.obtenerEstado():
+            print(f"V{version:03d}  {situacion:<10}  {descripcion}")
+        return 0
+
+    exito, versiones, mensaje = runner.aplicarPendientes(opciones.hasta)
+    for version in versiones:
+        print(f"Aplicada V{version:03d}")
+    print(mensaje)
+    return 0 if exito else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
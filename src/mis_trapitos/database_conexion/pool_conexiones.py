@@ -0,0 +1,210 @@
+## Pool de conexiones a la base de datos
+
+import threading
+import time
+from collections import deque
+
+import psycopg2
+from psycopg2 import Error
+from psycopg2.extensions import TRANSACTION_STATUS_IDLE, TRANSACTION_STATUS_UNKNOWN
+from psycopg2.pool import PoolError
+from mis_trapitos.core.logger import log
+
+
+class ConnectionPool:
+    """
+    Pool de conexiones PostgreSQL seguro para hilos.
+    Presta conexiones ya abiertas (calientes) y las recibe de vuelta al terminar,
+    evitando pagar el handshake TCP + autenticación en cada consulta.
+    """
+
+    def __init__(self, parametros_conexion, minimo=1, maximo=10, timeout=30.0, segundos_verificacion=60.0):
+        """
+        parametros_conexion: Diccionario con host, database, user, password y port.
+        minimo / maximo: Conexiones que se abren al inicio y límite de conexiones simultáneas.
+        timeout: Segundos que se espera por una conexión libre antes de fallar.
+        segundos_verificacion: Si una conexión estuvo inactiva más de este tiempo, se le hace un ping al prestarla.
+        """
+        self.parametros_conexion = parametros_conexion
+        self.minimo = max(0, minimo)
+        self.maximo = max(1, maximo, self.minimo)
+        self.timeout = timeout
+        self.segundos_verificacion = segundos_verificacion
+
+        self._condicion = threading.Condition()
+        self._libres = deque()   # (conexion, instante_devolucion)
+        self._prestadas = set()  # id() de las conexiones que están fuera del pool
+        self._abiertas = 0
+        self._cerrado = False
+
+        self._estadisticas = {
+            'prestamos': 0,
+            'esperas': 0,
+            'tiempo_espera_total': 0.0,
+            'timeouts': 0,
+            'creadas': 0,
+            'descartadas': 0,
+        }
+
+        self._abrirMinimo()
+
+    def _abrirMinimo(self):
+        """Abre las conexiones mínimas configuradas. Si la BD no responde, se abrirán bajo demanda."""
+        for _ in range(self.minimo):
+            try:
+                conexion = self._crearConexion()
+            except Error as e:
+                log.error(f"No se pudieron precalentar las conexiones del pool: {e}")
+                return
+            with self._condicion:
+                self._abiertas += 1
+                self._libres.append((conexion, time.monotonic()))
+
+    def _crearConexion(self):
+        conexion = psycopg2.connect(**self.parametros_conexion)
+        with self._condicion:
+            self._estadisticas['creadas'] += 1
+        return conexion
+
+    def _estaSana(self, conexion, instante_devolucion):
+        """Verifica que la conexión siga viva antes de entregarla."""
+        if conexion.closed:
+            return False
+        if conexion.get_transaction_status() == TRANSACTION_STATUS_UNKNOWN:
+            return False
+
+        # Solo hacemos ping si estuvo inactiva mucho tiempo (el servidor pudo cerrarla)
+        if time.monotonic() - instante_devolucion < self.segundos_verificacion:
+            return True
+        try:
+            cursor = conexion.cursor()
+            cursor.execute("SELECT 1")
+            cursor.close()
+            conexion.rollback()
+            return True
+        except Error:
+            return False
+
+    def _descartar(self, conexion):
+        """Cierra una conexión dañada y libera su lugar en el pool."""
+        try:
+            conexion.close()
+        except Error:
+            pass
+        with self._condicion:
+            self._abiertas -= 1
+            self._prestadas.discard(id(conexion))
+            self._estadisticas['descartadas'] += 1
+            self._condicion.notify()
+
+    def prestar(self):
+        """
+        Entrega una conexión del pool. Si no hay libres y se alcanzó el máximo,
+        espera hasta 'timeout' segundos a que otra sea devuelta.
+        """
+        inicio = time.monotonic()
+        limite = inicio + self.timeout
+        tuvo_que_esperar = False
+
+        while True:
+            conexion = None
+            instante_devolucion = 0.0
+
+            with self._condicion:
+                if self._cerrado:
+                    raise PoolError("El pool de conexiones está cerrado.")
+
+                while not self._libres and self._abiertas >= self.maximo:
+                    tuvo_que_esperar = True
+                    restante = limite - time.monotonic()
+                    if restante <= 0:
+                        self._estadisticas['timeouts'] += 1
+                        raise PoolError(f"Sin conexiones libres tras esperar {self.timeout}s (máximo {self.maximo}).")
+                    self._condicion.wait(restante)
+
+                if self._libres:
+                    # LIFO: la última devuelta es la más "caliente"
+                    conexion, instante_devolucion = self._libres.pop()
+                else:
+                    self._abiertas += 1
+
+            if conexion is None:
+                try:
+                    conexion = self._crearConexion()
+                except Error:
+                    with self._condicion:
+                        self._abiertas -= 1
+                        self._condicion.notify()
+                    raise
+            elif not self._estaSana(conexion, instante_devolucion):
+                log.warning("Conexión inactiva descartada por el pool (falló la verificación).")
+                self._descartar(conexion)
+                continue
+
+            with self._condicion:
+                self._prestadas.add(id(conexion))
+                self._estadisticas['prestamos'] += 1
+                if tuvo_que_esperar:
+                    self._estadisticas['esperas'] += 1
+                    self._estadisticas['tiempo_espera_total'] += time.monotonic() - inicio
+            return conexion
+
+    def devolver(self, conexion):
+        """
+        Regresa una conexión al pool. Si quedó una transacción abierta (ej. un SELECT sin commit)
+        se hace rollback para entregarla limpia al siguiente usuario.
+        """
+        with self._condicion:
+            es_nuestra = id(conexion) in self._prestadas
+
+        if not es_nuestra:
+            # Conexión ajena al pool: simplemente la cerramos
+            if not conexion.closed:
+                conexion.close()
+            return
+
+        if conexion.closed:
+            self._descartar(conexion)
+            return
+
+        try:
+            if conexion.get_transaction_status() != TRANSACTION_STATUS_IDLE:
+                conexion.rollback()
+            if conexion.autocommit:
+                conexion.autocommit = False
+        except Error:
+            self._descartar(conexion)
+            return
+
+        with self._condicion:
+            self._prestadas.discard(id(conexion))
+            if self._cerrado:
+                self._abiertas -= 1
+                conexion.close()
+                return
+            self._libres.append((conexion, time.monotonic()))
+            self._condicion.notify()
+
+    def obtenerEstadisticas(self):
+        """Retorna un diccionario con el estado y contadores del pool."""
+        with self._condicion:
+            estadisticas = dict(self._estadisticas)
+            estadisticas['abiertas'] = self._abiertas
+            estadisticas['libres'] = len(self._libres)
+            estadisticas['en_uso'] = len(self._prestadas)
+            estadisticas['minimo'] = self.minimo
+            estadisticas['maximo'] = self.maximo
+        return estadisticas
+
+    def cerrarTodas(self):
+        """Cierra las conexiones libres y marca el pool como cerrado (las prestadas se cierran al devolverse)."""
+        with self._condicion:
+            self._cerrado = True
+            while self._libres:
+                conexion, _ = self._libres.pop()
+                self._abiertas -= 1
+                try:
+                    conexion.close()
+                except Error:
+                    pass
+            self._condicion.notify_all()
@@ -1,5 +1,6 @@
 ## Consultas a la base de datos
 
+import json
 from mis_trapitos.database_conexion.db_manager import DBManager
 from mis_trapitos.core.logger import log
 
@@ -57,20 +58,172 @@ class InventarioQueries:
             conexion_externa
         )
 
+    # Inventario visible: (id_var, id_prod, desc, talla, color, stock, precio)
+    SQL_INVENTARIO = """
+        SELECT v.id_variante, p.id_producto, p.descripcion, v.talla, v.color, v.stock_disponible, p.precio_base
+        FROM Variantes_Producto v
+        JOIN Productos p ON v.id_producto = p.id_producto
+        WHERE p.activo = TRUE 
+        ORDER BY p.id_producto DESC
+    """
+
     def obtenerProductosEnInventario(self, conexion_externa=None):
         """
         Obtiene inventario incluyendo el ID.
         CAMBIO: Solo trae productos donde activo = TRUE.
         """
-        sql_inventario = """
+        return self.db.obtenerDatos(self.SQL_INVENTARIO, conexion_externa=conexion_externa)
+
+    def iterarProductosEnInventario(self, itersize=None):
+        """Igual que obtenerProductosEnInventario, pero entrega las filas por bloques (cursor de servidor)."""
+        return self.db.obtenerDatosStream(self.SQL_INVENTARIO, itersize=itersize)
+
+    def obtenerPaginaInventario(self, despues_de=None, limite=200, conexion_externa=None):
+        """
+        Una página del inventario en el orden de SQL_INVENTARIO (id_producto DESC, id_variante).
+        despues_de: (id_producto, id_variante) de la última fila ya cargada; None = primera página.
+        Paginación por llave: cada página cuesta lo mismo sin importar qué tan lejos esté.
+        """
+        if despues_de is None:
+            condicion, parametros = "", (limite,)
+        else:
+            id_producto, id_variante = despues_de
+            condicion = "AND (p.id_producto < %s OR (p.id_producto = %s AND v.id_variante > %s))"
+            parametros = (id_producto, id_producto, id_variante, limite)
+
+        sql = f"""
             SELECT v.id_variante, p.id_producto, p.descripcion, v.talla, v.color, v.stock_disponible, p.precio_base
             FROM Variantes_Producto v
             JOIN Productos p ON v.id_producto = p.id_producto
-            WHERE p.activo = TRUE 
-            ORDER BY p.id_producto DESC
+            WHERE p.activo = TRUE {condicion}
+            ORDER BY p.id_producto DESC, v.id_variante
+            LIMIT %s
         """
-        return self.db.obtenerDatos(sql_inventario, conexion_externa=conexion_externa)
-    
+        return self.db.obtenerDatos(sql, parametros, conexion_externa)
+
+    # --- BÚSQUEDA EN EL SERVIDOR (migración V009) ---
+
+    # Palabras más cortas no tienen trigramas: se comparan enteras contra la talla
+    LARGO_MINIMO_TRIGRAMA = 3
+
+    def existeBusquedaServidor(self, conexion_externa=None):
+        """Verifica si f_unaccent y los índices de trigramas (migración V009) están instalados."""
+        res = self.db.obtenerDatos(
+            "SELECT to_regprocedure('f_unaccent(text)') IS NOT NULL AND to_regclass('idx_productos_descripcion_trgm') IS NOT NULL",
+            conexion_externa=conexion_externa
+        )
+        return bool(res and res[0][0])
+
+    def contarVariantesActivas(self, conexion_externa=None):
+        """Cantidad de variantes visibles en el catálogo (para decidir dónde buscar)."""
+        res = self.db.obtenerDatos(
+            "SELECT COUNT(*) FROM Variantes_Producto v JOIN Productos p ON v.id_producto = p.id_producto WHERE p.activo = TRUE",
+            conexion_externa=conexion_externa
+        )
+        return res[0][0] if res else 0
+
+    def _condicionPalabra(self, palabra):
+        """
+        Subconsulta con las variantes que contienen 'palabra' en descripción, talla, color o categoría.
+        Cada rama usa su propio índice (un OR entre tablas distintas no podría).
+        """
+        if len(palabra) < self.LARGO_MINIMO_TRIGRAMA:
+            sql = "SELECT id_variante FROM Variantes_Producto WHERE lower(f_unaccent(talla)) = lower(f_unaccent(%s))"
+            return sql, (palabra,)
+
+        patron = '%' + palabra.replace('\\', '\\\\').replace('%', '\\%').replace('_', '\\_') + '%'
+        sql = """
+            SELECT id_variante FROM Variantes_Producto
+            WHERE f_unaccent(talla) ILIKE f_unaccent(%s) OR f_unaccent(color) ILIKE f_unaccent(%s)
+            UNION
+            SELECT vb.id_variante FROM Variantes_Producto vb
+            JOIN Productos pb ON pb.id_producto = vb.id_producto
+            WHERE f_unaccent(pb.descripcion) ILIKE f_unaccent(%s)
+            UNION
+            SELECT vb.id_variante FROM Variantes_Producto vb
+            JOIN Productos pb ON pb.id_producto = vb.id_producto
+            JOIN Categorias cb ON cb.id_categoria = pb.id_categoria
+            WHERE f_unaccent(cb.nombre_categoria) ILIKE f_unaccent(%s)
+        """
+        return sql, (patron,) * 4
+
+    def buscarProductos(self, texto, pagina=0, tam_pagina=50, conexion_externa=None):
+        """
+        Busca en el catálogo activo sin importar mayúsculas ni acentos: cada palabra de 'texto'
+        debe aparecer (como subcadena) en la descripción, talla, color o categoría de la variante.
+        Ordena por parecido con el texto completo (pg_trgm) y pagina con LIMIT/OFFSET.
+        Retorna: (filas con el formato de SQL_INVENTARIO, hay_mas)
+        """
+        palabras = (texto or '').split()
+        condiciones = []
+        parametros = []
+        for palabra in palabras:
+            subconsulta, valores = self._condicionPalabra(palabra)
+            condiciones.append(f"AND v.id_variante IN ({subconsulta})")
+            parametros.extend(valores)
+
+        if palabras:
+            # Sin texto no hay nada que comparar: queda el orden normal del inventario
+            parametros.append(' '.join(palabras))
+            orden = """word_similarity(
+                    f_unaccent(%s),
+                    f_unaccent(concat_ws(' ', p.descripcion, v.talla, v.color, c.nombre_categoria))
+                ) DESC,"""
+        else:
+            orden = ""
+        parametros.extend([tam_pagina + 1, pagina * tam_pagina])
+
+        sql = f"""
+            SELECT v.id_variante, p.id_producto, p.descripcion, v.talla, v.color, v.stock_disponible, p.precio_base
+            FROM Variantes_Producto v
+            JOIN Productos p ON v.id_producto = p.id_producto
+            LEFT JOIN Categorias c ON c.id_categoria = p.id_categoria
+            WHERE p.activo = TRUE
+            {' '.join(condiciones)}
+            ORDER BY {orden} p.id_producto DESC, v.id_variante
+            LIMIT %s OFFSET %s
+        """
+        filas = self.db.obtenerDatos(sql, tuple(parametros), conexion_externa)
+        return filas[:tam_pagina], len(filas) > tam_pagina
+
+    # --- VERSIÓN DE CATÁLOGO (migraciones V004 y V011, usada por el cache de catálogo) ---
+
+    def existeVersionCatalogo(self, conexion_externa=None):
+        """Verifica si la columna txid_catalogo (migración V011) está instalada."""
+        res = self.db.obtenerDatos("""
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'variantes_producto' AND column_name = 'txid_catalogo'
+            )
+        """, conexion_externa=conexion_externa)
+        return bool(res and res[0][0])
+
+    def obtenerVersionCatalogo(self, conexion_externa=None):
+        """
+        Marca para la siguiente consulta de cambios: la transacción más antigua que sigue abierta.
+        Las anteriores ya terminaron; cualquiera que confirme después tiene un txid >= a esta.
+        Hay que leerla ANTES de consultar los datos.
+        """
+        res = self.db.obtenerDatos("SELECT txid_snapshot_xmin(txid_current_snapshot())", conexion_externa=conexion_externa)
+        return res[0][0] if res else 0
+
+    def obtenerCambiosInventario(self, desde_version, conexion_externa=None):
+        """
+        Variantes cuya fila (o la de su producto) escribió una transacción >= 'desde_version'.
+        Puede repetir filas ya vistas (transacciones que seguían abiertas en la consulta anterior).
+        Incluye productos dados de baja para que el cache los quite.
+        Retorna: (id_var, id_prod, desc, talla, color, stock, precio, activo)
+        """
+        sql = """
+            SELECT v.id_variante, p.id_producto, p.descripcion, v.talla, v.color, v.stock_disponible, p.precio_base,
+                   p.activo
+            FROM Variantes_Producto v
+            JOIN Productos p ON v.id_producto = p.id_producto
+            WHERE v.id_variante IN (SELECT id_variante FROM Variantes_Producto WHERE txid_catalogo >= %s)
+               OR p.id_producto IN (SELECT id_producto FROM Productos WHERE txid_catalogo >= %s)
+        """
+        return self.db.obtenerDatos(sql, (desde_version, desde_version), conexion_externa)
+
     def actualizarStock(self, id_variante, nuevo_stock, conexion_externa=None):
         """Sobrescribe el stock de una variante específica."""
         sql = "UPDATE Variantes_Producto SET stock_disponible = %s WHERE id_variante = %s"
@@ -80,6 +233,74 @@ class InventarioQueries:
         """Actualiza el precio base del producto padre."""
         sql = "UPDATE Productos SET precio_base = %s WHERE id_producto = %s"
         return self.db.ejecutarConsulta(sql, (nuevo_precio, id_producto), conexion_externa)
+
+    # --- CAMBIO MASIVO DE PRECIOS ---
+
+    def _filtroCambioPrecios(self, id_categoria=None, id_proveedor=None, precio_min=None, precio_max=None):
+        """Condiciones (sobre Productos p) y parámetros compartidos por la vista previa y el cambio."""
+        condiciones = ["p.activo = TRUE"]
+        parametros = []
+        if id_categoria is not None:
+            condiciones.append("p.id_categoria = %s")
+            parametros.append(id_categoria)
+        if id_proveedor is not None:
+            condiciones.append(
+                "EXISTS (SELECT 1 FROM Proveedores_Productos pp WHERE pp.id_producto = p.id_producto AND pp.id_proveedor = %s)"
+            )
+            parametros.append(id_proveedor)
+        if precio_min is not None:
+            condiciones.append("p.precio_base >= %s")
+            parametros.append(precio_min)
+        if precio_max is not None:
+            condiciones.append("p.precio_base <= %s")
+            parametros.append(precio_max)
+        return " AND ".join(condiciones), parametros
+
+    def _nuevoPrecio(self, modo):
+        """Expresión del precio nuevo; su único parámetro es el porcentaje o el monto."""
+        if modo == 'porcentaje':
+            return "round(p.precio_base * (1 + %s::numeric / 100), 2)"
+        return "round(p.precio_base + %s::numeric, 2)"
+
+    def previsualizarCambioPrecios(self, modo, valor, id_categoria=None, id_proveedor=None,
+                                   precio_min=None, precio_max=None, conexion_externa=None):
+        """
+        Qué pasaría con el cambio, sin tocar nada.
+        Retorna: (productos, productos_que_cambian, precios_invalidos, variantes,
+                  precio_min_actual, precio_max_actual, precio_min_nuevo, precio_max_nuevo)
+        precios_invalidos = los que quedarían en 0 o menos, o fuera de DECIMAL(10, 2).
+        """
+        filtro, parametros = self._filtroCambioPrecios(id_categoria, id_proveedor, precio_min, precio_max)
+        sql = f"""
+            WITH afectados AS (
+                SELECT p.id_producto, p.precio_base AS actual, {self._nuevoPrecio(modo)} AS nuevo
+                FROM Productos p
+                WHERE {filtro}
+            )
+            SELECT count(*),
+                   count(*) FILTER (WHERE nuevo <> actual),
+                   count(*) FILTER (WHERE nuevo <= 0 OR nuevo >= 100000000),
+                   (SELECT count(*) FROM Variantes_Producto v JOIN afectados a ON a.id_producto = v.id_producto),
+                   min(actual), max(actual), min(nuevo), max(nuevo)
+            FROM afectados
+        """
+        res = self.db.obtenerDatos(sql, [valor] + parametros, conexion_externa)
+        return res[0] if res else None
+
+    def cambiarPreciosMasivo(self, modo, valor, id_categoria=None, id_proveedor=None,
+                             precio_min=None, precio_max=None, conexion_externa=None):
+        """
+        Sube o baja precio_base de todos los productos activos que pasan el filtro, en un solo UPDATE.
+        modo: 'porcentaje' (valor = % a sumar; negativo para bajar) o 'monto' (valor = $ a sumar).
+        Solo se reescriben los que de verdad cambian. Retorna cuántos productos cambiaron.
+        """
+        filtro, parametros = self._filtroCambioPrecios(id_categoria, id_proveedor, precio_min, precio_max)
+        nuevo = self._nuevoPrecio(modo)
+        sql = f"""
+            UPDATE Productos p SET precio_base = {nuevo}
+            WHERE {filtro} AND {nuevo} <> p.precio_base
+        """
+        return self.db.ejecutarConsulta(sql, [valor] + parametros + [valor], conexion_externa)
     
     def eliminarProducto(self, id_producto, conexion_externa=None):
         """
@@ -125,10 +346,34 @@ class ClientesQueries:
             ORDER BY v.fecha_venta DESC
         """
         return self.db.obtenerDatos(sql, (id_cliente,), conexion_externa)
+    SQL_CLIENTES_ACTIVOS = "SELECT id_cliente, nombre_completo, telefono, correo_electronico, direccion FROM Clientes WHERE activo = TRUE ORDER BY nombre_completo ASC"
+
     def obtenerTodosLosClientes(self, conexion_externa=None):
         """Trae solo clientes activos."""
-        sql = "SELECT id_cliente, nombre_completo, telefono, correo_electronico, direccion FROM Clientes WHERE activo = TRUE ORDER BY nombre_completo ASC"
-        return self.db.obtenerDatos(sql, conexion_externa=conexion_externa)
+        return self.db.obtenerDatos(self.SQL_CLIENTES_ACTIVOS, conexion_externa=conexion_externa)
+
+    def iterarTodosLosClientes(self, itersize=None):
+        """Trae los clientes activos por bloques (cursor de servidor) en lugar de todos de golpe."""
+        return self.db.obtenerDatosStream(self.SQL_CLIENTES_ACTIVOS, itersize=itersize)
+
+    def obtenerPaginaClientes(self, despues_de=None, limite=200, conexion_externa=None):
+        """
+        Una página de clientes activos por nombre (y por id entre homónimos).
+        despues_de: (nombre_completo, id_cliente) de la última fila ya cargada; None = primera página.
+        """
+        if despues_de is None:
+            condicion, parametros = "", (limite,)
+        else:
+            condicion, parametros = "AND (nombre_completo, id_cliente) > (%s, %s)", (*despues_de, limite)
+
+        sql = f"""
+            SELECT id_cliente, nombre_completo, telefono, correo_electronico, direccion
+            FROM Clientes
+            WHERE activo = TRUE {condicion}
+            ORDER BY nombre_completo, id_cliente
+            LIMIT %s
+        """
+        return self.db.obtenerDatos(sql, parametros, conexion_externa)
     
     def eliminarCliente(self, id_cliente, conexion_externa=None):
         """Baja Lógica: Marca como inactivo."""
@@ -195,6 +440,106 @@ class VentasQueries:
         )
         return filas > 0
 
+    def bloquearVariantes(self, lista_id_variantes, conexion_externa):
+        """
+        Bloquea (SELECT ... FOR UPDATE) las variantes indicadas SIEMPRE en orden ascendente de id,
+        para que dos cajas que venden las mismas prendas no se bloqueen mutuamente (deadlock).
+        Requiere transacción externa: el bloqueo dura hasta su commit/rollback.
+        Retorna {id_variante: stock_disponible} con el stock ya protegido contra otras ventas.
+        """
+        if not lista_id_variantes:
+            return {}
+
+        sql = """
+            SELECT id_variante, stock_disponible
+            FROM Variantes_Producto
+            WHERE id_variante = ANY(%s)
+            ORDER BY id_variante
+            FOR UPDATE
+        """
+        ids_ordenados = sorted({int(id_variante) for id_variante in lista_id_variantes})
+        res = self.db.obtenerDatos(sql, (ids_ordenados,), conexion_externa)
+        return {fila[0]: fila[1] for fila in res}
+
+    def registrarDetallesVentaMasivo(self, id_venta, detalles, conexion_externa=None):
+        """
+        Inserta todas las líneas del ticket en un solo INSERT multi-fila.
+        detalles: Lista de diccionarios con id_variante, cantidad, precio_grabado y descuento_grabado.
+        Soporta transacción externa.
+        """
+        sql = """
+            INSERT INTO Detalles_Venta (id_venta, id_variante, cantidad, precio_unitario_venta, descuento_aplicado)
+            VALUES %s
+        """
+        valores = [
+            (id_venta, det['id_variante'], det['cantidad'], det['precio_grabado'], det['descuento_grabado'])
+            for det in detalles
+        ]
+        return self.db.ejecutarLote(sql, valores, conexion_externa=conexion_externa)
+
+    def descontarStockMasivo(self, cantidades_por_variante, conexion_externa=None, marcar_fecha_venta=False):
+        """
+        Descuenta el inventario de varias variantes con un solo UPDATE ... FROM (VALUES ...).
+        cantidades_por_variante: Diccionario {id_variante: cantidad_total_vendida}.
+        marcar_fecha_venta: también pone fecha_ultima_venta = now() (columna de la migración V008).
+        Solo se actualizan las variantes con stock suficiente.
+        Retorna la lista de id_variante que NO tenían stock suficiente (o no existen).
+        """
+        if not cantidades_por_variante:
+            return []
+
+        marca_fecha = ", fecha_ultima_venta = now()" if marcar_fecha_venta else ""
+        sql = f"""
+            UPDATE Variantes_Producto v
+            SET stock_disponible = v.stock_disponible - d.cantidad{marca_fecha}
+            FROM (VALUES %s) AS d(id_variante, cantidad)
+            WHERE v.id_variante = d.id_variante
+              AND v.stock_disponible >= d.cantidad
+            RETURNING v.id_variante
+        """
+        valores = sorted(cantidades_por_variante.items())
+        actualizadas = self.db.ejecutarLote(
+            sql, valores,
+            plantilla="(%s::int, %s::int)",
+            retornar_filas=True,
+            conexion_externa=conexion_externa
+        )
+        ids_actualizados = {fila[0] for fila in actualizadas}
+        return [id_variante for id_variante, _ in valores if id_variante not in ids_actualizados]
+
+    def existeFechaUltimaVenta(self, conexion_externa=None):
+        """Verifica si la columna Variantes_Producto.fecha_ultima_venta (migración V008) existe."""
+        sql = """
+            SELECT EXISTS (
+                SELECT 1 FROM information_schema.columns
+                WHERE table_name = 'variantes_producto' AND column_name = 'fecha_ultima_venta'
+            )
+        """
+        res = self.db.obtenerDatos(sql, conexion_externa=conexion_externa)
+        return bool(res and res[0][0])
+
+    def existeFuncionRegistrarVenta(self, conexion_externa=None):
+        """
+        Verifica si la función registrar_venta (migración V003) está instalada.
+        """
+        sql = "SELECT to_regprocedure('registrar_venta(integer, integer, metodo_pago, jsonb)') IS NOT NULL"
+        res = self.db.obtenerDatos(sql, conexion_externa=conexion_externa)
+        return bool(res and res[0][0])
+
+    def registrarVentaServidor(self, id_empleado, id_cliente, metodo_pago, lineas, conexion_externa=None):
+        """
+        Registra la venta completa (ticket, detalles, stock y auditoría) con la función
+        registrar_venta del servidor, en un solo viaje a la BD.
+        lineas: Lista de diccionarios con id_variante, cantidad, precio y descuento_manual.
+        Retorna (id_venta, total) o None.
+        """
+        sql = "SELECT id_venta, total FROM registrar_venta(%s, %s, %s, %s::jsonb)"
+        return self.db.ejecutarInsertReturning(
+            sql,
+            (id_empleado, id_cliente, metodo_pago, json.dumps(lineas)),
+            conexion_externa
+        )
+
 class UsuariosQueries:
     """
     Gestiona la seguridad, autenticación y auditoría de los empleados"""
@@ -251,6 +596,16 @@ class UsuariosQueries:
         """Trae solo empleados activos."""
         sql = "SELECT id_empleado, nombre_completo, usuario, rol, activo FROM Empleados WHERE activo = TRUE ORDER BY id_empleado ASC"
         return self.db.obtenerDatos(sql, conexion_externa=conexion_externa)
+
+    def obtenerPaginaUsuarios(self, despues_de=0, limite=200, conexion_externa=None):
+        """Una página de empleados activos con id mayor a 'despues_de' (paginación por llave)."""
+        sql = """
+            SELECT id_empleado, nombre_completo, usuario, rol, activo FROM Empleados
+            WHERE activo = TRUE AND id_empleado > %s
+            ORDER BY id_empleado ASC
+            LIMIT %s
+        """
+        return self.db.obtenerDatos(sql, (despues_de, limite), conexion_externa)
     
     def eliminarUsuario(self, id_empleado, conexion_externa=None):
         """Baja Lógica."""
@@ -289,6 +644,16 @@ class ProveedoresQueries:
         sql = "SELECT id_proveedor, nombre_proveedor, datos_contacto FROM Proveedores WHERE activo = TRUE"
         return self.db.obtenerDatos(sql, conexion_externa=conexion_externa)
 
+    def obtenerPaginaProveedores(self, despues_de=0, limite=200, conexion_externa=None):
+        """Una página de proveedores activos con id mayor a 'despues_de' (paginación por llave)."""
+        sql = """
+            SELECT id_proveedor, nombre_proveedor, datos_contacto FROM Proveedores
+            WHERE activo = TRUE AND id_proveedor > %s
+            ORDER BY id_proveedor ASC
+            LIMIT %s
+        """
+        return self.db.obtenerDatos(sql, (despues_de, limite), conexion_externa)
+
     def asociarProductoProveedor(self, id_proveedor, id_producto, conexion_externa=None):
         """
         Vincula un producto a un proveedor para saber quién lo surte (Reposición).
@@ -363,4 +728,26 @@ class DescuentosQueries:
         res = self.db.obtenerDatos(sql, (id_variante,), conexion_externa)
         if res:
             return float(res[0][0])
-        return 0.0
\ No newline at end of file
+        return 0.0
+
+    def obtenerDescuentosActivos(self, lista_id_variantes, conexion_externa=None):
+        """
+        Versión masiva de obtenerDescuentoActivo: resuelve en UNA sola consulta
+        el mejor descuento vigente de cada variante de la lista.
+        Retorna un diccionario {id_variante: porcentaje}. Las variantes sin oferta no aparecen.
+        """
+        if not lista_id_variantes:
+            return {}
+
+        sql = """
+            SELECT DISTINCT ON (v.id_variante) v.id_variante, d.porcentaje
+            FROM Variantes_Producto v
+            JOIN Descuentos d ON d.id_producto = v.id_producto
+            WHERE v.id_variante = ANY(%s)
+              AND d.fecha_inicio <= CURRENT_DATE
+              AND d.fecha_fin >= CURRENT_DATE
+            ORDER BY v.id_variante, d.porcentaje DESC -- Por variante, la oferta mayor
+        """
+        ids_unicos = list({int(id_variante) for id_variante in lista_id_variantes})
+        res = self.db.obtenerDatos(sql, (ids_unicos,), conexion_externa)
+        return {fila[0]: float(fila[1]) for fila in res}
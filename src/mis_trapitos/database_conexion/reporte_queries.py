@@ -1,14 +1,149 @@
 ## Generador de reportes
 
+import os
+import time
+from psycopg2 import Error, sql
 from mis_trapitos.database_conexion.db_manager import DBManager
+from mis_trapitos.core.logger import log
+
+# Vistas materializadas de la migración V007 (en el orden en que se refrescan).
+# mv_ultima_venta_variante ya no va: V008 la borra y la reemplaza por Variantes_Producto.fecha_ultima_venta
+VISTAS_REPORTES = ('mv_top_ventas_mes', 'mv_metodos_pago_mes')
+
+# Candado de asesoría: si otra terminal ya está refrescando, esta no lo repite
+CLAVE_CANDADO_REFRESCO = 72_601_002
 
 class ReportQueries:
     """
     Clase dedicada exclusivamente a la generación de reportes y estadísticas.
+
+    Los reportes de ventas por periodo leen los resúmenes diarios de la migración V006
+    (mantenidos por triggers). Si no está instalada se usan las consultas sobre el historial.
+    Con la migración V007 (y REPORTES_VISTAS=1) el top de ventas y los métodos de pago
+    salen de vistas materializadas: datos "al" último refresco.
+    Con la migración V008 los productos estancados se buscan por Variantes_Producto.fecha_ultima_venta.
     """
 
+    _usar_resumen = None # None = aún no verificado (se revisa una vez por proceso)
+    _usar_vistas = None
+    _usar_fecha_ultima_venta = None
+
     def __init__(self):
         self.db = DBManager()
+        self.vistas_activas = os.getenv('REPORTES_VISTAS', '1') != '0'
+
+    def existeResumenVentas(self):
+        """Verifica (una sola vez) si las tablas de resumen de la migración V006 existen."""
+        if ReportQueries._usar_resumen is None:
+            res = self.db.obtenerDatos(
+                "SELECT to_regclass('resumen_ventas_diario') IS NOT NULL "
+                "AND to_regclass('resumen_ventas_producto_diario') IS NOT NULL"
+            )
+            if not res:
+                return False # Error de BD: se vuelve a intentar la próxima vez
+            ReportQueries._usar_resumen = bool(res[0][0])
+        return ReportQueries._usar_resumen
+
+    def existenVistasReportes(self):
+        """Verifica (una sola vez) si las vistas materializadas de la migración V007 existen."""
+        if ReportQueries._usar_vistas is None:
+            res = self.db.obtenerDatos("SELECT to_regclass('refresco_vistas') IS NOT NULL")
+            if not res:
+                return False
+            ReportQueries._usar_vistas = bool(res[0][0])
+        return ReportQueries._usar_vistas
+
+    def existeFechaUltimaVenta(self):
+        """Verifica (una sola vez) si la columna fecha_ultima_venta de la migración V008 existe."""
+        if ReportQueries._usar_fecha_ultima_venta is None:
+            res = self.db.obtenerDatos("""
+                SELECT EXISTS (
+                    SELECT 1 FROM information_schema.columns
+                    WHERE table_name = 'variantes_producto' AND column_name = 'fecha_ultima_venta'
+                )
+            """)
+            if not res:
+                return False
+            ReportQueries._usar_fecha_ultima_venta = bool(res[0][0])
+        return ReportQueries._usar_fecha_ultima_venta
+
+    def _leerVistas(self):
+        return self.vistas_activas and self.existenVistasReportes()
+
+    def obtenerFechaRefrescoVistas(self):
+        """Refresco más antiguo de las vistas (los reportes son "al" esta fecha), o None si no aplica."""
+        if not self._leerVistas():
+            return None
+        res = self.db.obtenerDatos("SELECT MIN(fecha_refresco) FROM Refresco_Vistas")
+        return res[0][0] if res else None
+
+    def refrescarVistasReportes(self, antiguedad_minima_seg=None):
+        """
+        REFRESH MATERIALIZED VIEW CONCURRENTLY de cada vista, en su propia transacción
+        (los reportes se siguen leyendo mientras tanto).
+        antiguedad_minima_seg: solo refresca las vistas más viejas que eso (para el refresco
+        programado: si otra terminal acaba de hacerlo, no se repite).
+        Retorna la lista de vistas refrescadas, o None si otra terminal está refrescando.
+        """
+        conn = self.db.obtenerConexion()
+        if not conn:
+            raise Error("No hay conexión a la BD.")
+
+        refrescadas = []
+        cursor = conn.cursor()
+        try:
+            cursor.execute("SELECT pg_try_advisory_lock(%s)", (CLAVE_CANDADO_REFRESCO,))
+            obtenido = cursor.fetchone()[0]
+            conn.commit()
+            if not obtenido:
+                return None
+
+            try:
+                for vista in VISTAS_REPORTES:
+                    cursor.execute("SELECT to_regclass(%s) IS NOT NULL", (vista,))
+                    existe = cursor.fetchone()[0]
+                    conn.commit()
+                    if not existe:
+                        continue # Migración V007 sin aplicar
+
+                    if antiguedad_minima_seg is not None:
+                        cursor.execute(
+                            "SELECT fecha_refresco > now() - make_interval(secs => %s) FROM Refresco_Vistas WHERE nombre_vista = %s",
+                            (antiguedad_minima_seg, vista)
+                        )
+                        fila = cursor.fetchone()
+                        conn.commit()
+                        if fila and fila[0]:
+                            continue # Reciente: no hace falta
+
+                    inicio = time.perf_counter()
+                    cursor.execute(sql.SQL("REFRESH MATERIALIZED VIEW CONCURRENTLY {}").format(sql.Identifier(vista)))
+                    duracion_ms = int((time.perf_counter() - inicio) * 1000)
+                    cursor.execute(
+                        """
+                        INSERT INTO Refresco_Vistas (nombre_vista, fecha_refresco, duracion_ms)
+                        VALUES (%s, now(), %s)
+                        ON CONFLICT (nombre_vista) DO UPDATE
+                            SET fecha_refresco = EXCLUDED.fecha_refresco, duracion_ms = EXCLUDED.duracion_ms
+                        """,
+                        (vista, duracion_ms)
+                    )
+                    conn.commit()
+                    refrescadas.append(vista)
+                    log.info(f"Vista {vista} refrescada en {duracion_ms} ms")
+            except Error:
+                conn.rollback()
+                raise
+            finally:
+                try:
+                    cursor.execute("SELECT pg_advisory_unlock(%s)", (CLAVE_CANDADO_REFRESCO,))
+                    conn.commit()
+                except Error:
+                    pass # Si la conexión se cayó el candado se libera solo
+            return refrescadas
+        finally:
+            cursor.close()
+            self.db.cerrarConexion(conn)
 
     # 1. ¿Cuál es el producto con más unidades disponibles en inventario?
     def obtenerProductoMayorStock(self):
@@ -23,26 +158,59 @@ class ReportQueries:
         return res[0] if res else None
 
     # 2. ¿Qué productos no se han vendido en los últimos tres meses? (O periodo dinámico)
+    SQL_PRODUCTOS_SIN_VENTAS = """
+        SELECT p.descripcion, v.talla, v.color
+        FROM Variantes_Producto v
+        JOIN Productos p ON v.id_producto = p.id_producto
+        WHERE v.id_variante NOT IN (
+            SELECT DISTINCT dv.id_variante
+            FROM Detalles_Venta dv
+            JOIN Ventas ve ON dv.id_venta = ve.id_venta
+            WHERE ve.fecha_venta >= CURRENT_DATE - INTERVAL '%s days'
+        )
+    """
+
+    # Con la columna de V008: búsqueda por rango en idx_variantes_fecha_ultima_venta, sin tocar las ventas
+    SQL_PRODUCTOS_SIN_VENTAS_COLUMNA = """
+        SELECT p.descripcion, v.talla, v.color
+        FROM Variantes_Producto v
+        JOIN Productos p ON v.id_producto = p.id_producto
+        WHERE v.fecha_ultima_venta IS NULL OR v.fecha_ultima_venta < CURRENT_DATE - %s
+    """
+
+    def _sqlProductosSinVentas(self):
+        if self.existeFechaUltimaVenta():
+            return self.SQL_PRODUCTOS_SIN_VENTAS_COLUMNA
+        return self.SQL_PRODUCTOS_SIN_VENTAS
+
     def obtenerProductosSinVentas(self, dias_atras=90):
         """
         Encuentra productos que no aparecen en ninguna venta reciente.
         """
-        sql = """
-            SELECT p.descripcion, v.talla, v.color
-            FROM Variantes_Producto v
-            JOIN Productos p ON v.id_producto = p.id_producto
-            WHERE v.id_variante NOT IN (
-                SELECT DISTINCT dv.id_variante
-                FROM Detalles_Venta dv
-                JOIN Ventas ve ON dv.id_venta = ve.id_venta
-                WHERE ve.fecha_venta >= CURRENT_DATE - INTERVAL '%s days'
-            )
-        """
         #Pasamos el intervalo como parámetro seguro
-        return self.db.obtenerDatos(sql, (dias_atras,))
+        return self.db.obtenerDatos(self._sqlProductosSinVentas(), (dias_atras,))
+
+    def iterarProductosSinVentas(self, dias_atras=90, itersize=None):
+        """Versión por bloques (cursor de servidor) para exportar listas grandes."""
+        return self.db.obtenerDatosStream(self._sqlProductosSinVentas(), (dias_atras,), itersize)
 
     # 3. ¿Cuáles son los métodos de pago más utilizados en los últimos 30 días?
     def obtenerMetodosPagoPopulares(self):
+        if self._leerVistas():
+            return self.db.obtenerDatos(
+                "SELECT metodo_pago, cantidad_uso FROM mv_metodos_pago_mes ORDER BY cantidad_uso DESC"
+            )
+
+        if self.existeResumenVentas():
+            sql = """
+                SELECT metodo_pago, SUM(tickets) as cantidad_uso
+                FROM Resumen_Ventas_Diario
+                WHERE fecha >= CURRENT_DATE - 30
+                GROUP BY metodo_pago
+                ORDER BY cantidad_uso DESC
+            """
+            return self.db.obtenerDatos(sql)
+
         sql = """
             SELECT metodo_pago, COUNT(*) as cantidad_uso
             FROM Ventas
@@ -54,6 +222,27 @@ class ReportQueries:
 
     # 4. ¿Qué productos han sido comprados en mayor cantidad en el último mes? 
     def obtenerProductosMasVendidosMes(self):
+        if self._leerVistas():
+            return self.db.obtenerDatos(
+                "SELECT descripcion, total_vendido FROM mv_top_ventas_mes ORDER BY total_vendido DESC LIMIT 10"
+            )
+
+        if self.existeResumenVentas():
+            sql = """
+                SELECT p.descripcion, r.total_vendido
+                FROM (
+                    SELECT id_producto, SUM(unidades) as total_vendido
+                    FROM Resumen_Ventas_Producto_Diario
+                    WHERE fecha >= CURRENT_DATE - 30
+                    GROUP BY id_producto
+                    ORDER BY total_vendido DESC
+                    LIMIT 10
+                ) r
+                JOIN Productos p ON r.id_producto = p.id_producto
+                ORDER BY r.total_vendido DESC
+            """
+            return self.db.obtenerDatos(sql)
+
         sql = """
             SELECT p.descripcion, SUM(dv.cantidad) as total_vendido
             FROM Detalles_Venta dv
@@ -69,6 +258,15 @@ class ReportQueries:
 
     # 5. ¿Cuántas ventas se realizaron en los últimos tres días?
     def contarVentasRecientes(self, dias=3):
+        if self.existeResumenVentas():
+            sql = """
+                SELECT COALESCE(SUM(tickets), 0)
+                FROM Resumen_Ventas_Diario
+                WHERE fecha >= CURRENT_DATE - %s
+            """
+            res = self.db.obtenerDatos(sql, (dias,))
+            return res[0][0] if res else 0
+
         sql = """
             SELECT COUNT(*) 
             FROM Ventas 
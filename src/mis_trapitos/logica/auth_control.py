@@ -116,6 +116,14 @@ class AuthController:
         except Exception as e:
             log.error(f"Error al listar empleados: {e}")
             return []
+
+    def obtenerPaginaEmpleados(self, ultima_fila=None, limite=200):
+        """Empleados que siguen a 'ultima_fila' (id, nombre, ...); None = desde el inicio."""
+        try:
+            return self.queries.obtenerPaginaUsuarios(ultima_fila[0] if ultima_fila else 0, limite)
+        except Exception as e:
+            log.error(f"Error al obtener página de empleados: {e}")
+            return []
         
     def eliminarEmpleado(self, id_admin, id_empleado_a_eliminar):
         """Elimina un usuario, evitando que se elimine a sí mismo."""
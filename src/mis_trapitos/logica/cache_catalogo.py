@@ -0,0 +1,186 @@
+## Cache del catálogo de productos
+
+import os
+import time
+import threading
+from psycopg2 import Error
+from mis_trapitos.database_conexion.queries import InventarioQueries
+from mis_trapitos.core.logger import log
+
+class CatalogCache:
+    """
+    Copia en memoria (una por proceso) del inventario visible:
+    {id_variante: (id_var, id_prod, desc, talla, color, stock, precio)}, igual que SQL_INVENTARIO.
+
+    Con las migraciones V004 y V011 instaladas solo se piden a la BD las filas escritas por
+    transacciones que seguían abiertas (o aún no empezaban) en la consulta anterior: una
+    transacción lenta que confirma tarde no se pierde. Sin ellas, cada refresco recarga el
+    catálogo completo. Como red de seguridad se hace una recarga completa cada
+    CATALOGO_RECARGA_COMPLETA_SEG (p.ej. por cambios hechos con los triggers desactivados).
+    """
+
+    _instancia = None
+    _candado_instancia = threading.Lock()
+
+    @classmethod
+    def obtenerInstancia(cls):
+        """Cache compartido por todos los controladores del proceso."""
+        if cls._instancia is None:
+            with cls._candado_instancia:
+                if cls._instancia is None:
+                    cls._instancia = cls()
+        return cls._instancia
+
+    def __init__(self):
+        self.inv_queries = InventarioQueries()
+        self.segundos_recarga_completa = float(os.getenv('CATALOGO_RECARGA_COMPLETA_SEG', '300'))
+
+        self._candado = threading.RLock()
+        self._filas = {}
+        self._lista_ordenada = None # Se reconstruye solo cuando algo cambia
+        self._version = 0
+        self._usar_versiones = None # None = aún no verificado si existe la migración V011
+        self._ultima_recarga_completa = None # time.monotonic() de la última recarga completa
+        self._cambios_pendientes = False # Otra terminal avisó (LISTEN/NOTIFY) que algo cambió
+        self.estadisticas = {'recargas_completas': 0, 'consultas_cambios': 0, 'filas_actualizadas': 0}
+
+    # --- LECTURA ---
+
+    def obtenerFilas(self, refrescar=True):
+        """
+        Retorna el catálogo ordenado como SQL_INVENTARIO (producto más nuevo primero).
+        refrescar=False entrega lo que hay en memoria sin ir a la BD, salvo que nunca se haya cargado
+        o que otra terminal haya avisado de cambios (marcarCambiosPendientes).
+        """
+        with self._candado:
+            if self._ultima_recarga_completa is None:
+                self._recargarCompleto()
+            elif refrescar or self._cambios_pendientes:
+                self.refrescar()
+
+            if self._lista_ordenada is None:
+                self._lista_ordenada = sorted(self._filas.values(), key=lambda fila: (-fila[1], fila[0]))
+            return self._lista_ordenada
+
+    def obtenerFila(self, id_variante):
+        with self._candado:
+            return self._filas.get(id_variante)
+
+    # --- SINCRONIZACIÓN CON LA BD ---
+
+    def refrescar(self):
+        """Trae los cambios pendientes (o todo, si toca recarga completa)."""
+        with self._candado:
+            # Se limpia ANTES de consultar: un aviso que llegue durante la consulta vuelve a marcarlo
+            self._cambios_pendientes = False
+            if self._necesitaRecargaCompleta():
+                self._recargarCompleto()
+            else:
+                self._aplicarCambios()
+
+    def marcarCambiosPendientes(self):
+        """Llamado desde el hilo de escucha: la próxima lectura pedirá los cambios a la BD."""
+        self._cambios_pendientes = True
+
+    def invalidar(self):
+        """Obliga a recargar todo en la siguiente lectura."""
+        with self._candado:
+            self._ultima_recarga_completa = None
+
+    def _necesitaRecargaCompleta(self):
+        if self._ultima_recarga_completa is None or not self._versionesDisponibles():
+            return True
+        return time.monotonic() - self._ultima_recarga_completa >= self.segundos_recarga_completa
+
+    def _versionesDisponibles(self):
+        if self._usar_versiones is None:
+            self._usar_versiones = self.inv_queries.existeVersionCatalogo()
+            log.info(f"Versión de catálogo (V011): {'disponible' if self._usar_versiones else 'no instalada, se recarga completo'}")
+        return self._usar_versiones
+
+    def _recargarCompleto(self):
+        # La versión se lee ANTES de cargar: un cambio que llegue en medio se vuelve a pedir después
+        usar_versiones = self._versionesDisponibles()
+        conn = self.inv_queries.db.obtenerConexion()
+        if not conn:
+            return
+        try:
+            version = self.inv_queries.obtenerVersionCatalogo(conexion_externa=conn) if usar_versiones else 0
+            filas = self.inv_queries.obtenerProductosEnInventario(conexion_externa=conn)
+        except Error as e:
+            # Se conserva lo que había (y no cuenta como recarga): la siguiente lectura lo reintenta
+            log.error(f"No se pudo recargar el catálogo: {e}")
+            return
+        finally:
+            self.inv_queries.db.cerrarConexion(conn)
+
+        self._filas = {fila[0]: tuple(fila) for fila in filas}
+        self._lista_ordenada = None
+        self._version = version
+        self._ultima_recarga_completa = time.monotonic()
+        self.estadisticas['recargas_completas'] += 1
+
+    def _aplicarCambios(self):
+        # La marca nueva se lee ANTES de consultar; la consulta se solapa con la anterior
+        # (transacciones que seguían abiertas) y las filas repetidas se reconocen por id_variante
+        conn = self.inv_queries.db.obtenerConexion()
+        if not conn:
+            return
+        try:
+            version = self.inv_queries.obtenerVersionCatalogo(conexion_externa=conn)
+            cambios = self.inv_queries.obtenerCambiosInventario(self._version, conexion_externa=conn)
+        except Error as e:
+            # Sin avanzar la marca: el siguiente refresco vuelve a pedir lo mismo
+            log.error(f"No se pudieron consultar los cambios del catálogo: {e}")
+            return
+        finally:
+            self.inv_queries.db.cerrarConexion(conn)
+        self.estadisticas['consultas_cambios'] += 1
+        self._version = version
+
+        actualizadas = 0
+        for fila in cambios:
+            id_variante, activo = fila[0], fila[7]
+            if activo:
+                nueva = tuple(fila[:7])
+                if self._filas.get(id_variante) != nueva:
+                    self._filas[id_variante] = nueva
+                    actualizadas += 1
+            elif self._filas.pop(id_variante, None) is not None:
+                actualizadas += 1
+
+        if actualizadas:
+            self._lista_ordenada = None
+            self.estadisticas['filas_actualizadas'] += actualizadas
+
+    # --- CAMBIOS HECHOS EN ESTA TERMINAL (sin ir a la BD) ---
+
+    def _reemplazarCampo(self, id_variante, indice, valor):
+        fila = self._filas.get(id_variante)
+        if fila is not None:
+            self._filas[id_variante] = fila[:indice] + (valor,) + fila[indice + 1:]
+            self._lista_ordenada = None
+
+    def descontarStockLocal(self, cantidades_por_variante):
+        """Aplica una venta ya confirmada: {id_variante: unidades_vendidas}."""
+        with self._candado:
+            for id_variante, cantidad in cantidades_por_variante.items():
+                fila = self._filas.get(id_variante)
+                if fila is not None:
+                    self._reemplazarCampo(id_variante, 5, fila[5] - cantidad)
+
+    def actualizarStockLocal(self, id_variante, nuevo_stock):
+        with self._candado:
+            self._reemplazarCampo(id_variante, 5, nuevo_stock)
+
+    def actualizarPrecioLocal(self, id_producto, nuevo_precio):
+        """El precio es del producto padre: cambia en todas sus variantes."""
+        with self._candado:
+            for id_variante in [f[0] for f in self._filas.values() if f[1] == id_producto]:
+                self._reemplazarCampo(id_variante, 6, nuevo_precio)
+
+    def quitarProductoLocal(self, id_producto):
+        with self._candado:
+            for id_variante in [f[0] for f in self._filas.values() if f[1] == id_producto]:
+                del self._filas[id_variante]
+            self._lista_ordenada = None
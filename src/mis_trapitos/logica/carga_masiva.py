@@ -0,0 +1,262 @@
+## Cargas masivas desde archivo (catálogo de temporada, entregas de proveedores)
+
+"""
+Aplica un archivo CSV/TSV completo en una sola transacción.
+
+Uso (desde la raíz del proyecto):
+    PYTHONPATH=src python -m mis_trapitos.logica.carga_masiva catalogo temporada.csv --usuario admin [--rechazados rechazos.csv]
+    PYTHONPATH=src python -m mis_trapitos.logica.carga_masiva entrega remision.csv --usuario admin [--rechazados rechazos.csv]
+
+Los archivos necesitan encabezado (columnas en cualquier orden; separadas por coma, punto y coma o tabulador):
+    catalogo: categoria, descripcion, precio, talla, color, stock
+              Una fila por variante; el stock es el stock final de la variante.
+    entrega:  id_variante (o sku), cantidad, proveedor (su ID o su nombre)
+              La cantidad se SUMA al stock actual.
+Las filas inválidas se reportan en un CSV aparte y no detienen la carga;
+un archivo mal formado (comillas sin cerrar, columnas de más) sí.
+"""
+
+import os
+import sys
+import csv
+import time
+import argparse
+from psycopg2 import Error
+from mis_trapitos.database_conexion.carga_masiva_queries import BulkLoadQueries, COLUMNAS_CATALOGO, COLUMNAS_ENTREGA
+from mis_trapitos.database_conexion.queries import UsuariosQueries
+from mis_trapitos.logica.cache_catalogo import CatalogCache
+from mis_trapitos.logica.generador_reporte import ReportGenerator
+from mis_trapitos.logica.indice_busqueda import normalizarTexto
+from mis_trapitos.core.logger import log
+
+# Los archivos que guarda Excel traen BOM al inicio: utf-8-sig lo quita
+CODIFICACION_ARCHIVOS = 'utf-8-sig'
+
+# Otros nombres con que los proveedores suelen llamar a las columnas de la entrega
+ALIAS_ENTREGA = {'sku': 'id_variante', 'variante': 'id_variante', 'cantidad_recibida': 'cantidad', 'id_proveedor': 'proveedor'}
+
+
+def leerEncabezado(ruta, columnas_validas, alias=None):
+    """
+    Lee la primera línea del archivo y adivina el separador (coma, punto y coma o tabulador).
+    Los nombres se normalizan: 'Descripción' -> 'descripcion', 'Cantidad recibida' -> 'cantidad_recibida'
+    y después se traducen con 'alias' ({nombre: columna}).
+    Retorna: (columnas, delimitador). Lanza ValueError si faltan, sobran o se repiten columnas.
+    """
+    with open(ruta, encoding=CODIFICACION_ARCHIVOS, newline='') as archivo:
+        primera = archivo.readline()
+    if not primera.strip():
+        raise ValueError("el archivo está vacío")
+
+    try:
+        delimitador = csv.Sniffer().sniff(primera, delimiters=',;\t').delimiter
+    except csv.Error:
+        delimitador = ','
+    columnas = [
+        '_'.join(normalizarTexto(c).split())
+        for c in next(csv.reader([primera], delimiter=delimitador))
+    ]
+    columnas = [(alias or {}).get(c, c) for c in columnas]
+
+    desconocidas = [c for c in columnas if c not in columnas_validas]
+    faltantes = [c for c in columnas_validas if c not in columnas]
+    if desconocidas:
+        raise ValueError(f"columnas desconocidas: {', '.join(desconocidas)}")
+    if faltantes:
+        raise ValueError(f"faltan las columnas: {', '.join(faltantes)}")
+    if len(set(columnas)) != len(columnas):
+        raise ValueError("hay columnas repetidas en el encabezado")
+    return columnas, delimitador
+
+
+def escribirRechazos(ruta, encabezado, filas):
+    with open(ruta, 'w', newline='', encoding=CODIFICACION_ARCHIVOS) as archivo:
+        escritor = csv.writer(archivo)
+        escritor.writerow(encabezado)
+        escritor.writerows(filas)
+
+
+def rutaRechazosPorDefecto(ruta):
+    """'temporada.csv' -> 'temporada_rechazados.csv' (junto al original)."""
+    base, _ = os.path.splitext(ruta)
+    return f"{base}_rechazados.csv"
+
+
+class BulkLoader:
+    """
+    Cargas masivas en UNA transacción: el archivo entra con COPY a una tabla temporal,
+    se valida con SQL sobre todas las filas a la vez y se aplica con un puñado de sentencias.
+    Si algo falla no queda nada a medias.
+    """
+
+    def __init__(self):
+        self.queries = BulkLoadQueries()
+        self.usr_queries = UsuariosQueries()
+
+    def importarCatalogo(self, ruta, id_empleado, ruta_rechazados=None):
+        """
+        Da de alta o actualiza categorías, productos y variantes desde un CSV/TSV.
+        Las filas rechazadas (con su línea y motivo) se escriben en 'ruta_rechazados'
+        (por defecto <archivo>_rechazados.csv).
+        Retorna: (exito, mensaje, resumen) - resumen es None si no se aplicó nada
+        """
+        try:
+            columnas, delimitador = leerEncabezado(ruta, COLUMNAS_CATALOGO)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            return False, f"No se pudo leer el archivo: {e}", None
+
+        conn = self.queries.db.obtenerConexion()
+        if not conn:
+            return False, "No hay conexión a la BD.", None
+
+        inicio = time.perf_counter()
+        try:
+            self.queries.prepararImportacionCatalogo(conexion_externa=conn)
+            with open(ruta, encoding=CODIFICACION_ARCHIVOS, newline='') as archivo:
+                leidas = self.queries.copiarCatalogo(archivo, columnas, delimitador, conexion_externa=conn)
+            self.queries.validarCatalogo(conexion_externa=conn)
+            rechazos = self.queries.obtenerRechazosCatalogo(conexion_externa=conn)
+            if len(rechazos) == leidas:
+                conn.rollback()
+                mensaje = f"Ninguna fila del catálogo es válida ({leidas} leídas)."
+                return False, mensaje + self._reportarRechazos(ruta, ruta_rechazados, COLUMNAS_CATALOGO, rechazos), None
+
+            resumen = self.queries.aplicarCatalogo(conexion_externa=conn)
+            resumen['leidas'] = leidas
+            resumen['rechazadas'] = len(rechazos)
+            descripcion = (
+                f"Catálogo '{os.path.basename(ruta)}': {leidas} filas, {len(rechazos)} rechazadas. "
+                f"Categorías nuevas {resumen['categorias_creadas']}; "
+                f"productos nuevos {resumen['productos_creados']}, actualizados {resumen['productos_actualizados']}; "
+                f"variantes nuevas {resumen['variantes_creadas']}, actualizadas {resumen['variantes_actualizadas']}."
+            )
+            self.usr_queries.registrarLog(id_empleado, "IMPORTAR CATALOGO", descripcion, conexion_externa=conn)
+            conn.commit()
+        except (Error, OSError, UnicodeDecodeError) as e:
+            conn.rollback()
+            log.error(f"Importación de catálogo '{ruta}' fallida: {e}")
+            return False, f"No se importó nada: {e}", None
+        finally:
+            self.queries.db.cerrarConexion(conn)
+
+        segundos = time.perf_counter() - inicio
+        log.info(f"{descripcion} ({segundos:.1f}s)")
+
+        # Miles de filas cambiadas: más barato recargar el catálogo completo que pedir los cambios
+        CatalogCache.obtenerInstancia().invalidar()
+        ReportGenerator.invalidarCache()
+
+        mensaje = (
+            f"Importación lista en {segundos:.1f}s: {leidas - len(rechazos)} de {leidas} filas aplicadas.\n"
+            f"Productos: {resumen['productos_creados']} nuevos, {resumen['productos_actualizados']} actualizados. "
+            f"Variantes: {resumen['variantes_creadas']} nuevas, {resumen['variantes_actualizadas']} con stock nuevo."
+        )
+        mensaje += self._reportarRechazos(ruta, ruta_rechazados, COLUMNAS_CATALOGO, rechazos)
+        return True, mensaje, resumen
+
+    def registrarEntrega(self, ruta, id_empleado, ruta_rechazados=None):
+        """
+        Resurte el inventario con el archivo de entrega de uno o varios proveedores:
+        suma lo recibido al stock de cada variante y vincula el producto con quien lo entregó.
+        Retorna: (exito, mensaje, resumen) - resumen es None si no se aplicó nada
+        """
+        try:
+            columnas, delimitador = leerEncabezado(ruta, COLUMNAS_ENTREGA, ALIAS_ENTREGA)
+        except (OSError, UnicodeDecodeError, ValueError) as e:
+            return False, f"No se pudo leer el archivo: {e}", None
+
+        conn = self.queries.db.obtenerConexion()
+        if not conn:
+            return False, "No hay conexión a la BD.", None
+
+        inicio = time.perf_counter()
+        try:
+            self.queries.prepararEntrega(conexion_externa=conn)
+            with open(ruta, encoding=CODIFICACION_ARCHIVOS, newline='') as archivo:
+                leidas = self.queries.copiarEntrega(archivo, columnas, delimitador, conexion_externa=conn)
+            self.queries.validarEntrega(conexion_externa=conn)
+            rechazos = self.queries.obtenerRechazosEntrega(conexion_externa=conn)
+            if len(rechazos) == leidas:
+                conn.rollback()
+                mensaje = f"Ninguna fila de la entrega es válida ({leidas} leídas)."
+                return False, mensaje + self._reportarRechazos(ruta, ruta_rechazados, COLUMNAS_ENTREGA, rechazos), None
+
+            resumen = self.queries.aplicarEntrega(conexion_externa=conn)
+            resumen['leidas'] = leidas
+            resumen['rechazadas'] = len(rechazos)
+            # Un solo registro de auditoría por entrega (no uno por variante)
+            descripcion = (
+                f"Entrega '{os.path.basename(ruta)}' de {resumen['proveedores']}: "
+                f"+{resumen['unidades']} unidades en {resumen['variantes']} variantes "
+                f"({leidas} filas, {len(rechazos)} rechazadas; {resumen['vinculos_nuevos']} vínculos proveedor-producto nuevos)."
+            )
+            self.usr_queries.registrarLog(id_empleado, "ENTRADA MERCANCIA", descripcion, conexion_externa=conn)
+            conn.commit()
+        except (Error, OSError, UnicodeDecodeError) as e:
+            conn.rollback()
+            log.error(f"Entrega '{ruta}' fallida: {e}")
+            return False, f"No se aplicó nada: {e}", None
+        finally:
+            self.queries.db.cerrarConexion(conn)
+
+        segundos = time.perf_counter() - inicio
+        log.info(f"{descripcion} ({segundos:.1f}s)")
+
+        # Solo cambió stock: la próxima lectura pide a la BD lo que cambió (no hace falta recargar todo)
+        CatalogCache.obtenerInstancia().marcarCambiosPendientes()
+        ReportGenerator.invalidarCache()
+
+        mensaje = (
+            f"Entrega registrada en {segundos:.1f}s: +{resumen['unidades']} unidades "
+            f"en {resumen['variantes']} variantes ({leidas - len(rechazos)} de {leidas} filas)."
+        )
+        if resumen['vinculos_nuevos']:
+            mensaje += f"\n{resumen['vinculos_nuevos']} productos quedaron vinculados a su proveedor."
+        mensaje += self._reportarRechazos(ruta, ruta_rechazados, COLUMNAS_ENTREGA, rechazos)
+        return True, mensaje, resumen
+
+    def _reportarRechazos(self, ruta, ruta_rechazados, columnas, rechazos):
+        """Escribe el CSV de filas rechazadas (si hay) y retorna la línea para el mensaje al usuario."""
+        if not rechazos:
+            return ""
+        ruta_rechazados = ruta_rechazados or rutaRechazosPorDefecto(ruta)
+        try:
+            escribirRechazos(ruta_rechazados, ('linea', 'motivo') + columnas, rechazos)
+            return f"\n{len(rechazos)} filas rechazadas (detalle en {ruta_rechazados})."
+        except OSError as e:
+            log.error(f"No se pudo escribir el reporte de rechazos '{ruta_rechazados}': {e}")
+            return f"\n{len(rechazos)} filas rechazadas (no se pudo escribir el detalle: {e})."
+
+
+def main(argumentos=None):
+    parser = argparse.ArgumentParser(description="Cargas masivas de Mis Trapitos")
+    subcomandos = parser.add_subparsers(dest='accion', required=True)
+
+    catalogo = subcomandos.add_parser('catalogo', help="Importa productos y variantes desde un CSV/TSV")
+    catalogo.add_argument('archivo', help="Ruta del archivo")
+    catalogo.add_argument('--usuario', required=True, help="Usuario del empleado que hace la carga (auditoría)")
+    catalogo.add_argument('--rechazados', default=None, help="Dónde escribir las filas rechazadas")
+
+    entrega = subcomandos.add_parser('entrega', help="Suma al stock la mercancía recibida de proveedores")
+    entrega.add_argument('archivo', help="Ruta del archivo")
+    entrega.add_argument('--usuario', required=True, help="Usuario del empleado que recibe (auditoría)")
+    entrega.add_argument('--rechazados', default=None, help="Dónde escribir las filas rechazadas")
+
+    opciones = parser.parse_args(argumentos)
+
+    empleado = UsuariosQueries().obtenerUsuarioPorUser(opciones.usuario)
+    if not empleado:
+        print(f"No existe un empleado activo con el usuario '{opciones.usuario}'.")
+        return 1
+
+    loader = BulkLoader()
+    if opciones.accion == 'catalogo':
+        exito, mensaje, _ = loader.importarCatalogo(opciones.archivo, empleado[0], opciones.rechazados)
+    else:
+        exito, mensaje, _ = loader.registrarEntrega(opciones.archivo, empleado[0], opciones.rechazados)
+    print(mensaje)
+    return 0 if exito else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -98,6 +98,22 @@ class CustomerController:
         except Exception as e:
             log.error(f"Error al listar clientes: {e}")
             return []
+
+    def iterarListaClientes(self):
+        """Entrega los clientes fila por fila (cursor de servidor) en lugar de cargarlos todos."""
+        try:
+            yield from self.client_queries.iterarTodosLosClientes()
+        except Exception as e:
+            log.error(f"Error al recorrer clientes: {e}")
+
+    def obtenerPaginaClientes(self, ultima_fila=None, limite=200):
+        """Clientes que siguen a 'ultima_fila' (id, nombre, ...) en orden alfabético; None = desde el inicio."""
+        try:
+            despues_de = (ultima_fila[1], ultima_fila[0]) if ultima_fila else None
+            return self.client_queries.obtenerPaginaClientes(despues_de, limite)
+        except Exception as e:
+            log.error(f"Error al obtener página de clientes: {e}")
+            return []
         
     def eliminarCliente(self, id_empleado, id_cliente):
         try:
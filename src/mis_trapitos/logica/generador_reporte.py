@@ -1,18 +1,105 @@
 ## Controlador de generación de reportes
 
+import os
+import csv
+import threading
 from mis_trapitos.database_conexion.reporte_queries import ReportQueries
+from mis_trapitos.core.cache_ttl import CacheTTL
 from mis_trapitos.core.logger import log
 
+# Segundos que vale cada reporte en cache. Una venta (o un cambio de ofertas) lo invalida antes.
+TTL_REPORTES = {
+    'ventas_recientes': 60,
+    'mayor_descuento': 300,
+    'mayor_stock': 60,
+    'productos_estancados': 900,
+    'metodos_pago': 300,
+    'top_ventas_mes': 300,
+    'fidelidad_cliente': 300,
+    'productos_premium': 120,
+    'fecha_vistas': 60,
+}
+
 class ReportGenerator:
     """
     Controlador lógico para la generación de reportes.
     Se encarga de invocar las consultas de lectura y manejar posibles errores
     antes de entregar los datos a la vista.
+
+    Los resultados se guardan en un cache compartido por todo el proceso (ver TTL_REPORTES):
+    volver a abrir la pestaña de Reportes no vuelve a recorrer todo el historial de ventas.
     """
 
+    _cache = None
+    _candado_cache = threading.Lock()
+
+    @classmethod
+    def obtenerCache(cls):
+        if cls._cache is None:
+            with cls._candado_cache:
+                if cls._cache is None:
+                    cls._cache = CacheTTL(
+                        maximo=int(os.getenv('REPORTES_CACHE_MAX', '128')),
+                        ttl_por_defecto=float(os.getenv('REPORTES_CACHE_TTL_SEG', '300'))
+                    )
+        return cls._cache
+
+    @classmethod
+    def invalidarCache(cls, grupo=None):
+        """Llamar tras confirmar una venta (todo) o al cambiar ofertas ('mayor_descuento')."""
+        if cls._cache is not None:
+            cls._cache.invalidar(grupo)
+
     def __init__(self):
         """Inicializa la instancia de consultas de reportes"""
         self.queries = ReportQueries()
+        self.usar_cache = os.getenv('REPORTES_CACHE', '1') != '0'
+
+    def _consultar(self, nombre, funcion, *args):
+        """
+        Ejecuta funcion(*args) pasando por el cache.
+        Los resultados vacíos no se guardan: obtenerDatos también retorna [] cuando falla la BD,
+        y no queremos servir un reporte vacío durante todo el TTL por un error pasajero.
+        """
+        if not self.usar_cache:
+            return funcion(*args)
+        return self.obtenerCache().obtenerOCalcular(
+            (nombre,) + args, lambda: funcion(*args), TTL_REPORTES.get(nombre), guardar_si=bool
+        )
+
+    def obtenerEstadisticasCache(self):
+        """Aciertos, fallos, desalojos... del cache de reportes."""
+        return self.obtenerCache().obtenerEstadisticas()
+
+    def obtenerFechaDatos(self):
+        """
+        Fecha del último refresco de las vistas de reportes ("datos al ..."),
+        o None si los reportes se calculan en vivo.
+        """
+        try:
+            return self._consultar('fecha_vistas', self.queries.obtenerFechaRefrescoVistas)
+        except Exception as e:
+            log.error(f"Error al consultar la fecha de los reportes: {e}")
+            return None
+
+    def refrescarVistas(self, antiguedad_minima_seg=None):
+        """
+        Recalcula las vistas materializadas de reportes (a pedido o desde el refresco programado).
+        Retorna: (exito, mensaje)
+        """
+        try:
+            if not self.queries.existenVistasReportes():
+                return False, "Los reportes se calculan en vivo (migración V007 no instalada)."
+
+            refrescadas = self.queries.refrescarVistasReportes(antiguedad_minima_seg)
+            if refrescadas is None:
+                return False, "Otra terminal está recalculando los reportes. Intente en un momento."
+            if refrescadas:
+                self.invalidarCache()
+            return True, f"Reportes recalculados ({len(refrescadas)} vistas actualizadas)."
+        except Exception as e:
+            log.error(f"Error al refrescar las vistas de reportes: {e}")
+            return False, f"No se pudieron recalcular los reportes: {e}"
 
     def obtenerResumenInventario(self):
         """
@@ -20,7 +107,7 @@ class ReportGenerator:
         Retorna: Diccionario con datos o mensaje de vacío.
         """
         try:
-            datos = self.queries.obtenerProductoMayorStock()
+            datos = self._consultar('mayor_stock', self.queries.obtenerProductoMayorStock)
             if datos:
                 # datos = (descripcion, talla, color, stock)
                 return {
@@ -39,18 +126,38 @@ class ReportGenerator:
         """
         try:
             # datos es una lista de tuplas: [(desc, talla, color), ...]
-            lista_cruda = self.queries.obtenerProductosSinVentas(dias)
+            lista_cruda = self._consultar('productos_estancados', self.queries.obtenerProductosSinVentas, dias)
             return lista_cruda
         except Exception as e:
             log.error(f"Error al obtener productos estancados: {e}")
             return []
 
+    def exportarProductosEstancados(self, ruta_archivo, dias=90):
+        """
+        Escribe en un CSV los productos sin ventas en el periodo.
+        Las filas se leen por bloques y se escriben conforme llegan (no se cargan todas en memoria).
+        Retorna: (exito, mensaje)
+        """
+        try:
+            total_filas = 0
+            with open(ruta_archivo, 'w', newline='', encoding='utf-8') as archivo:
+                escritor = csv.writer(archivo)
+                escritor.writerow(["Producto", "Talla", "Color"])
+                for fila in self.queries.iterarProductosSinVentas(dias):
+                    escritor.writerow(fila)
+                    total_filas += 1
+            log.info(f"Reporte de productos estancados exportado: {ruta_archivo} ({total_filas} filas)")
+            return True, f"Se exportaron {total_filas} productos a {ruta_archivo}"
+        except Exception as e:
+            log.error(f"Error al exportar productos estancados: {e}")
+            return False, f"No se pudo exportar el reporte: {e}"
+
     def obtenerTendenciasPago(self):
         """
         Retorna estadísticas de uso de métodos de pago.
         """
         try:
-            return self.queries.obtenerMetodosPagoPopulares()
+            return self._consultar('metodos_pago', self.queries.obtenerMetodosPagoPopulares)
         except Exception as e:
             log.error(f"Error en reporte de pagos: {e}")
             return []
@@ -60,7 +167,7 @@ class ReportGenerator:
         Retorna los 5 productos más vendidos de los últimos 30 días.
         """
         try:
-            return self.queries.obtenerProductosMasVendidosMes()
+            return self._consultar('top_ventas_mes', self.queries.obtenerProductosMasVendidosMes)
         except Exception as e:
             log.error(f"Error en reporte top ventas: {e}")
             return []
@@ -71,8 +178,8 @@ class ReportGenerator:
         Retorna un diccionario con valores clave.
         """
         try:
-            ventas_3dias = self.queries.contarVentasRecientes(3)
-            mejor_oferta = self.queries.obtenerProductoMayorDescuento() # (desc, porcentaje)
+            ventas_3dias = self._consultar('ventas_recientes', self.queries.contarVentasRecientes, 3)
+            mejor_oferta = self._consultar('mayor_descuento', self.queries.obtenerProductoMayorDescuento) # (desc, porcentaje)
             
             resumen = {
                 "ventas_recientes": ventas_3dias,
@@ -90,7 +197,7 @@ class ReportGenerator:
         try:
             if not id_cliente:
                 return []
-            return self.queries.obtenerProductosRecurrentesCliente(id_cliente)
+            return self._consultar('fidelidad_cliente', self.queries.obtenerProductosRecurrentesCliente, id_cliente)
         except Exception as e:
             log.error(f"Error reporte fidelidad cliente {id_cliente}: {e}")
             return []
@@ -101,7 +208,7 @@ class ReportGenerator:
         """
         try:
             precio = float(precio_minimo)
-            return self.queries.buscarProductosCarosEnStock(precio)
+            return self._consultar('productos_premium', self.queries.buscarProductosCarosEnStock, precio)
         except ValueError:
             return []
         except Exception as e:
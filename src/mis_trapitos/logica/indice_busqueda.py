@@ -0,0 +1,124 @@
+## Índice de búsqueda en memoria para el catálogo del punto de venta
+
+import re
+import threading
+import unicodedata
+
+# Prefijos más largos que esto no se indexan: la búsqueda se completa filtrando por el token entero
+LARGO_MAXIMO_PREFIJO = 12
+
+_SEPARADORES = re.compile(r'[^0-9a-z]+')
+
+
+def normalizarTexto(texto):
+    """Minúsculas y sin acentos: 'Camisón Niño' -> 'camison nino'."""
+    descompuesto = unicodedata.normalize('NFKD', str(texto or ''))
+    return ''.join(c for c in descompuesto if not unicodedata.combining(c)).lower()
+
+
+def tokenizar(texto):
+    return [token for token in _SEPARADORES.split(normalizarTexto(texto)) if token]
+
+
+class CatalogSearchIndex:
+    """
+    Índice de prefijos por palabra sobre descripción, talla y color de cada variante.
+    Cada palabra escrita se busca como prefijo ("pla ro" encuentra "Playera ... Rojo")
+    y el resultado es la intersección, en el mismo orden que el catálogo.
+
+    sincronizar(filas) compara contra lo que ya hay: solo se vuelven a tokenizar las variantes
+    cuyo texto cambió; un cambio de stock o precio solo reemplaza la fila.
+    Es seguro usarlo desde varios hilos (se sincroniza en segundo plano y se busca en el de Tk).
+    """
+
+    # Posiciones en la fila del catálogo: (id_var, id_prod, desc, talla, color, stock, precio)
+    CAMPOS_TEXTO = (2, 3, 4)
+
+    def __init__(self):
+        self._candado = threading.Lock()
+        self._filas = {}    # {id_variante: fila}
+        self._tokens = {}   # {id_variante: set de tokens} (para poder quitarla del índice)
+        self._prefijos = {} # {prefijo: set de id_variante}
+        self._orden = {}    # {id_variante: posición en el catálogo}
+        self._lista = []
+
+    def __len__(self):
+        return len(self._filas)
+
+    # --- MANTENIMIENTO ---
+
+    def sincronizar(self, filas):
+        """Deja el índice igual a 'filas' (lista ordenada del catálogo) tocando solo lo que cambió."""
+        with self._candado:
+            vistas = set()
+            for fila in filas:
+                id_variante = fila[0]
+                vistas.add(id_variante)
+                anterior = self._filas.get(id_variante)
+                if anterior is None:
+                    self._indexar(id_variante, fila)
+                elif anterior is not fila and self._textoDe(anterior) != self._textoDe(fila):
+                    self._desindexar(id_variante)
+                    self._indexar(id_variante, fila)
+                self._filas[id_variante] = fila
+
+            for id_variante in [i for i in self._filas if i not in vistas]:
+                self._desindexar(id_variante)
+                del self._filas[id_variante]
+
+            self._lista = list(filas)
+            self._orden = {fila[0]: posicion for posicion, fila in enumerate(self._lista)}
+
+    def _textoDe(self, fila):
+        return tuple(fila[i] for i in self.CAMPOS_TEXTO)
+
+    def _indexar(self, id_variante, fila):
+        tokens = set()
+        for indice in self.CAMPOS_TEXTO:
+            tokens.update(tokenizar(fila[indice]))
+        self._tokens[id_variante] = tokens
+        for token in tokens:
+            for largo in range(1, min(len(token), LARGO_MAXIMO_PREFIJO) + 1):
+                self._prefijos.setdefault(token[:largo], set()).add(id_variante)
+
+    def _desindexar(self, id_variante):
+        for token in self._tokens.pop(id_variante, ()):
+            for largo in range(1, min(len(token), LARGO_MAXIMO_PREFIJO) + 1):
+                conjunto = self._prefijos.get(token[:largo])
+                if conjunto is not None:
+                    conjunto.discard(id_variante)
+                    if not conjunto:
+                        del self._prefijos[token[:largo]]
+
+    # --- CONSULTA ---
+
+    def buscar(self, texto):
+        """Filas que tienen TODAS las palabras de 'texto' como prefijo de alguna palabra suya."""
+        palabras = tokenizar(texto)
+        with self._candado:
+            if not palabras:
+                return list(self._lista)
+
+            candidatos = []
+            for palabra in palabras:
+                conjunto = self._prefijos.get(palabra[:LARGO_MAXIMO_PREFIJO])
+                if not conjunto:
+                    return []
+                candidatos.append(conjunto)
+
+            candidatos.sort(key=len) # Intersectar empezando por el más chico
+            ids = set(candidatos[0])
+            for conjunto in candidatos[1:]:
+                ids &= conjunto
+                if not ids:
+                    return []
+
+            # Palabras más largas que el prefijo indexado: confirmar contra los tokens completos
+            largas = [p for p in palabras if len(p) > LARGO_MAXIMO_PREFIJO]
+            if largas:
+                ids = {
+                    i for i in ids
+                    if all(any(t.startswith(p) for t in self._tokens[i]) for p in largas)
+                }
+
+            return [self._filas[i] for i in sorted(ids, key=self._orden.__getitem__)]
@@ -1,7 +1,13 @@
 ## Controlador de productos
 
+import os
 from datetime import datetime
+from decimal import Decimal, InvalidOperation
 from mis_trapitos.database_conexion.queries import InventarioQueries, ProveedoresQueries, UsuariosQueries
+from mis_trapitos.logica.cache_catalogo import CatalogCache
+from mis_trapitos.logica.generador_reporte import ReportGenerator
+from mis_trapitos.logica.indice_busqueda import CatalogSearchIndex
+from mis_trapitos.logica.carga_masiva import BulkLoader
 from mis_trapitos.core.logger import log
 
 class ProductController:
@@ -10,10 +16,18 @@ class ProductController:
     Aplica reglas de validación antes de guardar
     """
 
+    # Buscar en la BD (V009) o en memoria: se decide una vez por proceso (None = sin decidir)
+    _busqueda_servidor = None
+    # Índice en memoria para buscarCatalogo cuando el catálogo cabe en la caja
+    _indice_local = CatalogSearchIndex()
+
     def __init__(self):
         self.inv_queries = InventarioQueries()
         self.prov_queries = ProveedoresQueries()
         self.usr_queries = UsuariosQueries()
+        # CATALOGO_CACHE=0 desactiva el cache y vuelve a consultar la BD completa cada vez
+        self.usar_cache = os.getenv('CATALOGO_CACHE', '1') != '0'
+        self.cache = CatalogCache.obtenerInstancia() if self.usar_cache else None
 
     def crearNuevaCategoria(self, id_empleado, nombre, descripcion): 
         """Valida y crea una categoría, registrando el log"""
@@ -119,15 +133,108 @@ class ProductController:
             if conn:
                 self.inv_queries.db.cerrarConexion(conn)
 
-    def obtenerCatalogo(self):
+    def obtenerCatalogo(self, refrescar=True):
         # Aquí para transformar los datos si la UI necesita un formato especial JSON/Dict
         
-        """Retorna la lista de productos formateada para la vista."""
+        """
+        Retorna la lista de productos formateada para la vista.
+        Sale del cache de catálogo; refrescar=True pide antes a la BD solo lo que cambió.
+        """
         try:
+            if self.cache:
+                return self.cache.obtenerFilas(refrescar)
             return self.inv_queries.obtenerProductosEnInventario()
         except Exception as e:
             log.error(f"Error al obtener el catálogo de productos: {e}")
             return []
+
+    def iterarCatalogo(self):
+        """
+        Entrega el catálogo fila por fila para tablas grandes.
+        Con cache ya está en memoria; sin él se lee por bloques (cursor de servidor).
+        """
+        try:
+            if self.cache:
+                yield from self.cache.obtenerFilas()
+            else:
+                yield from self.inv_queries.iterarProductosEnInventario()
+        except Exception as e:
+            log.error(f"Error al recorrer el catálogo de productos: {e}")
+
+    def obtenerPaginaCatalogo(self, ultima_fila=None, limite=200):
+        """
+        Variantes que siguen a 'ultima_fila' (con el formato del catálogo) en el orden del inventario.
+        Va directo a la BD por llave: sirve igual con 1.000 o con 1.000.000 de variantes.
+        """
+        try:
+            despues_de = (ultima_fila[1], ultima_fila[0]) if ultima_fila else None
+            return self.inv_queries.obtenerPaginaInventario(despues_de, limite)
+        except Exception as e:
+            log.error(f"Error al obtener página del catálogo: {e}")
+            return []
+
+    def usaBusquedaServidor(self):
+        """
+        True si el catálogo es tan grande que conviene buscar en la BD en vez de cargarlo completo:
+        la migración V009 está aplicada y hay al menos CATALOGO_BUSQUEDA_SERVIDOR_MIN variantes activas.
+        """
+        if ProductController._busqueda_servidor is None:
+            minimo = int(os.getenv('CATALOGO_BUSQUEDA_SERVIDOR_MIN', '20000'))
+            try:
+                usar = (
+                    minimo > 0
+                    and self.inv_queries.existeBusquedaServidor()
+                    and self.inv_queries.contarVariantesActivas() >= minimo
+                )
+            except Exception as e:
+                log.error(f"No se pudo decidir el modo de búsqueda, se usa la búsqueda en memoria: {e}")
+                usar = False
+            if usar:
+                log.info(f"Catálogo de {minimo}+ variantes: las búsquedas se hacen en la BD.")
+            ProductController._busqueda_servidor = usar
+        return ProductController._busqueda_servidor
+
+    def buscarCatalogo(self, texto, pagina=0, tam_pagina=50):
+        """
+        Una página de resultados de búsqueda con el formato del catálogo.
+        En la BD: subcadenas sin acentos ordenadas por parecido. En memoria: prefijos de palabra.
+        Retorna: (filas, hay_mas)
+        """
+        try:
+            if self.usaBusquedaServidor():
+                return self.inv_queries.buscarProductos(texto, pagina, tam_pagina)
+
+            ProductController._indice_local.sincronizar(self.obtenerCatalogo(refrescar=False))
+            filas = ProductController._indice_local.buscar(texto)
+            inicio = pagina * tam_pagina
+            return filas[inicio:inicio + tam_pagina], len(filas) > inicio + tam_pagina
+        except Exception as e:
+            log.error(f"Error al buscar '{texto}' en el catálogo: {e}")
+            return [], False
+
+    def importarCatalogo(self, id_empleado, ruta_archivo):
+        """
+        Carga masiva de productos y variantes desde un CSV/TSV (ver logica/carga_masiva.py).
+        Retorna: (exito, mensaje)
+        """
+        try:
+            exito, mensaje, _ = BulkLoader().importarCatalogo(ruta_archivo, id_empleado)
+            return exito, mensaje
+        except Exception as e:
+            log.error(f"Error al importar el catálogo '{ruta_archivo}': {e}")
+            return False, f"Error del sistema: {e}"
+
+    def registrarEntregaProveedor(self, id_empleado, ruta_archivo):
+        """
+        Resurtido masivo: suma al stock lo que trae el archivo de entrega (variante, cantidad, proveedor).
+        Retorna: (exito, mensaje)
+        """
+        try:
+            exito, mensaje, _ = BulkLoader().registrarEntrega(ruta_archivo, id_empleado)
+            return exito, mensaje
+        except Exception as e:
+            log.error(f"Error al registrar la entrega '{ruta_archivo}': {e}")
+            return False, f"Error del sistema: {e}"
         
 
     def agregarOferta(self, id_producto, porcentaje, fecha_inicio_str, fecha_fin_str):
@@ -165,6 +272,7 @@ class ProductController:
         exito = desc_queries.registrarDescuento(id_producto, porc, f_inicio, f_fin)
         
         if exito:
+            ReportGenerator.invalidarCache('mayor_descuento')
             log.info(f"Oferta del {porc}% agregada al producto ID {id_producto}.")
             return True, f"Oferta del {porc}% registrada correctamente."
         return False, "Error al guardar la oferta." 
@@ -207,6 +315,126 @@ class ProductController:
             log.error(f"Error al obtener lista de proveedores: {e}")
             return []
 
+    def obtenerPaginaProveedores(self, ultima_fila=None, limite=200):
+        """Proveedores que siguen a 'ultima_fila' (id, nombre, contacto); None = desde el inicio."""
+        try:
+            return self.prov_queries.obtenerPaginaProveedores(ultima_fila[0] if ultima_fila else 0, limite)
+        except Exception as e:
+            log.error(f"Error al obtener página de proveedores: {e}")
+            return []
+
+    def obtenerListaCategorias(self):
+        """Retorna [(id_categoria, nombre), ...] ordenadas por nombre."""
+        try:
+            return sorted(self.inv_queries.obtenerCategorias(), key=lambda c: c[1].lower())
+        except Exception as e:
+            log.error(f"Error al obtener lista de categorías: {e}")
+            return []
+
+    # --- CAMBIO MASIVO DE PRECIOS ---
+
+    def _leerCambioPrecios(self, modo, valor, precio_min, precio_max):
+        """
+        Valida lo capturado (texto o número). Los precios del rango pueden venir vacíos.
+        Retorna: (error, valor, precio_min, precio_max) - error es None si todo está bien
+        """
+        if modo not in ('porcentaje', 'monto'):
+            return "Modo de cambio inválido.", None, None, None
+        try:
+            valor = Decimal(str(valor).strip())
+            precio_min = Decimal(str(precio_min).strip()) if str(precio_min or '').strip() else None
+            precio_max = Decimal(str(precio_max).strip()) if str(precio_max or '').strip() else None
+        except InvalidOperation:
+            return "El valor y el rango de precios deben ser números.", None, None, None
+
+        if not valor.is_finite() or valor == 0:
+            return "El cambio no puede ser 0.", None, None, None
+        if modo == 'monto' and valor.normalize().as_tuple().exponent < -2:
+            return "El monto no puede tener más de 2 decimales.", None, None, None
+        if modo == 'porcentaje' and valor <= -100:
+            return "Un descuento del 100% o más dejaría los precios en 0.", None, None, None
+        if precio_min is not None and precio_max is not None and precio_min > precio_max:
+            return "El precio mínimo del rango es mayor que el máximo.", None, None, None
+        return None, valor, precio_min, precio_max
+
+    def _describirCambioPrecios(self, modo, valor, id_categoria, id_proveedor, precio_min, precio_max):
+        cambio = f"{valor:+}%" if modo == 'porcentaje' else f"{'+' if valor > 0 else '-'}${abs(valor):.2f}"
+        filtros = []
+        if id_categoria is not None: filtros.append(f"categoría ID {id_categoria}")
+        if id_proveedor is not None: filtros.append(f"proveedor ID {id_proveedor}")
+        if precio_min is not None: filtros.append(f"precio desde ${precio_min:.2f}")
+        if precio_max is not None: filtros.append(f"precio hasta ${precio_max:.2f}")
+        return f"{cambio} ({', '.join(filtros) or 'todos los productos activos'})"
+
+    def previsualizarCambioPrecios(self, modo, valor, id_categoria=None, id_proveedor=None, precio_min=None, precio_max=None):
+        """
+        Cuántos productos y variantes tocaría el cambio y cómo quedarían los precios, sin guardar nada.
+        Retorna: (exito, mensaje) - exito=False si no hay nada que cambiar o el cambio no es válido
+        """
+        error, valor, precio_min, precio_max = self._leerCambioPrecios(modo, valor, precio_min, precio_max)
+        if error:
+            return False, error
+        try:
+            res = self.inv_queries.previsualizarCambioPrecios(
+                modo, valor, id_categoria, id_proveedor, precio_min, precio_max
+            )
+        except Exception as e:
+            log.error(f"Error en la vista previa del cambio de precios: {e}")
+            return False, f"Error del sistema: {e}"
+        if not res:
+            return False, "No se pudo consultar la BD."
+
+        productos, cambian, invalidos, variantes, min_actual, max_actual, min_nuevo, max_nuevo = res
+        if not productos:
+            return False, "Ningún producto activo coincide con el filtro."
+        if invalidos:
+            return False, f"{invalidos} productos quedarían con un precio inválido (0 o menos, o demasiado alto)."
+        if not cambian:
+            return False, f"{productos} productos coinciden pero ninguno cambiaría de precio."
+        return True, (
+            f"{cambian} productos ({variantes} variantes) cambiarán de precio.\n"
+            f"Hoy: ${min_actual:.2f} a ${max_actual:.2f}  ->  Después: ${min_nuevo:.2f} a ${max_nuevo:.2f}"
+        )
+
+    def aplicarCambioPrecios(self, id_empleado, modo, valor, id_categoria=None, id_proveedor=None, precio_min=None, precio_max=None):
+        """
+        Cambia precio_base de todos los productos que pasan el filtro en un solo UPDATE,
+        con un único registro de auditoría para todo el lote.
+        Retorna: (exito, mensaje)
+        """
+        error, valor, precio_min, precio_max = self._leerCambioPrecios(modo, valor, precio_min, precio_max)
+        if error:
+            return False, error
+
+        conn = self.inv_queries.db.obtenerConexion()
+        if not conn:
+            return False, "Error de conexión."
+
+        filtros = (id_categoria, id_proveedor, precio_min, precio_max)
+        try:
+            # Se revisa de nuevo dentro de la transacción: otra terminal pudo cambiar precios desde la vista previa
+            res = self.inv_queries.previsualizarCambioPrecios(modo, valor, *filtros, conexion_externa=conn)
+            if res and res[2]:
+                conn.rollback()
+                return False, f"{res[2]} productos quedarían con un precio inválido. No se cambió nada."
+
+            cambiados = self.inv_queries.cambiarPreciosMasivo(modo, valor, *filtros, conexion_externa=conn)
+            descripcion = f"{cambiados} productos: {self._describirCambioPrecios(modo, valor, *filtros)}"
+            self.usr_queries.registrarLog(id_empleado, "CAMBIO MASIVO PRECIOS", descripcion, conexion_externa=conn)
+            conn.commit()
+        except Exception as e:
+            conn.rollback()
+            log.error(f"Cambio masivo de precios fallido: {e}")
+            return False, f"Error al cambiar precios: {e}"
+        finally:
+            self.inv_queries.db.cerrarConexion(conn)
+
+        if self.cache:
+            self.cache.invalidar()
+        ReportGenerator.invalidarCache()
+        log.info(f"Cambio masivo de precios: {descripcion}")
+        return True, f"Precio actualizado en {cambiados} productos."
+
     def vincularProductoAProveedor(self, id_empleado, id_proveedor, id_producto):
         """
         Asocia un producto existente a un proveedor para reposición.
@@ -276,6 +504,9 @@ class ProductController:
                 )
                 
                 conn.commit()
+                if self.cache:
+                    self.cache.actualizarPrecioLocal(id_producto, p_float)
+                    self.cache.actualizarStockLocal(id_variante, s_int)
                 log.info(f"Producto actualizado ID {id_producto}.")
                 return True, "Producto actualizado correctamente."
                 
@@ -295,6 +526,8 @@ class ProductController:
             filas = self.inv_queries.eliminarProducto(id_producto)
             
             if filas:
+                if self.cache:
+                    self.cache.quitarProductoLocal(id_producto)
                 self.usr_queries.registrarLog(id_empleado, "BAJA PRODUCTO", f"Se descontinuó el producto ID {id_producto}")
                 log.info(f"Producto ID {id_producto} descontinuado (Soft Delete).")
                 return True, "Producto eliminado correctamente."
@@ -0,0 +1,48 @@
+## Refresco programado de las vistas materializadas de reportes
+
+import os
+import threading
+from mis_trapitos.logica.generador_reporte import ReportGenerator
+from mis_trapitos.core.logger import log
+
+class ReportRefreshScheduler:
+    """
+    Hilo demonio que recalcula las vistas de reportes (migración V007) cada REPORTES_REFRESCO_SEG.
+    Con varias terminales abiertas solo una hace el trabajo: si otra acaba de refrescar
+    (o está refrescando) esta se lo salta.
+    """
+
+    _instancia = None
+
+    @classmethod
+    def obtenerInstancia(cls):
+        if cls._instancia is None:
+            cls._instancia = cls()
+        return cls._instancia
+
+    def __init__(self):
+        self.segundos = float(os.getenv('REPORTES_REFRESCO_SEG', '900'))
+        self._detener = threading.Event()
+        self._hilo = None
+
+    def iniciar(self):
+        if self.segundos <= 0 or (self._hilo and self._hilo.is_alive()):
+            return
+        self._detener.clear()
+        self._hilo = threading.Thread(target=self._ciclo, name="refresco_reportes", daemon=True)
+        self._hilo.start()
+
+    def detener(self):
+        self._detener.set()
+
+    def _ciclo(self):
+        generador = ReportGenerator()
+        if not generador.queries.vistas_activas or not generador.queries.existenVistasReportes():
+            log.info("Vistas de reportes (V007) desactivadas o no instaladas: no se programa su refresco.")
+            return
+
+        while not self._detener.wait(self.segundos):
+            # Margen del 10%: si otra terminal refrescó hace poco, no se repite
+            exito, mensaje = generador.refrescarVistas(antiguedad_minima_seg=self.segundos * 0.9)
+            if not exito:
+                log.warning(f"Refresco programado de reportes: {mensaje}")
@@ -1,6 +1,12 @@
 ## Controlador de ventas
 
-from mis_trapitos.database_conexion.queries import VentasQueries, InventarioQueries, DescuentosQueries, UsuariosQueries
+import os
+import time
+import random
+from psycopg2 import errorcodes
+from mis_trapitos.database_conexion.queries import VentasQueries, DescuentosQueries, UsuariosQueries
+from mis_trapitos.logica.cache_catalogo import CatalogCache
+from mis_trapitos.logica.generador_reporte import ReportGenerator
 from mis_trapitos.core.logger import log
 
 class SalesController:
@@ -10,10 +16,21 @@ class SalesController:
     en una única transacción atómica.
     """
 
+    # Cache por proceso: None = aún no verificado si registrar_venta existe en el servidor
+    _funcion_servidor_instalada = None
+    _fecha_ultima_venta_instalada = None # Columna de la migración V008
+
     def __init__(self):
         """Inicializa las consultas de ventas"""
         self.ventas_queries = VentasQueries()
         self.user_queries = UsuariosQueries()
+        # Permite forzar el camino en Python (VENTAS_FUNCION_SERVIDOR=0) o para comparativas
+        self.usar_funcion_servidor = os.getenv('VENTAS_FUNCION_SERVIDOR', '1') != '0'
+        # Reintentos ante conflictos de concurrencia entre cajas (deadlock / serialización)
+        self.max_reintentos = int(os.getenv('VENTAS_MAX_REINTENTOS', '3'))
+        self.espera_base_seg = float(os.getenv('VENTAS_ESPERA_BASE_MS', '50')) / 1000
+        # Contadores de esta instancia (útiles para pruebas de carga y diagnóstico)
+        self.estadisticas = {'exitosas': 0, 'fallidas': 0, 'reintentos': 0}
 
     def calcularTotal(self, carrito_compras):
         """
@@ -29,10 +46,9 @@ class SalesController:
     def procesarVentaNueva(self, id_empleado, id_cliente, metodo_pago, carrito_compras):
         """
         Ejecuta la venta aplicando lógica de DESCUENTOS AUTOMÁTICOS y MANUALES.
+        Si la función registrar_venta está instalada en el servidor se usa (un solo viaje a la BD);
+        si no, se ejecuta el mismo proceso paso a paso desde Python.
         """
-        desc_queries = DescuentosQueries()
-        inv_queries = InventarioQueries() # Para verificar precios reales si fuera necesario
-
         # --- VALIDACIONES PREVIAS ---
         if not carrito_compras:
             log.warning(f"Intento de venta con carrito vacío. Empleado: {id_empleado}")
@@ -47,111 +63,240 @@ class SalesController:
             return False, "Error de BD"
 
         try:
-            total_venta_acumulado = 0.0
-            detalles_para_insertar = [] # Guardamos datos procesados para insertar después
-            
-            # --- CÁLCULO Y VALIDACIÓN DE PRECIOS ---
-            # Antes de crear el ticket, procesamos cada producto para calcular su precio final real
-            
-            for item in carrito_compras:
-                id_variante = item['id_variante']
-                cantidad = int(item['cantidad'])
-                precio_base = float(item['precio']) # Precio original del producto
-                descuento_manual = float(item.get('descuento_manual', 0)) # % Manual ingresado por usuario
-
-                if cantidad <= 0: continue
-
-                # 1. Buscar Descuento Automático (Vigente en BD)
-                # Pasamos 'conn' para que la consulta sea rápida dentro de la misma sesión 
-                porc_auto = desc_queries.obtenerDescuentoActivo(id_variante, conexion_externa=conn)
-                
-                
-                porcentaje_final = 0.0
-                tipo_descuento = "Ninguno"
-
-                if descuento_manual > 0:
-                    porcentaje_final = descuento_manual
-                    tipo_descuento = "Manual"
-                elif porc_auto > 0:
-                    porcentaje_final = porc_auto
-                    tipo_descuento = "Automático"
-
-                # Validacion de seguridad: No permitir descuentos > 100% o negativos
-                if porcentaje_final < 0 or porcentaje_final > 100:
-                    raise Exception(f"Descuento inválido ({porcentaje_final}%) en producto {id_variante}")
-
-                # 2. Calcular Precio Final Unitario
-                monto_descuento = precio_base * (porcentaje_final / 100)
-                precio_final_unitario = precio_base - monto_descuento
-                
-                subtotal_linea = precio_final_unitario * cantidad
-                total_venta_acumulado += subtotal_linea
-
-                # Guardamos los datos listos para no recalcular abajo
-                detalles_para_insertar.append({
-                    'id_variante': id_variante,
-                    'cantidad': cantidad,
-                    'precio_grabado': precio_final_unitario, # Precio ya con descuento
-                    'descuento_grabado': monto_descuento # Dinero descontado por unidad
-                })
-
-            # --- INSERCIÓN EN BD ---
-            
-            log.info(f"Iniciando venta. Empleado: {id_empleado}, Total calc: {total_venta_acumulado}")
+            intento = 1
+            while True:
+                try:
+                    if self._funcionServidorDisponible(conn):
+                        id_venta, total_venta = self._registrarVentaEnServidor(
+                            conn, id_empleado, id_cliente, metodo_pago, carrito_compras
+                        )
+                    else:
+                        id_venta, total_venta = self._registrarVentaEnPython(
+                            conn, id_empleado, id_cliente, metodo_pago, carrito_compras
+                        )
 
-            # 1. Crear Ticket
-            id_venta = self.ventas_queries.crearVenta(
-                id_empleado, metodo_pago, total_venta_acumulado, id_cliente, conexion_externa=conn
-            )
-            
-            if not id_venta: raise Exception("Error al crear ticket.")
-
-            # 2. Insertar Detalles y Descontar Stock
-            for det in detalles_para_insertar:
-                self.ventas_queries.registrarDetalleVenta(
-                    id_venta,
-                    det['id_variante'],
-                    det['cantidad'],
-                    det['precio_grabado'], # Guardamos el precio al que FINALMENTE se vendió
-                    det['descuento_grabado'],
-                    conexion_externa=conn
-                )
-
-                exito_stock = self.ventas_queries.descontarStock(
-                    det['id_variante'], det['cantidad'], conexion_externa=conn
-                )
-                if not exito_stock:
-                    raise Exception(f"Stock insuficiente para variante {det['id_variante']}")
-            
-            # --- 3. AUDITORÍA EN BD ---
-            self.user_queries.registrarLog(
-                id_empleado=id_empleado,
-                accion="VENTA",
-                descripcion=f"Venta ID {id_venta} registrada. Total: ${total_venta_acumulado:.2f}",
-                conexion_externa=conn  # Usamos la misma conexión
-            )
-
-            conn.commit()
-            log.info(f"Venta finalizada exitosamente. ID: {id_venta}")
-            return True, f"Venta registrada. Total: ${total_venta_acumulado:.2f}"
+                    conn.commit()
+                    break # Confirmada: desde aquí nada puede volver a cobrarla ni reportarla como fallida
 
-        except Exception as e:
-            # D. REVERSIÓN (ROLLBACK)
-            conn.rollback()
-            mensaje_error = str(e)
-            
-            # Registramos el error técnico en el log
-            log.error(f"Transacción de venta fallida: {mensaje_error}")
+                except Exception as e:
+                    # D. REVERSIÓN (ROLLBACK)
+                    conn.rollback()
 
-            # Retornamos un mensaje amigable al usuario según el tipo de error
-            if "check constraint" in mensaje_error.lower() or "stock_disponible" in mensaje_error.lower():
-                return False, "Error: Stock insuficiente para completar la venta."
-            
-            return False, f"Ocurrió un error al procesar la venta: {mensaje_error}"
+                    # Conflicto con otra caja: esperamos un poco (backoff exponencial con azar) y repetimos
+                    if self._esConflictoConcurrencia(e) and intento < self.max_reintentos:
+                        espera = self.espera_base_seg * (2 ** (intento - 1)) * random.uniform(0.5, 1.5)
+                        log.warning(f"Conflicto de concurrencia en venta (intento {intento}), reintentando en {espera:.3f}s: {e}")
+                        intento += 1
+                        self.estadisticas['reintentos'] += 1
+                        time.sleep(espera)
+                        continue
+
+                    self.estadisticas['fallidas'] += 1
+                    return self._mensajeErrorVenta(e)
             
         finally:
             self.ventas_queries.db.cerrarConexion(conn)
 
+        self.estadisticas['exitosas'] += 1
+        log.info(f"Venta finalizada exitosamente. ID: {id_venta}")
+
+        # Efectos secundarios: si fallan, la venta ya está guardada; solo se registra en el log
+        try:
+            self._actualizarCacheCatalogo(carrito_compras)
+        except Exception as e:
+            log.error(f"Venta {id_venta} guardada, pero no se pudo actualizar el cache de catálogo: {e}")
+        try:
+            ReportGenerator.invalidarCache() # Los reportes ya no reflejan las ventas
+        except Exception as e:
+            log.error(f"Venta {id_venta} guardada, pero no se pudo invalidar el cache de reportes: {e}")
+
+        return True, f"Venta registrada. Total: ${total_venta:.2f}"
+
+    def _actualizarCacheCatalogo(self, carrito_compras):
+        """Descuenta lo vendido del cache de catálogo para no releerlo de la BD."""
+        vendidas = {}
+        for item in carrito_compras:
+            id_variante = int(item['id_variante'])
+            vendidas[id_variante] = vendidas.get(id_variante, 0) + int(item['cantidad'])
+        CatalogCache.obtenerInstancia().descontarStockLocal(vendidas)
+
+    def _esConflictoConcurrencia(self, error):
+        """True si PostgreSQL abortó la transacción por deadlock o fallo de serialización (se puede reintentar)"""
+        return getattr(error, 'pgcode', None) in (errorcodes.DEADLOCK_DETECTED, errorcodes.SERIALIZATION_FAILURE)
+
+    def _mensajeErrorVenta(self, error):
+        """Registra el error técnico y lo traduce a un mensaje amigable para el usuario"""
+        # En errores de PostgreSQL preferimos el mensaje principal (sin CONTEXT ni prefijos)
+        diagnostico = getattr(error, 'diag', None)
+        mensaje_error = getattr(diagnostico, 'message_primary', None) or str(error)
+        
+        # Registramos el error técnico en el log
+        log.error(f"Transacción de venta fallida: {mensaje_error}")
+
+        # Retornamos un mensaje amigable al usuario según el tipo de error
+        if "check constraint" in mensaje_error.lower() or "stock_disponible" in mensaje_error.lower():
+            return False, "Error: Stock insuficiente para completar la venta."
+
+        if mensaje_error.startswith("Stock insuficiente"):
+            return False, f"Error: {mensaje_error}."
+
+        return False, f"Ocurrió un error al procesar la venta: {mensaje_error}"
+
+    def _funcionServidorDisponible(self, conn):
+        """
+        Indica si se debe usar la función registrar_venta del servidor.
+        La verificación en BD se hace una sola vez por proceso.
+        """
+        if not self.usar_funcion_servidor:
+            return False
+        if SalesController._funcion_servidor_instalada is None:
+            SalesController._funcion_servidor_instalada = self.ventas_queries.existeFuncionRegistrarVenta(conexion_externa=conn)
+            log.info(f"Función registrar_venta en servidor: {'disponible' if SalesController._funcion_servidor_instalada else 'no instalada'}")
+        return SalesController._funcion_servidor_instalada
+
+    def _fechaUltimaVentaDisponible(self, conn):
+        """Indica si el UPDATE de stock debe marcar fecha_ultima_venta (se verifica una vez por proceso)."""
+        if SalesController._fecha_ultima_venta_instalada is None:
+            SalesController._fecha_ultima_venta_instalada = self.ventas_queries.existeFechaUltimaVenta(conexion_externa=conn)
+        return SalesController._fecha_ultima_venta_instalada
+
+    def _validarDescuentoManual(self, item):
+        """
+        Validacion de seguridad: No permitir descuentos > 100%.
+        (Un manual negativo se ignora y se aplica el automático, igual que en el camino en Python)
+        """
+        descuento_manual = float(item.get('descuento_manual', 0))
+        if descuento_manual > 100:
+            raise Exception(f"Descuento inválido ({descuento_manual}%) en producto {item['id_variante']}")
+        return descuento_manual
+
+    def _registrarVentaEnServidor(self, conn, id_empleado, id_cliente, metodo_pago, carrito_compras):
+        """Camino rápido: toda la venta en una llamada a registrar_venta()"""
+        lineas = []
+        for item in carrito_compras:
+            lineas.append({
+                'id_variante': int(item['id_variante']),
+                'cantidad': int(item['cantidad']),
+                'precio': float(item['precio']),
+                'descuento_manual': self._validarDescuentoManual(item)
+            })
+
+        log.info(f"Iniciando venta (función en servidor). Empleado: {id_empleado}, Líneas: {len(lineas)}")
+        resultado = self.ventas_queries.registrarVentaServidor(
+            id_empleado, id_cliente, metodo_pago, lineas, conexion_externa=conn
+        )
+        if not resultado: raise Exception("Error al crear ticket.")
+
+        return resultado[0], float(resultado[1])
+
+    def _registrarVentaEnPython(self, conn, id_empleado, id_cliente, metodo_pago, carrito_compras):
+        """Camino tradicional: ticket, detalles, stock y auditoría como sentencias separadas"""
+        desc_queries = DescuentosQueries()
+
+        total_venta_acumulado = 0.0
+        detalles_para_insertar = [] # Guardamos datos procesados para insertar después
+
+        # 1. Buscar Descuentos Automáticos (Vigentes en BD) de todo el carrito en una sola consulta
+        # Pasamos 'conn' para que la consulta sea rápida dentro de la misma sesión 
+        descuentos_auto = desc_queries.obtenerDescuentosActivos(
+            [item['id_variante'] for item in carrito_compras], conexion_externa=conn
+        )
+        
+        # --- CÁLCULO Y VALIDACIÓN DE PRECIOS ---
+        # Antes de crear el ticket, procesamos cada producto para calcular su precio final real
+        
+        for item in carrito_compras:
+            id_variante = item['id_variante']
+            cantidad = int(item['cantidad'])
+            precio_base = float(item['precio']) # Precio original del producto
+            descuento_manual = float(item.get('descuento_manual', 0)) # % Manual ingresado por usuario
+
+            if cantidad <= 0: continue
+
+            porc_auto = descuentos_auto.get(int(id_variante), 0.0)
+
+            porcentaje_final = 0.0
+            tipo_descuento = "Ninguno"
+
+            if descuento_manual > 0:
+                porcentaje_final = descuento_manual
+                tipo_descuento = "Manual"
+            elif porc_auto > 0:
+                porcentaje_final = porc_auto
+                tipo_descuento = "Automático"
+
+            # Validacion de seguridad: No permitir descuentos > 100% o negativos
+            if porcentaje_final < 0 or porcentaje_final > 100:
+                raise Exception(f"Descuento inválido ({porcentaje_final}%) en producto {id_variante}")
+
+            # 2. Calcular Precio Final Unitario
+            monto_descuento = precio_base * (porcentaje_final / 100)
+            precio_final_unitario = precio_base - monto_descuento
+            
+            subtotal_linea = precio_final_unitario * cantidad
+            total_venta_acumulado += subtotal_linea
+
+            # Guardamos los datos listos para no recalcular abajo
+            detalles_para_insertar.append({
+                'id_variante': id_variante,
+                'cantidad': cantidad,
+                'precio_grabado': precio_final_unitario, # Precio ya con descuento
+                'descuento_grabado': monto_descuento # Dinero descontado por unidad
+            })
+
+        # --- BLOQUEO Y VALIDACIÓN DE STOCK ---
+        # Agrupamos por variante por si se repite en el carrito
+        cantidades_por_variante = {}
+        for det in detalles_para_insertar:
+            id_var = int(det['id_variante'])
+            cantidades_por_variante[id_var] = cantidades_por_variante.get(id_var, 0) + det['cantidad']
+
+        # Bloqueamos las filas en orden de id ANTES de escribir nada y validamos sobre esa foto
+        stock_bloqueado = self.ventas_queries.bloquearVariantes(
+            list(cantidades_por_variante.keys()), conexion_externa=conn
+        )
+        sin_stock = [
+            id_var for id_var, cantidad in sorted(cantidades_por_variante.items())
+            if stock_bloqueado.get(id_var, 0) < cantidad
+        ]
+        if sin_stock:
+            raise Exception(f"Stock insuficiente para variante(s) {', '.join(str(i) for i in sin_stock)}")
+
+        # --- INSERCIÓN EN BD ---
+        
+        log.info(f"Iniciando venta. Empleado: {id_empleado}, Total calc: {total_venta_acumulado}")
+
+        # 1. Crear Ticket
+        id_venta = self.ventas_queries.crearVenta(
+            id_empleado, metodo_pago, total_venta_acumulado, id_cliente, conexion_externa=conn
+        )
+        
+        if not id_venta: raise Exception("Error al crear ticket.")
+
+        # 2. Insertar Detalles (un solo INSERT multi-fila)
+        # Guardamos el precio al que FINALMENTE se vendió
+        self.ventas_queries.registrarDetallesVentaMasivo(
+            id_venta, detalles_para_insertar, conexion_externa=conn
+        )
+
+        # 3. Descontar Stock (un solo UPDATE sobre las filas ya bloqueadas)
+        sin_stock = self.ventas_queries.descontarStockMasivo(
+            cantidades_por_variante, conexion_externa=conn,
+            marcar_fecha_venta=self._fechaUltimaVentaDisponible(conn)
+        )
+        if sin_stock:
+            raise Exception(f"Stock insuficiente para variante(s) {', '.join(str(i) for i in sin_stock)}")
+        
+        # --- 4. AUDITORÍA EN BD ---
+        self.user_queries.registrarLog(
+            id_empleado=id_empleado,
+            accion="VENTA",
+            descripcion=f"Venta ID {id_venta} registrada. Total: ${total_venta_acumulado:.2f}",
+            conexion_externa=conn  # Usamos la misma conexión
+        )
+
+        return id_venta, total_venta_acumulado
+
     def obtenerDescuentoAutomatico(self, id_variante):
         """
         Consulta si existe una oferta vigente para mostrarla en el carrito.
@@ -162,4 +307,15 @@ class SalesController:
         except Exception as e:
             log.error(f"Error consultando descuento: {e}")
             return 0.0
-    
\ No newline at end of file
+
+    def obtenerDescuentosAutomaticos(self, lista_id_variantes):
+        """
+        Igual que obtenerDescuentoAutomatico pero para varias variantes a la vez.
+        Retorna {id_variante: porcentaje}.
+        """
+        try:
+            desc_queries = DescuentosQueries()
+            return desc_queries.obtenerDescuentosActivos(lista_id_variantes)
+        except Exception as e:
+            log.error(f"Error consultando descuentos: {e}")
+            return {}
@@ -1,6 +1,10 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, Toplevel
 from mis_trapitos.logica.cliente_control import CustomerController
+from mis_trapitos.ui.tareas_fondo import TaskGroup
+from mis_trapitos.ui.tabla_virtual import VirtualTable
+from mis_trapitos.ui.puente_cambios import ChangeBridge
+from mis_trapitos.database_conexion.escucha_cambios import CANAL_CLIENTES
 
 class CustomersView(tk.Frame):
     """
@@ -12,10 +16,14 @@ class CustomersView(tk.Frame):
         super().__init__(parent)
         self.usuario = usuario_data
         self.controller = CustomerController()
+        self.tareas = TaskGroup(self) # Consultas fuera del hilo de la interfaz
         
         self._crearInterfaz()
         self.cargarDatosTabla()
 
+        # Altas y bajas de clientes hechas en otra terminal
+        ChangeBridge.obtenerInstancia().suscribir(CANAL_CLIENTES, lambda canal, ids: self.cargarDatosTabla(), widget=self)
+
     def _crearInterfaz(self):
         # BARRA SUPERIOR 
         frame_toolbar = tk.Frame(self, bg="white", pady=10, padx=10)
@@ -49,7 +57,9 @@ class CustomersView(tk.Frame):
         frame_tabla.pack(fill="both", expand=True, padx=10, pady=10)
 
         cols = ("id", "nombre", "telefono", "email", "direccion")
-        self.tree = ttk.Treeview(frame_tabla, columns=cols, show="headings")
+        self.tabla = VirtualTable(frame_tabla, cols) # Páginas por nombre conforme se desplaza
+        self.tabla.pack(fill="both", expand=True)
+        self.tree = self.tabla.tree
         
         self.tree.heading("id", text="ID")
         self.tree.heading("nombre", text="Nombre Completo")
@@ -63,20 +73,8 @@ class CustomersView(tk.Frame):
         self.tree.column("email", width=150)
         self.tree.column("direccion", width=200)
 
-        scrollbar = ttk.Scrollbar(frame_tabla, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.tree.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
     def cargarDatosTabla(self):
-        # Limpiar
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        datos = self.controller.obtenerListaClientes()
-        for row in datos:
-            self.tree.insert("", "end", values=row)
+        self.tabla.cargar(self.controller.obtenerPaginaClientes)
 
     # ACCIONES 
 
@@ -84,30 +82,32 @@ class CustomersView(tk.Frame):
         VentanaAltaCliente(self)
 
     def _verHistorial(self):
-        seleccion = self.tree.selection()
-        if not seleccion:
+        fila = self.tabla.filaSeleccionada() # Aunque se haya desplazado fuera de la vista
+        if not fila:
             messagebox.showwarning("Atención", "Seleccione un cliente para ver su historial.")
             return
             
-        item = self.tree.item(seleccion[0])
-        id_cliente = item['values'][0]
-        nombre_cliente = item['values'][1]
+        id_cliente = fila[0]
+        nombre_cliente = fila[1]
         
         # Obtener historial desde el controlador
-        historial = self.controller.obtenerHistorialCompras(id_cliente)
-        
-        VentanaHistorial(self, nombre_cliente, historial)
+        self.tareas.ejecutar(
+            self.controller.obtenerHistorialCompras, id_cliente,
+            al_terminar=lambda historial: VentanaHistorial(self, nombre_cliente, historial)
+        )
 
     def _accionEliminar(self):
-        seleccion = self.tree.selection()
-        if not seleccion: return
+        fila = self.tabla.filaSeleccionada()
+        if not fila: return
         
         if not messagebox.askyesno("Confirmar", "¿Eliminar este cliente de la base de datos?"): return
 
-        id_cliente = self.tree.item(seleccion[0])['values'][0]
-        
-        exito, msg = self.controller.eliminarCliente(self.usuario['id'], id_cliente)
+        id_cliente = fila[0]
         
+        self.tareas.ejecutar(self.controller.eliminarCliente, self.usuario['id'], id_cliente, al_terminar=self._alEliminar)
+
+    def _alEliminar(self, resultado):
+        exito, msg = resultado
         if exito:
             messagebox.showinfo("Éxito", msg)
             self.cargarDatosTabla()
@@ -124,6 +124,7 @@ class VentanaAltaCliente(Toplevel):
         self.configure(bg="white")
         self.transient(parent_view)
         self.grab_set()
+        self.tareas = TaskGroup(self, "⏳ Guardando...")
         
         self._construirFormulario()
 
@@ -145,7 +146,8 @@ class VentanaAltaCliente(Toplevel):
         tk.Label(frame, text="Dirección:", bg="white").pack(anchor="w")
         self.entry_dir = tk.Entry(frame); self.entry_dir.pack(fill="x", pady=5)
 
-        tk.Button(self, text="GUARDAR", bg="#27AE60", fg="white", command=self._guardar).pack(fill="x", padx=20, pady=20)
+        self.btn_guardar = tk.Button(self, text="GUARDAR", bg="#27AE60", fg="white", command=self._guardar)
+        self.btn_guardar.pack(fill="x", padx=20, pady=20)
 
     def _guardar(self):
         nom = self.entry_nom.get()
@@ -153,16 +155,22 @@ class VentanaAltaCliente(Toplevel):
         email = self.entry_email.get()
         dire = self.entry_dir.get()
         
-        # El controlador maneja logs y validaciones
-        exito, msg = self.view.controller.registrarNuevoCliente(
-            self.view.usuario['id'], nom, dire, email, tel
+        # El controlador maneja logs y validaciones (en segundo plano)
+        self.btn_guardar.config(state="disabled")
+        self.tareas.ejecutar(
+            self.view.controller.registrarNuevoCliente,
+            self.view.usuario['id'], nom, dire, email, tel,
+            al_terminar=self._alGuardar
         )
-        
+
+    def _alGuardar(self, resultado):
+        exito, msg = resultado
         if exito:
             messagebox.showinfo("Éxito", msg)
             self.view.cargarDatosTabla()
             self.destroy()
         else:
+            self.btn_guardar.config(state="normal")
             messagebox.showerror("Error", msg)
 
 # VENTANA MODAL: HISTORIAL 
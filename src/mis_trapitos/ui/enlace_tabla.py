@@ -0,0 +1,89 @@
+## Enlace de una lista de filas a un Treeview: al refrescar solo se toca lo que cambió
+
+
+class TableBinding:
+    """
+    Mantiene un Treeview igual a una lista de filas sin vaciarlo y volverlo a llenar.
+    Cada fila queda ligada a un item por su llave (id_variante, id_cliente, ...): al refrescar
+    solo se borran las que ya no están, se actualizan las que cambiaron y se insertan las nuevas.
+    La selección (va con el item) y el desplazamiento sobreviven al refresco.
+
+    Uso:
+        self.enlace = TableBinding(self.tree, formatear=self._formatearFila)
+        self.enlace.actualizar(filas)
+
+    clave(fila) da la llave (por defecto fila[0]). Si se repite, las copias se distinguen
+    por su número de aparición (reportes sin id, p.ej.).
+    """
+
+    def __init__(self, tree, clave=None, formatear=None):
+        self.tree = tree
+        self.clave = clave or (lambda fila: fila[0])
+        self.formatear = formatear or (lambda fila: fila)
+        self._items = {}  # {llave: (item, valores mostrados)}
+        self._orden = []  # Llaves en el orden del Treeview
+
+    def __len__(self):
+        return len(self._orden)
+
+    def actualizar(self, filas):
+        """
+        Deja el Treeview con 'filas', en ese orden.
+        Retorna: (insertadas, actualizadas, borradas)
+        """
+        nuevas = []
+        apariciones = {}
+        for fila in filas:
+            llave = self.clave(fila)
+            vez = apariciones.get(llave, 0)
+            apariciones[llave] = vez + 1
+            nuevas.append(((llave, vez), tuple(self.formatear(fila))))
+        presentes = {llave for llave, _ in nuevas}
+
+        ancla = self._primeraVisible()
+
+        # 1. Borrar lo que ya no está (en una sola llamada)
+        sobrantes = [llave for llave in self._orden if llave not in presentes]
+        if sobrantes:
+            self.tree.delete(*[self._items.pop(llave)[0] for llave in sobrantes])
+
+        # 2. Reordenar las que siguen, solo si su orden relativo cambió
+        quedan = [llave for llave in self._orden if llave in presentes]
+        esperado = [llave for llave, _ in nuevas if llave in self._items]
+        if quedan != esperado:
+            for posicion, llave in enumerate(esperado):
+                self.tree.move(self._items[llave][0], "", posicion)
+
+        # 3. Actualizar valores e insertar nuevas en orden ascendente: todo lo anterior ya quedó en su lugar
+        insertadas = actualizadas = 0
+        for posicion, (llave, valores) in enumerate(nuevas):
+            actual = self._items.get(llave)
+            if actual is None:
+                self._items[llave] = (self.tree.insert("", posicion, values=valores), valores)
+                insertadas += 1
+            elif actual[1] != valores:
+                self.tree.item(actual[0], values=valores)
+                self._items[llave] = (actual[0], valores)
+                actualizadas += 1
+
+        self._orden = [llave for llave, _ in nuevas]
+        self._restaurarDesplazamiento(ancla)
+        return insertadas, actualizadas, len(sobrantes)
+
+    def limpiar(self):
+        self.actualizar([])
+
+    # --- DESPLAZAMIENTO ---
+
+    def _primeraVisible(self):
+        """Llave de la fila que está arriba del todo, para volver a dejarla ahí."""
+        if not self._orden:
+            return None
+        indice = int(self.tree.yview()[0] * len(self._orden))
+        return self._orden[min(indice, len(self._orden) - 1)]
+
+    def _restaurarDesplazamiento(self, ancla):
+        # Filas nuevas o borradas arriba no deben mover lo que el usuario está viendo
+        if ancla is None or not self._orden or ancla not in self._items:
+            return
+        self.tree.yview_moveto(self._orden.index(ancla) / len(self._orden))
@@ -1,6 +1,10 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, Toplevel
+from tkinter import ttk, messagebox, filedialog, Toplevel
 from mis_trapitos.logica.producto_control import ProductController
+from mis_trapitos.ui.puente_cambios import ChangeBridge
+from mis_trapitos.ui.tareas_fondo import TaskGroup
+from mis_trapitos.ui.tabla_virtual import VirtualTable
+from mis_trapitos.database_conexion.escucha_cambios import CANAL_VARIANTES, CANAL_PRODUCTOS
 
 class InventoryView(tk.Frame):
     """
@@ -12,6 +16,8 @@ class InventoryView(tk.Frame):
         super().__init__(parent)
         self.usuario = usuario_data
         self.controller = ProductController()
+        self.tareas = TaskGroup(self) # Consultas fuera del hilo de la interfaz
+        self._texto_tabla = None # Búsqueda con la que se llenó la tabla (None = aún no se llena)
         
         # Configuración de estilos para la tabla
         self.style = ttk.Style()
@@ -21,6 +27,11 @@ class InventoryView(tk.Frame):
         self._crearInterfaz()
         self.cargarDatosTabla() # Cargar datos al iniciar
 
+        # Cambios hechos en otra terminal (ventas, ediciones) refrescan la tabla solos
+        puente = ChangeBridge.obtenerInstancia()
+        puente.suscribir(CANAL_VARIANTES, lambda canal, ids: self.cargarDatosTabla(), widget=self)
+        puente.suscribir(CANAL_PRODUCTOS, lambda canal, ids: self.cargarDatosTabla(), widget=self)
+
     def _crearInterfaz(self):
         """Construye la barra de herramientas y la tabla de datos"""
         
@@ -54,6 +65,30 @@ class InventoryView(tk.Frame):
         )
         btn_refresh.pack(side="left", padx=5)
 
+        # Botón Importar (colección completa desde CSV/TSV)
+        tk.Button(
+            frame_toolbar, 
+            text="📥 Importar", 
+            bg="#16A085", fg="white", font=("Segoe UI", 10, "bold"),
+            command=self._accionImportar
+        ).pack(side="left", padx=5)
+
+        # Botón Entrada de mercancía (resurtido desde el archivo del proveedor)
+        tk.Button(
+            frame_toolbar, 
+            text="📦 Entrada", 
+            bg="#D35400", fg="white", font=("Segoe UI", 10, "bold"),
+            command=self._accionEntrada
+        ).pack(side="left", padx=5)
+
+        # Botón Cambio masivo de precios (por categoría, proveedor o rango)
+        tk.Button(
+            frame_toolbar, 
+            text="💲 Precios", 
+            bg="#7F8C8D", fg="white", font=("Segoe UI", 10, "bold"),
+            command=lambda: VentanaCambioPrecios(self)
+        ).pack(side="left", padx=5)
+
         # BOTON ASIGNAR PROVEEDOR
         tk.Button(
             frame_toolbar, 
@@ -85,13 +120,23 @@ class InventoryView(tk.Frame):
             command=self._accionEliminar
         ).pack(side="left", padx=5)
 
+        # BUSCADOR (descripción, talla, color o categoría; Enter para buscar, vacío = todo)
+        tk.Button(frame_toolbar, text="Buscar", bg="#34495E", fg="white", command=self.cargarDatosTabla).pack(side="right", padx=5)
+        self.entry_buscar = tk.Entry(frame_toolbar, font=("Segoe UI", 10), width=25)
+        self.entry_buscar.pack(side="right")
+        self.entry_buscar.bind("<Return>", lambda e: self.cargarDatosTabla())
+        tk.Label(frame_toolbar, text="🔍", bg="white").pack(side="right")
+
         # --- 2. TABLA DE DATOS (Treeview) ---
         frame_tabla = tk.Frame(self)
         frame_tabla.pack(fill="both", expand=True, padx=10, pady=10)
 
         # Definición de columnas
         columnas = ("id_var", "id", "producto", "talla", "color", "stock", "precio") 
-        self.tree = ttk.Treeview(frame_tabla, columns=columnas, show="headings")
+        # Solo se dibujan las filas visibles; el resto se pide por páginas al desplazarse
+        self.tabla = VirtualTable(frame_tabla, columnas, formatear=self._formatearFila)
+        self.tabla.pack(fill="both", expand=True)
+        self.tree = self.tabla.tree
         # ID 
         self.tree.heading("id", text="ID")
         self.tree.column("id", width=40, anchor="center")
@@ -110,46 +155,44 @@ class InventoryView(tk.Frame):
         self.tree.column("stock", width=80, anchor="center")
         self.tree.column("precio", width=100, anchor="e") # Alineado a la derecha
 
-        # Scrollbar vertical
-        scrollbar = ttk.Scrollbar(frame_tabla, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.tree.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
     def cargarDatosTabla(self):
-        # 1. Limpiar tabla
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        # 2. Obtener datos 
-        datos = self.controller.obtenerCatalogo()
-        
-        # 3. Configurar qué columnas se ven y cuáles se ocultan
         # Ocultamos "id_var" y "id_prod"
         self.tree["displaycolumns"] = ("producto", "talla", "color", "stock", "precio")
-        
-        # 4. Llenar filas
-        for fila in datos:
-            # fila = (id_var, id_prod, desc, talla, color, stock, precio)
-            fila_visual = list(fila)
-            
-            # Formatear precio 
-            fila_visual[6] = f"${fila[6]:.2f}" 
-            
-            self.tree.insert("", "end", values=fila_visual)
+
+        texto = self.entry_buscar.get().strip()
+        if texto == self._texto_tabla:
+            self.tabla.refrescar() # Misma lista: solo cambia lo distinto, sin perder posición ni selección
+            return
+        self._texto_tabla = texto
+
+        # Con texto se pagina la búsqueda (ordenada por parecido); sin texto, el inventario por llave
+        if texto:
+            self.tabla.cargar(lambda ultima, limite: self._paginaBusqueda(texto, ultima, limite))
+        else:
+            self.tabla.cargar(self.controller.obtenerPaginaCatalogo)
+
+    def _paginaBusqueda(self, texto, ultima, limite):
+        # La búsqueda se pagina por número de página: se calcula con lo que ya hay en la tabla
+        pagina = 0 if ultima is None else len(self.tabla) // limite
+        return self.controller.buscarCatalogo(texto, pagina, limite)[0]
+
+    def _formatearFila(self, fila):
+        # fila = (id_var, id_prod, desc, talla, color, stock, precio)
+        fila_visual = list(fila)
+        fila_visual[6] = f"${fila[6]:.2f}"
+        return fila_visual
 
     # LÓGICA DEL FORMULARIO DE ALTA 
     def _abrirModalVincular(self):
         """Abre el modal para relacionar un producto con un proveedor"""
-        seleccion = self.tree.selection()
-        if not seleccion:
+        fila = self.tabla.filaSeleccionada() # Aunque se haya desplazado fuera de la vista
+        if not fila:
             messagebox.showwarning("Atención", "Seleccione un producto de la tabla primero.")
             return
 
         # Obtenemos datos del producto seleccionado
-        item_id = self.tree.item(seleccion[0])['values'][1] # ID Producto
-        desc_prod = self.tree.item(seleccion[0])['values'][2] # Descripción
+        item_id = fila[1] # ID Producto
+        desc_prod = fila[2] # Descripción
         
         VentanaVincularProveedor(self, item_id, desc_prod)
 
@@ -158,15 +201,14 @@ class InventoryView(tk.Frame):
         VentanaAltaProducto(self)
 
     def _abrirModalOferta(self):
-        seleccion = self.tree.selection()
-        if not seleccion:
+        valores = self.tabla.filaSeleccionada()
+        if not valores:
             messagebox.showwarning("Atención", "Seleccione un producto para aplicarle descuento.")
             return
 
         # Obtenemos datos del producto seleccionado
         # Recordando que el query actualizado devuelve:
         # (id_variante, id_producto, desc, talla, color, stock, precio)
-        valores = self.tree.item(seleccion[0])['values']
         
         id_producto = valores[1] # El ID del producto padre
         nombre_prod = valores[2]
@@ -174,22 +216,17 @@ class InventoryView(tk.Frame):
         VentanaCrearOferta(self, id_producto, nombre_prod)
 
     def _abrirModalEdicion(self):
-        seleccion = self.tree.selection()
-        if not seleccion:
+        # Fila sin formato: (id_variante, id_producto, desc, talla, color, stock, precio)
+        valores = self.tabla.filaSeleccionada()
+        if not valores:
             messagebox.showwarning("Atención", "Seleccione un producto para editar.")
             return
 
-        # Obtenemos datos actuales de la fila seleccionada
-        # values = (id, desc, talla, color, stock, precio_fmt)
-        valores = self.tree.item(seleccion[0])['values']
-        
-        id_prod = valores[0]
-        desc = valores[1]
         VentanaEdicionProducto(self, valores)
 
     def _accionEliminar(self):
-        seleccion = self.tree.selection()
-        if not seleccion:
+        valores = self.tabla.filaSeleccionada()
+        if not valores:
             messagebox.showwarning("Atención", "Seleccione un producto para eliminar.")
             return
 
@@ -198,26 +235,70 @@ class InventoryView(tk.Frame):
             return
 
         # Obtener ID (Recordando el ajuste de columnas: id_var, id_prod...)
-        valores = self.tree.item(seleccion[0])['values']
         id_producto = valores[1] # ID del producto padre
 
-        exito, msg = self.controller.eliminarProducto(self.usuario['id'], id_producto)
-        
+        self.tareas.ejecutar(self.controller.eliminarProducto, self.usuario['id'], id_producto, al_terminar=self._alEliminar)
+
+    def _alEliminar(self, resultado):
+        exito, msg = resultado
         if exito:
             messagebox.showinfo("Éxito", msg)
             self.cargarDatosTabla()
         else:
             messagebox.showerror("Error", msg)
 
+    def _accionImportar(self):
+        ruta = filedialog.askopenfilename(
+            title="Importar catálogo",
+            filetypes=[("CSV / TSV", "*.csv *.tsv *.txt"), ("Todos", "*.*")]
+        )
+        if not ruta:
+            return
+        if not messagebox.askyesno(
+            "Confirmar Importación",
+            "Se darán de alta o actualizarán los productos del archivo.\n"
+            "Columnas: categoria, descripcion, precio, talla, color, stock (stock final de cada variante).\n¿Continuar?"
+        ):
+            return
+        self.tareas.ejecutar(
+            self.controller.importarCatalogo, self.usuario['id'], ruta,
+            al_terminar=self._alTerminarCarga, clave="importar"
+        )
+
+    def _alTerminarCarga(self, resultado):
+        exito, msg = resultado
+        if exito:
+            messagebox.showinfo("Carga masiva", msg)
+            self.cargarDatosTabla()
+        else:
+            messagebox.showerror("Error", msg)
+
+    def _accionEntrada(self):
+        ruta = filedialog.askopenfilename(
+            title="Entrada de mercancía",
+            filetypes=[("CSV / TSV", "*.csv *.tsv *.txt"), ("Todos", "*.*")]
+        )
+        if not ruta:
+            return
+        if not messagebox.askyesno(
+            "Confirmar Entrada",
+            "Se SUMARÁ al stock la cantidad recibida de cada variante.\n"
+            "Columnas: id_variante (o sku), cantidad, proveedor (ID o nombre).\n¿Continuar?"
+        ):
+            return
+        self.tareas.ejecutar(
+            self.controller.registrarEntregaProveedor, self.usuario['id'], ruta,
+            al_terminar=self._alTerminarCarga, clave="entrada"
+        )
+
     def _abrirModalVerProveedores(self):
         """Abre una ventana que lista los proveedores del producto seleccionado"""
-        seleccion = self.tree.selection()
-        if not seleccion:
+        item_data = self.tabla.filaSeleccionada()
+        if not item_data:
             messagebox.showwarning("Atención", "Seleccione un producto para ver sus proveedores.")
             return
 
         # Obtenemos el ID del producto 
-        item_data = self.tree.item(seleccion[0])['values']
         id_producto = item_data[1] 
         nombre_producto = item_data[2]
         
@@ -232,6 +313,7 @@ class VentanaAltaProducto(Toplevel):
         self.view = parent_view # Referencia a la vista principal para refrescarla
         self.title("Nuevo Producto")
         self.geometry("400x550")
+        self.tareas = TaskGroup(self, "⏳ Guardando...")
         self.configure(bg="white")
         
         # Hacemos que la ventana sea modal (bloquea la de atrás)
@@ -276,11 +358,12 @@ class VentanaAltaProducto(Toplevel):
         self.entry_stock.pack(fill="x")
 
         # Botón Guardar
-        tk.Button(
+        self.btn_guardar = tk.Button(
             self, text="GUARDAR PRODUCTO", 
             bg="#2980B9", fg="white", font=("Segoe UI", 10, "bold"),
             pady=10, command=self._guardar
-        ).pack(fill="x", padx=20, pady=20)
+        )
+        self.btn_guardar.pack(fill="x", padx=20, pady=20)
 
     def _guardar(self):
         # 1. Recolección de datos
@@ -296,6 +379,22 @@ class VentanaAltaProducto(Toplevel):
         # Aquí intentamos crearla primero.
         id_empleado = self.view.usuario['id'] # Obtenemos el ID del usuario logueado
         
+        # B. Preparar variante
+        lista_variantes = [{
+            'talla': talla,
+            'color': color,
+            'stock': stock
+        }]
+
+        # Todo lo que va a la BD corre en segundo plano; el botón se bloquea para no duplicar el alta
+        self.btn_guardar.config(state="disabled")
+        self.tareas.ejecutar(
+            self._registrarEnBD, id_empleado, cat_nombre, desc, precio, lista_variantes,
+            al_terminar=self._alGuardar
+        )
+
+    def _registrarEnBD(self, id_empleado, cat_nombre, desc, precio, lista_variantes):
+        """Corre en un hilo de trabajo: NO toca widgets."""
         # Instancia temporal del controlador para esta ventana
         ctrl = self.view.controller 
         
@@ -308,24 +407,19 @@ class VentanaAltaProducto(Toplevel):
         id_cat = next((c[0] for c in cats if c[1].lower() == cat_nombre.lower()), None)
         
         if not id_cat:
-            messagebox.showerror("Error", "No se pudo gestionar la categoría.")
-            return
-
-        # B. Preparar variante
-        lista_variantes = [{
-            'talla': talla,
-            'color': color,
-            'stock': stock
-        }]
+            return False, "No se pudo gestionar la categoría."
 
         # C. Guardar Producto
-        exito, msg = ctrl.registrarProductoNuevo(id_empleado, id_cat, desc, precio, lista_variantes)
+        return ctrl.registrarProductoNuevo(id_empleado, id_cat, desc, precio, lista_variantes)
 
+    def _alGuardar(self, resultado):
+        exito, msg = resultado
         if exito:
             messagebox.showinfo("Éxito", msg)
             self.view.cargarDatosTabla() # Refrescar la tabla de atrás
             self.destroy() # Cerrar ventana modal
         else:
+            self.btn_guardar.config(state="normal")
             messagebox.showerror("Error", msg)
 
 from datetime import datetime, timedelta
@@ -340,6 +434,7 @@ class VentanaCrearOferta(Toplevel):
         self.configure(bg="white")
         self.transient(parent_view)
         self.grab_set()
+        self.tareas = TaskGroup(self, "⏳ Guardando...")
 
         self._construirFormulario(nombre_producto)
 
@@ -371,11 +466,12 @@ class VentanaCrearOferta(Toplevel):
         
         tk.Label(frame, text="* El descuento se aplicará automáticamente en caja.", bg="white", fg="#E67E22", font=("Segoe UI", 8)).pack()
 
-        tk.Button(
+        self.btn_guardar = tk.Button(
             self, text="ACTIVAR OFERTA", 
             bg="#E67E22", fg="white", font=("Segoe UI", 10, "bold"),
             pady=10, command=self._guardar
-        ).pack(fill="x", padx=20, pady=20)
+        )
+        self.btn_guardar.pack(fill="x", padx=20, pady=20)
 
     def _guardar(self):
         porc = self.entry_porc.get()
@@ -383,14 +479,20 @@ class VentanaCrearOferta(Toplevel):
         fin = self.entry_fin.get()
         
         # Llamamos al ProductController (que ya tiene el método agregarOferta)
-        exito, msg = self.view.controller.agregarOferta(
-            self.id_producto, porc, ini, fin
+        self.btn_guardar.config(state="disabled")
+        self.tareas.ejecutar(
+            self.view.controller.agregarOferta,
+            self.id_producto, porc, ini, fin,
+            al_terminar=self._alGuardar
         )
-        
+
+    def _alGuardar(self, resultado):
+        exito, msg = resultado
         if exito:
             messagebox.showinfo("Oferta Creada", msg)
             self.destroy()
         else:
+            self.btn_guardar.config(state="normal")
             messagebox.showerror("Error", msg)
 
 class VentanaVincularProveedor(Toplevel):
@@ -404,6 +506,7 @@ class VentanaVincularProveedor(Toplevel):
         self.configure(bg="white")
         self.transient(parent_view)
         self.grab_set()
+        self.tareas = TaskGroup(self)
         
         self.lista_provs = [] # Para guardar (id, nombre)
         self._construirFormulario(nombre_producto)
@@ -414,20 +517,23 @@ class VentanaVincularProveedor(Toplevel):
 
         tk.Label(self, text="Seleccione Proveedor:", bg="white").pack(anchor="w", padx=20, pady=(20, 5))
         
-        # Obtener lista de proveedores del controlador
-        raw_provs = self.view.controller.obtenerListaProveedores()
-        # raw_provs = [(id, nombre, contacto), ...]
-        self.lista_provs = raw_provs
-        nombres = [f"{p[1]} (ID: {p[0]})" for p in raw_provs]
-        
-        self.combo_prov = ttk.Combobox(self, values=nombres, state="readonly", width=40)
+        self.combo_prov = ttk.Combobox(self, values=[], state="readonly", width=40)
         self.combo_prov.pack(padx=20)
 
-        tk.Button(
+        self.btn_guardar = tk.Button(
             self, text="VINCULAR", 
             bg="#F39C12", fg="white", font=("Segoe UI", 10, "bold"),
             pady=10, command=self._guardar
-        ).pack(fill="x", padx=40, pady=30)
+        )
+        self.btn_guardar.pack(fill="x", padx=40, pady=30)
+
+        # Obtener lista de proveedores del controlador (en segundo plano)
+        self.tareas.ejecutar(self.view.controller.obtenerListaProveedores, al_terminar=self._llenarCombo)
+
+    def _llenarCombo(self, raw_provs):
+        # raw_provs = [(id, nombre, contacto), ...]
+        self.lista_provs = raw_provs
+        self.combo_prov['values'] = [f"{p[1]} (ID: {p[0]})" for p in raw_provs]
 
     def _guardar(self):
         idx = self.combo_prov.current()
@@ -438,16 +544,22 @@ class VentanaVincularProveedor(Toplevel):
         id_proveedor = self.lista_provs[idx][0]
         
         # Llamamos al controlador
-        exito, msg = self.view.controller.vincularProductoAProveedor(
+        self.btn_guardar.config(state="disabled")
+        self.tareas.ejecutar(
+            self.view.controller.vincularProductoAProveedor,
             self.view.usuario['id'],
             id_proveedor,
-            self.id_producto
+            self.id_producto,
+            al_terminar=self._alGuardar
         )
-        
+
+    def _alGuardar(self, resultado):
+        exito, msg = resultado
         if exito:
             messagebox.showinfo("Éxito", msg)
             self.destroy()
         else:
+            self.btn_guardar.config(state="normal")
             messagebox.showerror("Error", msg)
     
 class VentanaListaProveedores(Toplevel):
@@ -460,6 +572,7 @@ class VentanaListaProveedores(Toplevel):
         self.title(f"Proveedores de: {nombre_producto}")
         self.geometry("500x300")
         self.configure(bg="white")
+        self.tareas = TaskGroup(self)
         
         # UI Limpia
         tk.Label(
@@ -495,8 +608,9 @@ class VentanaListaProveedores(Toplevel):
     def _cargarDatos(self, id_producto):
         """Consulta al controlador quiénes son los proveedores"""
         # Usamos el método que ya existe en ProductController
-        lista = self.view.controller.obtenerProveedoresDeProducto(id_producto)
-        
+        self.tareas.ejecutar(self.view.controller.obtenerProveedoresDeProducto, id_producto, al_terminar=self._llenarTabla)
+
+    def _llenarTabla(self, lista):
         if not lista:
             # Si la lista está vacía, mostramos un aviso en la tabla
             self.tree.insert("", "end", values=("(Sin proveedores asignados)", "-"))
@@ -514,6 +628,7 @@ class VentanaEdicionProducto(Toplevel):
         self.title("Editar Producto / Resurtir")
         self.geometry("350x400")
         self.configure(bg="white")
+        self.tareas = TaskGroup(self, "⏳ Guardando...")
         
         # Desempaquetar datos (según el query nuevo)
         self.id_variante = valores_fila[0]
@@ -522,7 +637,7 @@ class VentanaEdicionProducto(Toplevel):
         talla = valores_fila[3]
         color = valores_fila[4]
         stock_actual = valores_fila[5]
-        precio_actual_str = valores_fila[6].replace("$", "")
+        precio_actual_str = f"{valores_fila[6]:.2f}"
 
         tk.Label(self, text="Editar Inventario", font=("Segoe UI", 14, "bold"), bg="white").pack(pady=10)
         tk.Label(self, text=f"{desc}\n({talla} / {color})", bg="white", fg="gray").pack()
@@ -542,27 +657,173 @@ class VentanaEdicionProducto(Toplevel):
         self.entry_stock.insert(0, str(stock_actual))
         self.entry_stock.pack(fill="x", pady=(0, 15))
 
-        tk.Button(
+        self.btn_guardar = tk.Button(
             self, text="GUARDAR CAMBIOS", 
             bg="#2980B9", fg="white", font=("Segoe UI", 10, "bold"),
             pady=10, command=self._guardar
-        ).pack(fill="x", padx=20, pady=10)
+        )
+        self.btn_guardar.pack(fill="x", padx=20, pady=10)
 
     def _guardar(self):
         nuevo_precio = self.entry_precio.get()
         nuevo_stock = self.entry_stock.get()
         
-        exito, msg = self.view.controller.actualizarProductoExistente(
+        self.btn_guardar.config(state="disabled")
+        self.tareas.ejecutar(
+            self.view.controller.actualizarProductoExistente,
             self.view.usuario['id'],
             self.id_producto,
             self.id_variante,
             nuevo_precio,
-            nuevo_stock
+            nuevo_stock,
+            al_terminar=self._alGuardar
         )
-        
+
+    def _alGuardar(self, resultado):
+        exito, msg = resultado
         if exito:
             messagebox.showinfo("Éxito", msg)
             self.view.cargarDatosTabla()
             self.destroy()
         else:
-            messagebox.showerror("Error", msg)
\ No newline at end of file
+            self.btn_guardar.config(state="normal")
+            messagebox.showerror("Error", msg)
+
+
+class VentanaCambioPrecios(Toplevel):
+    """
+    Sube o baja el precio base de muchos productos a la vez (por %, o por monto fijo),
+    filtrando por categoría, proveedor y/o rango de precio. Primero se ve cuántos productos
+    cambian; "APLICAR" solo se habilita con la vista previa de lo que está capturado.
+    """
+
+    def __init__(self, parent_view):
+        super().__init__(parent_view)
+        self.view = parent_view
+        self.title("Cambio Masivo de Precios")
+        self.geometry("420x560")
+        self.configure(bg="white")
+        self.transient(parent_view)
+        self.grab_set()
+        self.tareas = TaskGroup(self)
+
+        self.lista_cats = []  # (id, nombre)
+        self.lista_provs = [] # (id, nombre, contacto)
+        self._previsto = None # Parámetros de la última vista previa válida
+        self._construirFormulario()
+
+        self.tareas.ejecutar(self.view.controller.obtenerListaCategorias, al_terminar=self._llenarCategorias)
+        self.tareas.ejecutar(self.view.controller.obtenerListaProveedores, al_terminar=self._llenarProveedores)
+
+    def _construirFormulario(self):
+        tk.Label(self, text="Cambio Masivo de Precios", font=("Segoe UI", 14, "bold"), bg="white").pack(pady=10)
+
+        frame = tk.Frame(self, bg="white", padx=20)
+        frame.pack(fill="both", expand=True)
+
+        # Filtros
+        tk.Label(frame, text="Categoría:", bg="white").pack(anchor="w")
+        self.combo_cat = ttk.Combobox(frame, values=["(Todas)"], state="readonly")
+        self.combo_cat.current(0)
+        self.combo_cat.pack(fill="x", pady=(0, 10))
+
+        tk.Label(frame, text="Proveedor:", bg="white").pack(anchor="w")
+        self.combo_prov = ttk.Combobox(frame, values=["(Todos)"], state="readonly")
+        self.combo_prov.current(0)
+        self.combo_prov.pack(fill="x", pady=(0, 10))
+
+        tk.Label(frame, text="Precio actual entre (vacío = sin límite):", bg="white").pack(anchor="w")
+        frame_rango = tk.Frame(frame, bg="white")
+        frame_rango.pack(fill="x", pady=(0, 10))
+        self.entry_min = tk.Entry(frame_rango, width=12)
+        self.entry_min.pack(side="left")
+        tk.Label(frame_rango, text="  y  ", bg="white").pack(side="left")
+        self.entry_max = tk.Entry(frame_rango, width=12)
+        self.entry_max.pack(side="left")
+
+        # Cambio
+        tk.Label(frame, text="--- Cambio ---", bg="white", fg="#7F8C8D").pack(pady=5)
+        self.var_modo = tk.StringVar(value="porcentaje")
+        tk.Radiobutton(frame, text="Porcentaje (%)", variable=self.var_modo, value="porcentaje", bg="white").pack(anchor="w")
+        tk.Radiobutton(frame, text="Monto fijo ($)", variable=self.var_modo, value="monto", bg="white").pack(anchor="w")
+
+        tk.Label(frame, text="Valor (negativo para bajar, ej. -15):", bg="white").pack(anchor="w", pady=(10, 0))
+        self.entry_valor = tk.Entry(frame, font=("Segoe UI", 12))
+        self.entry_valor.pack(fill="x")
+
+        self.lbl_vista = tk.Label(frame, text="", bg="white", fg="#2C3E50", justify="left", wraplength=360)
+        self.lbl_vista.pack(anchor="w", pady=10)
+
+        frame_botones = tk.Frame(self, bg="white")
+        frame_botones.pack(fill="x", padx=20, pady=15)
+        self.btn_vista = tk.Button(
+            frame_botones, text="VISTA PREVIA",
+            bg="#34495E", fg="white", font=("Segoe UI", 10, "bold"),
+            pady=8, command=self._previsualizar
+        )
+        self.btn_vista.pack(side="left", fill="x", expand=True, padx=(0, 5))
+        self.btn_aplicar = tk.Button(
+            frame_botones, text="APLICAR",
+            bg="#C0392B", fg="white", font=("Segoe UI", 10, "bold"),
+            pady=8, state="disabled", command=self._aplicar
+        )
+        self.btn_aplicar.pack(side="left", fill="x", expand=True, padx=(5, 0))
+
+    def _llenarCategorias(self, cats):
+        self.lista_cats = cats
+        self.combo_cat['values'] = ["(Todas)"] + [c[1] for c in cats]
+
+    def _llenarProveedores(self, provs):
+        self.lista_provs = provs
+        self.combo_prov['values'] = ["(Todos)"] + [f"{p[1]} (ID: {p[0]})" for p in provs]
+
+    def _parametros(self):
+        """(modo, valor, id_categoria, id_proveedor, precio_min, precio_max) de lo capturado."""
+        idx_cat = self.combo_cat.current()
+        idx_prov = self.combo_prov.current()
+        id_categoria = self.lista_cats[idx_cat - 1][0] if idx_cat > 0 else None
+        id_proveedor = self.lista_provs[idx_prov - 1][0] if idx_prov > 0 else None
+        return (
+            self.var_modo.get(), self.entry_valor.get().strip(), id_categoria, id_proveedor,
+            self.entry_min.get().strip(), self.entry_max.get().strip()
+        )
+
+    def _previsualizar(self):
+        parametros = self._parametros()
+        self.btn_aplicar.config(state="disabled")
+        self.tareas.ejecutar(
+            self.view.controller.previsualizarCambioPrecios, *parametros,
+            al_terminar=lambda resultado: self._alPrevisualizar(parametros, resultado), clave="vista"
+        )
+
+    def _alPrevisualizar(self, parametros, resultado):
+        exito, msg = resultado
+        self.lbl_vista.config(text=msg, fg="#2C3E50" if exito else "#C0392B")
+        self._previsto = parametros if exito else None
+        if exito:
+            self.btn_aplicar.config(state="normal")
+
+    def _aplicar(self):
+        parametros = self._parametros()
+        if parametros != self._previsto:
+            messagebox.showwarning("Atención", "Los datos cambiaron desde la vista previa. Vuelva a previsualizar.")
+            self.btn_aplicar.config(state="disabled")
+            return
+        if not messagebox.askyesno("Confirmar Cambio", f"{self.lbl_vista.cget('text')}\n\n¿Aplicar el cambio de precios?"):
+            return
+        self.btn_aplicar.config(state="disabled")
+        self.btn_vista.config(state="disabled")
+        self.tareas.ejecutar(
+            self.view.controller.aplicarCambioPrecios, self.view.usuario['id'], *parametros,
+            al_terminar=self._alAplicar
+        )
+
+    def _alAplicar(self, resultado):
+        exito, msg = resultado
+        if exito:
+            messagebox.showinfo("Éxito", msg)
+            self.view.cargarDatosTabla()
+            self.destroy()
+        else:
+            self.btn_vista.config(state="normal")
+            messagebox.showerror("Error", msg)
@@ -114,6 +114,7 @@ class MainWindow(tk.Frame):
         Lógica para intercambiar los Frames en el área de contenido.
         """
         # 1. Limpiar contenido actual
+        # (al destruirse, cada vista cancela sus tareas en segundo plano pendientes: ver TaskGroup)
         for widget in self.frame_contenido.winfo_children():
             widget.destroy() 
         
@@ -1,6 +1,8 @@
 import tkinter as tk
-from tkinter import ttk, messagebox, Toplevel
+from tkinter import messagebox, Toplevel
 from mis_trapitos.logica.producto_control import ProductController
+from mis_trapitos.ui.tareas_fondo import TaskGroup
+from mis_trapitos.ui.tabla_virtual import VirtualTable
 
 class SuppliersView(tk.Frame):
     """
@@ -13,6 +15,7 @@ class SuppliersView(tk.Frame):
         self.usuario = usuario_data
         # Usamos ProductController porque ahí pusimos la lógica de proveedores
         self.controller = ProductController()
+        self.tareas = TaskGroup(self) # Consultas fuera del hilo de la interfaz
         
         self._crearInterfaz()
         self.cargarDatosTabla()
@@ -44,7 +47,9 @@ class SuppliersView(tk.Frame):
         frame_tabla.pack(fill="both", expand=True, padx=10, pady=10)
 
         cols = ("id", "nombre", "contacto")
-        self.tree = ttk.Treeview(frame_tabla, columns=cols, show="headings")
+        self.tabla = VirtualTable(frame_tabla, cols)
+        self.tabla.pack(fill="both", expand=True)
+        self.tree = self.tabla.tree
         
         self.tree.heading("id", text="ID")
         self.tree.heading("nombre", text="Nombre del Proveedor")
@@ -54,37 +59,25 @@ class SuppliersView(tk.Frame):
         self.tree.column("nombre", width=250)
         self.tree.column("contacto", width=400)
 
-        scrollbar = ttk.Scrollbar(frame_tabla, orient="vertical", command=self.tree.yview)
-        self.tree.configure(yscrollcommand=scrollbar.set)
-        
-        self.tree.pack(side="left", fill="both", expand=True)
-        scrollbar.pack(side="right", fill="y")
-
     def cargarDatosTabla(self):
-        # Limpiar tabla
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        # Obtener datos desde el controlador
-        datos = self.controller.obtenerListaProveedores()
-        
-        for row in datos:
-            # row = (id, nombre, contacto)
-            self.tree.insert("", "end", values=row)
+        # row = (id, nombre, contacto), por páginas en segundo plano
+        self.tabla.cargar(self.controller.obtenerPaginaProveedores)
 
     def _abrirModalNuevo(self):
         VentanaAltaProveedor(self)
 
     def _accionEliminar(self):
-        seleccion = self.tree.selection()
-        if not seleccion: return
+        fila = self.tabla.filaSeleccionada() # Aunque se haya desplazado fuera de la vista
+        if not fila: return
         
         if not messagebox.askyesno("Confirmar", "¿Eliminar este proveedor?\nSe desvinculará de los productos asociados"): return
 
-        id_prov = self.tree.item(seleccion[0])['values'][0]
-        
-        exito, msg = self.controller.eliminarProveedor(self.usuario['id'], id_prov)
+        id_prov = fila[0]
         
+        self.tareas.ejecutar(self.controller.eliminarProveedor, self.usuario['id'], id_prov, al_terminar=self._alEliminar)
+
+    def _alEliminar(self, resultado):
+        exito, msg = resultado
         if exito:
             messagebox.showinfo("Éxito", msg)
             self.cargarDatosTabla()
@@ -101,6 +94,7 @@ class VentanaAltaProveedor(Toplevel):
         self.configure(bg="white")
         self.transient(parent_view)
         self.grab_set()
+        self.tareas = TaskGroup(self, "⏳ Guardando...")
         
         self._construirFormulario()
 
@@ -118,11 +112,12 @@ class VentanaAltaProveedor(Toplevel):
         self.entry_cont = tk.Entry(frame, font=("Segoe UI", 10))
         self.entry_cont.pack(fill="x", pady=(0, 10))
 
-        tk.Button(
+        self.btn_guardar = tk.Button(
             self, text="GUARDAR PROVEEDOR", 
             bg="#2980B9", fg="white", font=("Segoe UI", 10, "bold"),
             pady=10, command=self._guardar
-        ).pack(fill="x", padx=20, pady=20)
+        )
+        self.btn_guardar.pack(fill="x", padx=20, pady=20)
 
 
     def _guardar(self):
@@ -133,16 +128,22 @@ class VentanaAltaProveedor(Toplevel):
             messagebox.showwarning("Atención", "El nombre es obligatorio.")
             return
 
-        # Llamada al controlador
-        exito, msg = self.view.controller.registrarProveedor(
+        # Llamada al controlador (en segundo plano; el botón se bloquea para no duplicar el alta)
+        self.btn_guardar.config(state="disabled")
+        self.tareas.ejecutar(
+            self.view.controller.registrarProveedor,
             self.view.usuario['id'], # ID empleado para el Log
             nom, 
-            contacto
+            contacto,
+            al_terminar=self._alGuardar
         )
-        
+
+    def _alGuardar(self, resultado):
+        exito, msg = resultado
         if exito:
             messagebox.showinfo("Éxito", msg)
             self.view.cargarDatosTabla()
             self.destroy()
         else:
+            self.btn_guardar.config(state="normal")
             messagebox.showerror("Error", msg)
\ No newline at end of file
@@ -0,0 +1,131 @@
+## Puente entre la escucha de cambios (hilo) y las vistas de Tkinter
+
+import os
+import queue
+from mis_trapitos.database_conexion.escucha_cambios import (
+    ChangeListener, CANAL_VARIANTES, CANAL_PRODUCTOS, CANAL_DESCUENTOS, OPERACION_RECONEXION
+)
+from mis_trapitos.logica.cache_catalogo import CatalogCache
+from mis_trapitos.logica.generador_reporte import ReportGenerator
+from mis_trapitos.core.logger import log
+
+class ChangeBridge:
+    """
+    Recibe los avisos de ChangeListener, invalida los caches en el momento y
+    reparte los avisos a las vistas suscritas DENTRO del ciclo de eventos de Tk
+    (Tkinter no se puede tocar desde otro hilo).
+
+    Uso en una vista:
+        ChangeBridge.obtenerInstancia().suscribir(CANAL_CLIENTES, self._alCambiarClientes, widget=self)
+    El callback recibe (canal, ids) donde ids es un set, o None si hay que recargar todo.
+    La suscripción se quita sola cuando se destruye 'widget'.
+    """
+
+    _instancia = None
+
+    @classmethod
+    def obtenerInstancia(cls):
+        if cls._instancia is None:
+            cls._instancia = cls()
+        return cls._instancia
+
+    def __init__(self):
+        self.intervalo_ms = int(os.getenv('CAMBIOS_INTERVALO_MS', '250'))
+        self.activo = os.getenv('CAMBIOS_ESCUCHAR', '1') != '0'
+        self._avisos = queue.Queue()
+        self._suscripciones = {} # {canal: [(callback, widget), ...]}
+        self._escucha = None
+        self._root = None
+        self._id_after = None
+
+    # --- CICLO DE VIDA ---
+
+    def iniciar(self, root):
+        """Arranca el hilo de escucha y el vaciado periódico de la cola en el hilo de Tk."""
+        if not self.activo or self._escucha:
+            return
+        self._root = root
+        self._escucha = ChangeListener(self._alRecibirAviso)
+        self._escucha.start()
+        self._programarVaciado()
+        log.info("Escucha de cambios entre terminales iniciada.")
+
+    def detener(self):
+        if self._escucha:
+            self._escucha.detener()
+            self._escucha = None
+        if self._root and self._id_after:
+            try:
+                self._root.after_cancel(self._id_after)
+            except Exception:
+                pass # La ventana ya se destruyó
+        self._id_after = None
+
+    # --- SUSCRIPCIONES ---
+
+    def suscribir(self, canal, callback, widget=None):
+        self._suscripciones.setdefault(canal, []).append((callback, widget))
+        if widget is not None:
+            widget.bind("<Destroy>", lambda e, w=widget: self._alDestruirWidget(e, w), add="+")
+
+    def desuscribir(self, callback):
+        for canal, lista in self._suscripciones.items():
+            self._suscripciones[canal] = [(cb, w) for cb, w in lista if cb != callback]
+
+    def _alDestruirWidget(self, evento, widget):
+        # <Destroy> también llega por los hijos; solo nos interesa el propio widget
+        if evento.widget is not widget:
+            return
+        for canal, lista in self._suscripciones.items():
+            self._suscripciones[canal] = [(cb, w) for cb, w in lista if w is not widget]
+
+    # --- RECEPCIÓN (hilo de escucha) ---
+
+    def _alRecibirAviso(self, canal, operacion, ids):
+        """Corre en el hilo de escucha: solo toca estructuras seguras entre hilos."""
+        cache = CatalogCache.obtenerInstancia()
+        if operacion == OPERACION_RECONEXION:
+            cache.invalidar()
+            ReportGenerator.invalidarCache()
+        elif canal in (CANAL_VARIANTES, CANAL_PRODUCTOS):
+            cache.marcarCambiosPendientes()
+            ReportGenerator.invalidarCache() # Ventas de otra caja mueven stock y reportes
+        elif canal == CANAL_DESCUENTOS:
+            ReportGenerator.invalidarCache('mayor_descuento')
+        self._avisos.put((canal, ids))
+
+    # --- REPARTO (hilo de Tk) ---
+
+    def _programarVaciado(self):
+        self._id_after = self._root.after(self.intervalo_ms, self._vaciarCola)
+
+    def _vaciarCola(self):
+        """Junta los avisos acumulados por canal y llama UNA vez a cada suscriptor."""
+        pendientes = {} # {canal: set de ids | None = todo}
+        recargar_todo = False
+        try:
+            while True:
+                canal, ids = self._avisos.get_nowait()
+                if canal is None:
+                    recargar_todo = True
+                elif ids is None or pendientes.get(canal, set()) is None:
+                    pendientes[canal] = None
+                else:
+                    pendientes.setdefault(canal, set()).update(ids)
+        except queue.Empty:
+            pass
+
+        if recargar_todo:
+            pendientes = {canal: None for canal in self._suscripciones}
+
+        for canal, ids in pendientes.items():
+            for callback, widget in list(self._suscripciones.get(canal, [])):
+                if widget is not None and not widget.winfo_exists():
+                    continue
+                try:
+                    callback(canal, ids)
+                except Exception as e:
+                    log.error(f"Error en vista al procesar cambios de {canal}: {e}")
+
+        if self._escucha:
+            self._programarVaciado()
@@ -1,6 +1,8 @@
 import tkinter as tk
-from tkinter import ttk, messagebox
+from tkinter import ttk, messagebox, filedialog
 from mis_trapitos.logica.generador_reporte import ReportGenerator
+from mis_trapitos.ui.tareas_fondo import TaskGroup
+from mis_trapitos.ui.enlace_tabla import TableBinding
 
 class ReportsView(tk.Frame):
     """
@@ -12,6 +14,7 @@ class ReportsView(tk.Frame):
     def __init__(self, parent):
         super().__init__(parent)
         self.controller = ReportGenerator()
+        self.tareas = TaskGroup(self) # Los reportes pueden tardar: nunca en el hilo de la interfaz
         
         self._configurarEstilos()
         self._crearInterfaz()
@@ -34,6 +37,18 @@ class ReportsView(tk.Frame):
             command=self.cargarDatos
         ).pack(side="right")
 
+        # Recalcular las vistas de reportes a pedido (si no, se hace cada REPORTES_REFRESCO_SEG)
+        self.btn_recalcular = tk.Button(
+            frame_top, text="⟳ Recalcular Reportes",
+            bg="#8E44AD", fg="white", font=("Segoe UI", 10),
+            command=self._recalcularReportes
+        )
+        self.btn_recalcular.pack(side="right", padx=5)
+
+        # "Datos al ..." (top de ventas y métodos de pago salen de vistas materializadas; los estancados van al día)
+        self.lbl_fecha_datos = tk.Label(frame_top, text="", bg="white", fg="#7F8C8D", font=("Segoe UI", 9))
+        self.lbl_fecha_datos.pack(side="left")
+
         # 2. SECCIÓN DE KPIs
         # Un frame para mostrar metricas rapidas
         self.frame_kpis = tk.Frame(self, pady=10, padx=20)
@@ -65,6 +80,13 @@ class ReportsView(tk.Frame):
         self.notebook.add(self.tab_inventario, text="📦 Salud de Inventario")
         self._construirTabInventario()
 
+        # Llave de cada fila: producto, método de pago, y la fila entera en estancados (no trae id)
+        self.enlaces = {
+            self.tree_top: TableBinding(self.tree_top),
+            self.tree_pagos: TableBinding(self.tree_pagos),
+            self.tree_estancados: TableBinding(self.tree_estancados, clave=tuple),
+        }
+
     def _crearTarjetaKPI(self, parent, titulo, valor_inicial):
         """Ayudante visual para crear tarjetas de métricas"""
         frame = tk.Frame(parent, bg="white", bd=1, relief="solid", padx=20, pady=10)
@@ -113,7 +135,16 @@ class ReportsView(tk.Frame):
         frame_content = tk.Frame(self.tab_inventario, bg="white", padx=10, pady=10)
         frame_content.pack(fill="both", expand=True)
         
-        ttk.Label(frame_content, text="⚠️ Productos Estancados (Sin ventas en 90 días)", style="Section.TLabel", background="white").pack(anchor="w", pady=5)
+        frame_titulo = tk.Frame(frame_content, bg="white")
+        frame_titulo.pack(fill="x")
+
+        ttk.Label(frame_titulo, text="⚠️ Productos Estancados (Sin ventas en 90 días)", style="Section.TLabel", background="white").pack(side="left", pady=5)
+
+        tk.Button(
+            frame_titulo, text="⬇️ Exportar CSV",
+            bg="#27AE60", fg="white", font=("Segoe UI", 9),
+            command=self._exportarEstancados
+        ).pack(side="right")
         
         cols_est = ("desc", "talla", "color")
         self.tree_estancados = ttk.Treeview(frame_content, columns=cols_est, show="headings")
@@ -123,29 +154,67 @@ class ReportsView(tk.Frame):
         self.tree_estancados.pack(fill="both", expand=True)
 
     def cargarDatos(self):
-        """Llama al controlador para refrescar toda la información"""
-        # 1. Cargar KPIs
-        metricas = self.controller.obtenerMetricasRapidas()
+        """
+        Lanza las consultas del tablero A LA VEZ (cada una en su hilo y con su conexión del pool)
+        y llena cada tarjeta/tabla en cuanto llega su resultado: el tablero tarda lo que la más lenta.
+        """
+        tareas = self.tareas
+        tareas.ejecutar(self.controller.obtenerMetricasRapidas, al_terminar=self._mostrarMetricas, clave="metricas")
+        tareas.ejecutar(self.controller.obtenerResumenInventario, al_terminar=self._mostrarMayorStock, clave="mayor_stock")
+        tareas.ejecutar(self.controller.obtenerTopVentasMes, al_terminar=lambda datos: self._llenarTabla(self.tree_top, datos), clave="top")
+        tareas.ejecutar(self.controller.obtenerTendenciasPago, al_terminar=lambda datos: self._llenarTabla(self.tree_pagos, datos), clave="pagos")
+        tareas.ejecutar(self.controller.obtenerProductosEstancados, 90, al_terminar=lambda datos: self._llenarTabla(self.tree_estancados, datos), clave="estancados")
+        tareas.ejecutar(self.controller.obtenerFechaDatos, al_terminar=self._mostrarFechaDatos, clave="fecha_datos")
+
+    def _mostrarFechaDatos(self, fecha):
+        if fecha is None:
+            self.lbl_fecha_datos.config(text="Datos en vivo")
+        else:
+            self.lbl_fecha_datos.config(text=f"Datos al {fecha.astimezone():%d/%m/%Y %H:%M}")
+
+    def _recalcularReportes(self):
+        self.btn_recalcular.config(state="disabled")
+        self.tareas.ejecutar(self.controller.refrescarVistas, al_terminar=self._alRecalcular, clave="recalcular")
+
+    def _alRecalcular(self, resultado):
+        exito, msg = resultado
+        self.btn_recalcular.config(state="normal")
+        if exito:
+            self.cargarDatos()
+        else:
+            messagebox.showwarning("Reportes", msg)
+
+    def _mostrarMetricas(self, metricas):
         self.lbl_kpi_ventas.config(text=str(metricas.get("ventas_recientes", 0)))
         self.lbl_kpi_oferta.config(text=metricas.get("mejor_descuento", "N/A"))
-        
-        mayor_stock = self.controller.obtenerResumenInventario()
+
+    def _mostrarMayorStock(self, mayor_stock):
         if mayor_stock:
             texto_stock = f"{mayor_stock['stock']} u.\n({mayor_stock['producto'][:15]}...)"
             self.lbl_kpi_stock.config(text=texto_stock, font=("Segoe UI", 12, "bold"))
         else:
             self.lbl_kpi_stock.config(text="Inventario Vacío")
 
-        # 2. Cargar Tablas Ventas
-        self._llenarTabla(self.tree_top, self.controller.obtenerTopVentasMes())
-        self._llenarTabla(self.tree_pagos, self.controller.obtenerTendenciasPago())
-
-        # 3. Cargar Tabla Inventario (Estancados)
-        self._llenarTabla(self.tree_estancados, self.controller.obtenerProductosEstancados(90))
-
     def _llenarTabla(self, tree, datos):
-        for item in tree.get_children():
-            tree.delete(item)
-        if datos:
-            for row in datos:
-                tree.insert("", "end", values=row)
\ No newline at end of file
+        # Al recalcular solo cambian los números: la tabla se actualiza sin parpadear ni perder la selección
+        self.enlaces[tree].actualizar(datos or [])
+
+    def _exportarEstancados(self):
+        """Exporta la lista completa de productos estancados a un archivo CSV"""
+        ruta = filedialog.asksaveasfilename(
+            title="Guardar reporte",
+            defaultextension=".csv",
+            initialfile="productos_estancados.csv",
+            filetypes=[("CSV", "*.csv")]
+        )
+        if not ruta:
+            return
+
+        self.tareas.ejecutar(self.controller.exportarProductosEstancados, ruta, 90, al_terminar=self._alExportar, clave="exportar")
+
+    def _alExportar(self, resultado):
+        exito, msg = resultado
+        if exito:
+            messagebox.showinfo("Exportación", msg)
+        else:
+            messagebox.showerror("Error", msg)
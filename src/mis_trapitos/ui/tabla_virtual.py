@@ -0,0 +1,255 @@
+## Tabla virtual: listas de cualquier tamaño dibujando solo las filas que se ven
+
+import tkinter as tk
+from tkinter import ttk, messagebox
+from mis_trapitos.ui.tareas_fondo import TaskGroup
+from mis_trapitos.core.logger import log
+
+
+class VirtualTable(tk.Frame):
+    """
+    Treeview que no crea un item por fila: tiene tantos items como filas caben en pantalla
+    y al desplazarse solo les cambia los valores. Las filas llegan por páginas (en segundo plano)
+    cuando el usuario se acerca al final de lo ya cargado.
+
+    Uso:
+        self.tabla = VirtualTable(frame, ("id", "nombre"), formatear=self._formatearFila)
+        self.tabla.pack(fill="both", expand=True)
+        self.tree = self.tabla.tree # Encabezados, anchos, selección y Doble clic como siempre
+        self.tabla.cargar(self.controller.obtenerPaginaClientes)
+
+    obtener_pagina(ultima_fila, limite) retorna las filas que siguen a 'ultima_fila'
+    (None = desde el principio). Una página con menos de 'limite' filas es la última.
+    Para una búsqueda paginada por número de página, len(tabla) dice cuántas filas ya hay.
+    clave(fila) identifica la fila al refrescar (por defecto fila[0], el id).
+    """
+
+    def __init__(self, parent, columnas, formatear=None, clave=None, tam_pagina=200, margen=None, **opciones):
+        super().__init__(parent)
+        self.formatear = formatear or (lambda fila: fila)
+        self.clave = clave or (lambda fila: fila[0])
+        self.tam_pagina = tam_pagina
+        # Filas de reserva: la página siguiente se pide cuando quedan menos que esto por mostrar
+        self.margen = margen if margen is not None else tam_pagina // 2
+        self.tareas = TaskGroup(self)
+
+        self._obtener_pagina = None
+        self._filas = []          # Todo lo cargado (tuplas: la parte barata)
+        self._completo = True
+        self._cargando = False
+        self._inicio = 0          # Índice de la primera fila visible
+        self._visibles = 1        # Filas que caben en pantalla
+        self._seleccion = None    # Índice en _filas de la fila seleccionada
+        self._items = []          # Items del Treeview (uno por fila visible)
+        self._fila_de_item = {}   # {item: índice en _filas}
+        self._valores_item = {}   # {item: valores mostrados} (solo se reescribe lo que cambió)
+
+        self.tree = ttk.Treeview(self, columns=columnas, show="headings", selectmode="browse", **opciones)
+        self.barra = ttk.Scrollbar(self, orient="vertical", command=self._alMoverBarra)
+        self.tree.pack(side="left", fill="both", expand=True)
+        self.barra.pack(side="right", fill="y")
+
+        self.tree.bind("<Configure>", self._alRedimensionar)
+        self.tree.bind("<<TreeviewSelect>>", self._alSeleccionar, add="+")
+        self.tree.bind("<MouseWheel>", self._alRueda)
+        self.tree.bind("<Button-4>", lambda e: self._desplazar(-3)) # Rueda en Linux
+        self.tree.bind("<Button-5>", lambda e: self._desplazar(3))
+        self.tree.bind("<Up>", lambda e: self._moverSeleccion(-1))
+        self.tree.bind("<Down>", lambda e: self._moverSeleccion(1))
+        self.tree.bind("<Prior>", lambda e: self._moverSeleccion(-self._visibles))
+        self.tree.bind("<Next>", lambda e: self._moverSeleccion(self._visibles))
+        self.tree.bind("<Home>", lambda e: self._moverSeleccion(-len(self._filas)))
+        self.tree.bind("<End>", lambda e: self._moverSeleccion(len(self._filas)))
+
+    def __len__(self):
+        return len(self._filas)
+
+    # --- API ---
+
+    def cargar(self, obtener_pagina):
+        """
+        Empieza de cero con otra fuente de páginas (p.ej. al cambiar el texto de búsqueda).
+        Si es la misma fuente que ya se muestra, solo refresca.
+        """
+        if obtener_pagina == self._obtener_pagina:
+            self.refrescar()
+            return
+        self._obtener_pagina = obtener_pagina
+        self.recargar()
+
+    def refrescar(self):
+        """
+        Vuelve a pedir en una sola consulta todo lo cargado hasta ahora y aplica las diferencias:
+        la fila de arriba y la seleccionada (por su llave) siguen donde estaban.
+        """
+        if self._obtener_pagina is None:
+            return
+        if not self._filas:
+            self.recargar()
+            return
+        # Múltiplo de tam_pagina: las páginas que sigan quedan alineadas
+        limite = -(-len(self._filas) // self.tam_pagina) * self.tam_pagina
+        self._cargando = True
+        self.tareas.ejecutar(
+            self._obtener_pagina, None, limite,
+            al_terminar=lambda filas: self._alRefrescar(filas, limite),
+            al_fallar=self._alFallarPagina, clave="pagina"
+        )
+
+    def recargar(self):
+        """Descarta lo cargado y vuelve a pedir la primera página."""
+        self._filas = []
+        self._inicio = 0
+        self._seleccion = None
+        self._completo = False
+        self._cargando = False
+        self._dibujar()
+        self._pedirPagina()
+
+    def filaSeleccionada(self):
+        """La fila (sin formato) seleccionada, aunque se haya desplazado fuera de la vista."""
+        if self._seleccion is None:
+            return None
+        return self._filas[self._seleccion]
+
+    # --- PÁGINAS ---
+
+    def _pedirPagina(self):
+        if self._completo or self._cargando or self._obtener_pagina is None:
+            return
+        self._cargando = True
+        ultima = self._filas[-1] if self._filas else None
+        self.tareas.ejecutar(
+            self._obtener_pagina, ultima, self.tam_pagina,
+            al_terminar=self._alRecibirPagina, al_fallar=self._alFallarPagina, clave="pagina"
+        )
+
+    def _alRecibirPagina(self, filas):
+        self._cargando = False
+        self._filas.extend(filas)
+        self._completo = len(filas) < self.tam_pagina
+        self._dibujar()
+        self._pedirSiHaceFalta() # La ventana puede ser más alta que la página, o el usuario ya bajó
+
+    def _alRefrescar(self, filas, limite):
+        arriba = self.clave(self._filas[self._inicio]) if self._inicio < len(self._filas) else None
+        seleccionada = None if self._seleccion is None else self.clave(self._filas[self._seleccion])
+        indices = {self.clave(fila): indice for indice, fila in enumerate(filas)}
+
+        self._filas = list(filas)
+        self._completo = len(filas) < limite
+        self._cargando = False
+        self._seleccion = indices.get(seleccionada) # None si ya no existe
+        self._irA(indices.get(arriba, self._inicio), forzar=True)
+
+    def _alFallarPagina(self, error):
+        self._cargando = False
+        self._completo = True # No reintentar en cada movimiento de la rueda
+        log.error(f"No se pudo cargar una página de la tabla: {error}")
+        messagebox.showerror("Error", f"No se pudieron cargar más filas: {error}")
+
+    def _pedirSiHaceFalta(self):
+        if self._inicio + self._visibles + self.margen >= len(self._filas):
+            self._pedirPagina()
+
+    # --- DIBUJO ---
+
+    def _dibujar(self):
+        ventana = self._filas[self._inicio:self._inicio + self._visibles]
+        while len(self._items) < len(ventana):
+            self._items.append(self.tree.insert("", "end"))
+        while len(self._items) > len(ventana):
+            item = self._items.pop()
+            self.tree.delete(item)
+            self._valores_item.pop(item, None)
+
+        self._fila_de_item = {}
+        for posicion, (item, fila) in enumerate(zip(self._items, ventana)):
+            valores = tuple(self.formatear(fila))
+            if self._valores_item.get(item) != valores:
+                self.tree.item(item, values=valores)
+                self._valores_item[item] = valores
+            self._fila_de_item[item] = self._inicio + posicion
+
+        # La selección sigue a la fila, no al item
+        posicion = -1 if self._seleccion is None else self._seleccion - self._inicio
+        if 0 <= posicion < len(self._items):
+            item = self._items[posicion]
+            if self.tree.selection() != (item,):
+                self.tree.selection_set(item)
+            self.tree.focus(item)
+        elif self.tree.selection():
+            self.tree.selection_set(())
+
+        self.tree.yview_moveto(0) # Todos los items caben: el Treeview nunca se desplaza solo
+        self._actualizarBarra()
+
+    def _actualizarBarra(self):
+        # Mientras falten páginas se cuenta una más, para que la barra no parezca llegar al final
+        total = len(self._filas) + (0 if self._completo else self.tam_pagina)
+        if total == 0:
+            self.barra.set(0, 1)
+            return
+        self.barra.set(self._inicio / total, min(1.0, (self._inicio + self._visibles) / total))
+
+    def _altoFila(self):
+        try:
+            return int(ttk.Style().lookup(self.tree.cget("style") or "Treeview", "rowheight")) or 20
+        except (ValueError, tk.TclError):
+            return 20
+
+    # --- DESPLAZAMIENTO ---
+
+    def _irA(self, inicio, forzar=False):
+        inicio = max(0, min(inicio, len(self._filas) - self._visibles))
+        if forzar or inicio != self._inicio:
+            self._inicio = inicio
+            self._dibujar()
+        self._pedirSiHaceFalta()
+
+    def _desplazar(self, paso):
+        self._irA(self._inicio + paso)
+        return "break"
+
+    def _alMoverBarra(self, accion, cantidad, unidad=None):
+        if accion == "moveto":
+            total = len(self._filas) + (0 if self._completo else self.tam_pagina)
+            self._irA(int(float(cantidad) * total))
+        elif accion == "scroll":
+            self._desplazar(int(cantidad) * (self._visibles if unidad == "pages" else 1))
+
+    def _alRueda(self, event):
+        return self._desplazar(-3 if event.delta > 0 else 3)
+
+    def _alRedimensionar(self, event):
+        # El encabezado ocupa más o menos lo que una fila
+        visibles = max(1, event.height // self._altoFila() - 1)
+        if visibles != self._visibles:
+            self._visibles = visibles
+            self._irA(self._inicio, forzar=True)
+
+    # --- SELECCIÓN ---
+
+    def _alSeleccionar(self, event=None):
+        # Vacía = la fila seleccionada quedó fuera de la vista: se conserva
+        seleccion = self.tree.selection()
+        if seleccion and seleccion[0] in self._fila_de_item:
+            self._seleccion = self._fila_de_item[seleccion[0]]
+
+    def _moverSeleccion(self, paso):
+        if not self._filas:
+            return "break"
+        if self._seleccion is None:
+            actual = self._inicio - 1 if paso > 0 else self._inicio
+        else:
+            actual = self._seleccion
+        self._seleccion = max(0, min(actual + paso, len(self._filas) - 1))
+
+        # Llevar la fila a la vista
+        if self._seleccion < self._inicio:
+            self._inicio = self._seleccion
+        elif self._seleccion >= self._inicio + self._visibles:
+            self._inicio = self._seleccion - self._visibles + 1
+        self._dibujar()
+        self._pedirSiHaceFalta()
+        return "break"
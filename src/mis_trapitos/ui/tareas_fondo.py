@@ -0,0 +1,228 @@
+## Tareas en segundo plano para las vistas de Tkinter
+
+import os
+import queue
+import tkinter as tk
+from tkinter import messagebox
+from concurrent.futures import ThreadPoolExecutor
+from mis_trapitos.core.logger import log
+
+class BackgroundExecutor:
+    """
+    Pool de hilos compartido por todas las vistas + cola de resultados que se vacía
+    con after() en el hilo de Tk. Los hilos SOLO llaman a controladores; los widgets
+    se actualizan siempre desde el hilo de Tk.
+    Las vistas no lo usan directo: usan un TaskGroup.
+    """
+
+    _instancia = None
+
+    @classmethod
+    def obtenerInstancia(cls):
+        if cls._instancia is None:
+            cls._instancia = cls()
+        return cls._instancia
+
+    def __init__(self):
+        self.hilos = int(os.getenv('UI_HILOS_TRABAJO', '6'))
+        self.intervalo_ms = int(os.getenv('UI_INTERVALO_RESULTADOS_MS', '30'))
+        self._pool = None
+        self._resultados = queue.Queue()
+        self._root = None
+        self._id_after = None
+
+    def iniciar(self, root):
+        if self._pool:
+            return
+        self._root = root
+        self._pool = ThreadPoolExecutor(max_workers=self.hilos, thread_name_prefix="trabajo_ui")
+        self._programarVaciado()
+
+    def detener(self):
+        if self._pool:
+            self._pool.shutdown(wait=False, cancel_futures=True)
+            self._pool = None
+        if self._root and self._id_after:
+            try:
+                self._root.after_cancel(self._id_after)
+            except tk.TclError:
+                pass # La ventana ya se destruyó
+        self._id_after = None
+
+    def enviar(self, funcion):
+        """Ejecuta funcion() en un hilo del pool. Retorna el Future."""
+        return self._pool.submit(funcion)
+
+    def publicar(self, tarea, callback, valor, final):
+        """Desde un hilo de trabajo: deja 'callback(valor)' pendiente para el hilo de Tk."""
+        self._resultados.put((tarea, callback, valor, final))
+
+    def _programarVaciado(self):
+        self._id_after = self._root.after(self.intervalo_ms, self._vaciarCola)
+
+    def _vaciarCola(self):
+        try:
+            while True:
+                tarea, callback, valor, final = self._resultados.get_nowait()
+                if final:
+                    tarea.grupo._terminarTarea(tarea)
+                if tarea.cancelada or callback is None:
+                    continue
+                try:
+                    callback(valor)
+                except Exception as e:
+                    log.error(f"Error al actualizar la vista con el resultado de una tarea: {e}")
+        except queue.Empty:
+            pass
+
+        if self._pool:
+            self._programarVaciado()
+
+
+class _Tarea:
+    """Una llamada enviada al pool. 'cancelada' hace que sus resultados se descarten."""
+
+    def __init__(self, grupo, clave):
+        self.grupo = grupo
+        self.clave = clave
+        self.cancelada = False
+        self.futuro = None
+
+    def cancelar(self):
+        self.cancelada = True
+        if self.futuro:
+            self.futuro.cancel() # Si aún no empezó, ni siquiera corre
+
+
+class TaskGroup:
+    """
+    Tareas de UNA vista (o ventana). Se cancelan solas cuando se destruye el widget,
+    p.ej. al cambiar de vista en MainWindow.cambiarVista.
+
+    Uso:
+        self.tareas = TaskGroup(self)
+        self.tareas.ejecutar(self.controller.obtenerListaProveedores, al_terminar=self._llenarTabla)
+
+    'clave': si se vuelve a pedir una tarea con la misma clave (p.ej. pulsar "Actualizar" dos veces)
+    la anterior se cancela y solo cuenta la última.
+    Mientras haya tareas pendientes se muestra un indicador "Cargando..." y el cursor de espera.
+    """
+
+    def __init__(self, widget, texto_indicador="⏳ Cargando..."):
+        self.widget = widget
+        self.cancelado = False
+        self._pendientes = set()
+        self._por_clave = {}
+        self._indicador = tk.Label(widget, text=texto_indicador, bg="#F9E79F", fg="#7D6608", font=("Segoe UI", 9, "bold"), padx=8)
+        widget.bind("<Destroy>", self._alDestruir, add="+")
+
+    # --- API ---
+
+    def ejecutar(self, funcion, *args, al_terminar=None, al_fallar=None, clave=None, **kwargs):
+        """
+        Corre funcion(*args, **kwargs) en segundo plano y luego al_terminar(resultado) en el hilo de Tk.
+        Si la función lanza una excepción se llama al_fallar(error) (por defecto, se muestra y se registra).
+        """
+        tarea = self._nuevaTarea(clave)
+        ejecutor = BackgroundExecutor.obtenerInstancia()
+
+        def trabajo():
+            try:
+                resultado = funcion(*args, **kwargs)
+            except Exception as e:
+                ejecutor.publicar(tarea, al_fallar or self._mostrarError, e, final=True)
+                return
+            ejecutor.publicar(tarea, al_terminar, resultado, final=True)
+
+        tarea.futuro = ejecutor.enviar(trabajo)
+        return tarea
+
+    def ejecutarIterando(self, funcion, *args, al_bloque, al_terminar=None, al_fallar=None, clave=None, tam_bloque=200, **kwargs):
+        """
+        Para generadores (p.ej. iterarCatalogo): las filas llegan a al_bloque(lista) en bloques
+        de 'tam_bloque' conforme se leen, así la tabla se va llenando sin esperar al final.
+        al_terminar recibe el total de filas.
+        """
+        tarea = self._nuevaTarea(clave)
+        ejecutor = BackgroundExecutor.obtenerInstancia()
+
+        def trabajo():
+            total = 0
+            bloque = []
+            try:
+                for fila in funcion(*args, **kwargs):
+                    if tarea.cancelada:
+                        break # Deja de leer; el generador cierra su cursor y libera la conexión
+                    bloque.append(fila)
+                    if len(bloque) >= tam_bloque:
+                        ejecutor.publicar(tarea, al_bloque, bloque, final=False)
+                        total += len(bloque)
+                        bloque = []
+                if bloque:
+                    ejecutor.publicar(tarea, al_bloque, bloque, final=False)
+                    total += len(bloque)
+            except Exception as e:
+                ejecutor.publicar(tarea, al_fallar or self._mostrarError, e, final=True)
+                return
+            ejecutor.publicar(tarea, al_terminar, total, final=True)
+
+        tarea.futuro = ejecutor.enviar(trabajo)
+        return tarea
+
+    def cancelar(self):
+        """Descarta todo lo pendiente de esta vista."""
+        self.cancelado = True
+        for tarea in list(self._pendientes):
+            tarea.cancelar()
+        self._pendientes.clear()
+        self._por_clave.clear()
+
+    @property
+    def ocupado(self):
+        return bool(self._pendientes)
+
+    # --- INTERNOS ---
+
+    def _nuevaTarea(self, clave):
+        ejecutor = BackgroundExecutor.obtenerInstancia()
+        if not ejecutor._pool:
+            ejecutor.iniciar(self.widget.nametowidget('.'))
+
+        if clave is not None and clave in self._por_clave:
+            anterior = self._por_clave.pop(clave)
+            anterior.cancelar()
+            self._pendientes.discard(anterior)
+
+        tarea = _Tarea(self, clave)
+        if self.cancelado:
+            tarea.cancelada = True
+        self._pendientes.add(tarea)
+        if clave is not None:
+            self._por_clave[clave] = tarea
+        self._actualizarIndicador()
+        return tarea
+
+    def _terminarTarea(self, tarea):
+        self._pendientes.discard(tarea)
+        if self._por_clave.get(tarea.clave) is tarea:
+            del self._por_clave[tarea.clave]
+        self._actualizarIndicador()
+
+    def _actualizarIndicador(self):
+        if self.cancelado or not self.widget.winfo_exists():
+            return
+        if self._pendientes:
+            self._indicador.place(relx=1.0, rely=0.0, anchor="ne", x=-10, y=10)
+            self._indicador.lift()
+            self.widget.config(cursor="watch")
+        else:
+            self._indicador.place_forget()
+            self.widget.config(cursor="")
+
+    def _alDestruir(self, evento):
+        if evento.widget is self.widget:
+            self.cancelar()
+
+    def _mostrarError(self, error):
+        log.error(f"Tarea en segundo plano fallida: {error}")
+        messagebox.showerror("Error", f"Ocurrió un error: {error}")
@@ -1,6 +1,8 @@
 import tkinter as tk
 from tkinter import ttk, messagebox, Toplevel
 from mis_trapitos.logica.auth_control import AuthController
+from mis_trapitos.ui.tareas_fondo import TaskGroup
+from mis_trapitos.ui.tabla_virtual import VirtualTable
 
 class UsersView(tk.Frame):
     """
@@ -12,6 +14,7 @@ class UsersView(tk.Frame):
         super().__init__(parent)
         self.usuario_admin = usuario_admin_sesion
         self.controller = AuthController()
+        self.tareas = TaskGroup(self) # Consultas fuera del hilo de la interfaz
         
         self._crearInterfaz()
         self.cargarDatosTabla()
@@ -43,7 +46,9 @@ class UsersView(tk.Frame):
         frame_tabla.pack(fill="both", expand=True, padx=10, pady=10)
 
         cols = ("id", "nombre", "usuario", "rol", "estado")
-        self.tree = ttk.Treeview(frame_tabla, columns=cols, show="headings")
+        self.tabla = VirtualTable(frame_tabla, cols, formatear=self._formatearFila)
+        self.tabla.pack(fill="both", expand=True)
+        self.tree = self.tabla.tree
         
         self.tree.heading("id", text="ID")
         self.tree.heading("nombre", text="Nombre Completo")
@@ -57,37 +62,35 @@ class UsersView(tk.Frame):
         self.tree.column("rol", width=100, anchor="center")
         self.tree.column("estado", width=60, anchor="center")
 
-        self.tree.pack(fill="both", expand=True)
-
     def cargarDatosTabla(self):
-        # Limpiar
-        for item in self.tree.get_children():
-            self.tree.delete(item)
-            
-        datos = self.controller.obtenerListaEmpleados()
-        for row in datos:
-            # row = (id, nombre, usuario, rol, activo)
-            # Convertir booleano a texto
-            fila_visual = list(row)
-            fila_visual[4] = "Sí" if row[4] else "No"
-            
-            self.tree.insert("", "end", values=fila_visual)
+        self.tabla.cargar(self.controller.obtenerPaginaEmpleados)
+
+    def _formatearFila(self, row):
+        # row = (id, nombre, usuario, rol, activo)
+        # Convertir booleano a texto
+        fila_visual = list(row)
+        fila_visual[4] = "Sí" if row[4] else "No"
+        return fila_visual
 
     def _abrirModalNuevo(self):
         VentanaAltaUsuario(self)
 
     def _accionEliminar(self):
-        seleccion = self.tree.selection()
-        if not seleccion: return
+        valores = self.tabla.filaSeleccionada() # Aunque se haya desplazado fuera de la vista
+        if not valores: return
         
-        valores = self.tree.item(seleccion[0])['values']
         id_empleado = valores[0]
         nombre = valores[1]
         
         if not messagebox.askyesno("Peligro", f"¿Estás seguro de eliminar al usuario '{nombre}'?\nEsta acción no se puede deshacer."): return
 
-        exito, msg = self.controller.eliminarEmpleado(self.usuario_admin['id'], id_empleado)
-        
+        self.tareas.ejecutar(
+            self.controller.eliminarEmpleado, self.usuario_admin['id'], id_empleado,
+            al_terminar=self._alEliminar
+        )
+
+    def _alEliminar(self, resultado):
+        exito, msg = resultado
         if exito:
             messagebox.showinfo("Éxito", msg)
             self.cargarDatosTabla()
@@ -104,6 +107,7 @@ class VentanaAltaUsuario(Toplevel):
         self.configure(bg="white")
         self.transient(parent_view)
         self.grab_set()
+        self.tareas = TaskGroup(self, "⏳ Guardando...")
         
         self._construirFormulario()
 
@@ -130,11 +134,12 @@ class VentanaAltaUsuario(Toplevel):
         self.combo_rol.current(0) # Default: empleado
         self.combo_rol.pack(fill="x", pady=(0, 20))
 
-        tk.Button(
+        self.btn_guardar = tk.Button(
             self, text="CREAR USUARIO", 
             bg="#2C3E50", fg="white", font=("Segoe UI", 10, "bold"),
             pady=10, command=self._guardar
-        ).pack(fill="x", padx=30, pady=20)
+        )
+        self.btn_guardar.pack(fill="x", padx=30, pady=20)
 
     def _guardar(self):
         nom = self.entry_nom.get().strip()
@@ -146,15 +151,21 @@ class VentanaAltaUsuario(Toplevel):
             messagebox.showwarning("Atención", "Todos los campos son obligatorios.")
             return
 
-        # Llamada al controlador (hash y logs)
-        exito, msg = self.view.controller.registrarEmpleado(
+        # Llamada al controlador (hash y logs), en segundo plano
+        self.btn_guardar.config(state="disabled")
+        self.tareas.ejecutar(
+            self.view.controller.registrarEmpleado,
             nom, user, pwd, rol, 
-            self.view.usuario_admin # Pasamos quien esta creando al usuario para el LOG
+            self.view.usuario_admin, # Pasamos quien esta creando al usuario para el LOG
+            al_terminar=self._alGuardar
         )
-        
+
+    def _alGuardar(self, resultado):
+        exito, msg = resultado
         if exito:
             messagebox.showinfo("Éxito", msg)
             self.view.cargarDatosTabla()
             self.destroy()
         else:
+            self.btn_guardar.config(state="normal")
             messagebox.showerror("Error", msg)
\ No newline at end of file
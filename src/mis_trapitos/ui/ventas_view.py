@@ -1,8 +1,14 @@
+import os
 import tkinter as tk
 from tkinter import ttk, messagebox, simpledialog
 from mis_trapitos.logica.ventas_control import SalesController
 from mis_trapitos.logica.producto_control import ProductController
 from mis_trapitos.logica.cliente_control import CustomerController
+from mis_trapitos.logica.indice_busqueda import CatalogSearchIndex
+from mis_trapitos.ui.puente_cambios import ChangeBridge
+from mis_trapitos.ui.tareas_fondo import TaskGroup
+from mis_trapitos.ui.enlace_tabla import TableBinding
+from mis_trapitos.database_conexion.escucha_cambios import CANAL_VARIANTES, CANAL_PRODUCTOS
 
 class SalesView(tk.Frame):
     """
@@ -10,6 +16,8 @@ class SalesView(tk.Frame):
     Gestiona la interacción de venta: Selección de productos, cliente y cobro.
     """
 
+    TAM_PAGINA_BUSQUEDA = 50 # Filas por página cuando se busca en la BD
+
     def __init__(self, parent, usuario_data):
         super().__init__(parent)
         self.usuario = usuario_data
@@ -22,10 +30,29 @@ class SalesView(tk.Frame):
         # Estado de la Venta
         self.carrito = [] # Lista de diccionarios con los items
         self.cliente_actual = None # Datos del cliente seleccionado (id, nombre)
+        self.cobrando = False # Venta en proceso: carrito y cliente quedan bloqueados hasta la respuesta
+        self.data_productos = [] # Catálogo en memoria para el buscador (llega en segundo plano)
+        self._filas_mostradas = [] # Lo que está en la tabla de productos ahora
+
+        # Búsqueda mientras se escribe: índice de prefijos + espera corta para no buscar en cada tecla
+        self.indice_busqueda = CatalogSearchIndex()
+        self.espera_busqueda_ms = int(os.getenv('BUSQUEDA_ESPERA_MS', '150'))
+        self._id_busqueda = None
+        self._texto_filtrado = None
+        # Catálogo muy grande (ver ProductController.usaBusquedaServidor): no se carga, se busca por páginas
+        self.busqueda_servidor = False
+        self._pagina_busqueda = 0
+
+        self.tareas = TaskGroup(self) # Consultas fuera del hilo de la interfaz
 
         self._crearInterfaz()
         self._cargarCatalogoInicial()
 
+        # Stock y precios cambiados en otra caja: se redibuja sin que nadie pulse nada
+        puente = ChangeBridge.obtenerInstancia()
+        puente.suscribir(CANAL_VARIANTES, self._alCambiarCatalogo, widget=self)
+        puente.suscribir(CANAL_PRODUCTOS, self._alCambiarCatalogo, widget=self)
+
     def _crearInterfaz(self):
         # Dividir pantalla en Izquierda (Catálogo) y Derecha (Ticket)
         paned = tk.PanedWindow(self, orient="horizontal", sashwidth=5, bg="#BDC3C7")
@@ -45,6 +72,7 @@ class SalesView(tk.Frame):
         self.entry_busqueda = tk.Entry(frame_search, font=("Segoe UI", 11))
         self.entry_busqueda.pack(side="left", fill="x", expand=True)
         self.entry_busqueda.bind("<Return>", lambda e: self._filtrarCatalogo()) # Enter para buscar
+        self.entry_busqueda.bind("<KeyRelease>", self._programarBusqueda) # Y también mientras se escribe
 
         btn_buscar = tk.Button(frame_search, text="Buscar", command=self._filtrarCatalogo, bg="#34495E", fg="white")
         btn_buscar.pack(side="left", padx=5)
@@ -67,11 +95,16 @@ class SalesView(tk.Frame):
         self.tree_prod.column("stock", width=50, anchor="center")
         
         self.tree_prod.pack(fill="both", expand=True)
+        self.enlace_productos = TableBinding(self.tree_prod, formatear=self._formatearProducto)
         
         # Doble clic para agregar al carrito
         self.tree_prod.bind("<Double-1>", self._agregarAlCarrito)
         
-        tk.Label(frame_izq, text="💡 Doble clic para agregar al carrito", bg="white", fg="gray").pack(pady=5)
+        frame_pie = tk.Frame(frame_izq, bg="white")
+        frame_pie.pack(fill="x", pady=5)
+        tk.Label(frame_pie, text="💡 Doble clic para agregar al carrito", bg="white", fg="gray").pack(side="left")
+        # Solo se muestra al buscar en la BD
+        self.btn_mas_resultados = tk.Button(frame_pie, text="Más resultados", command=self._cargarMasResultados, state="disabled")
 
 
         #PANEL DERECHO: TICKET / CARRITO 
@@ -88,7 +121,8 @@ class SalesView(tk.Frame):
         tk.Label(frame_cli_search, text="Teléfono:", bg="#ECF0F1").pack(side="left")
         self.entry_tel = tk.Entry(frame_cli_search, width=15)
         self.entry_tel.pack(side="left", padx=5)
-        tk.Button(frame_cli_search, text="Buscar", command=self._buscarCliente).pack(side="left")
+        self.btn_buscar_cliente = tk.Button(frame_cli_search, text="Buscar", command=self._buscarCliente)
+        self.btn_buscar_cliente.pack(side="left")
 
         self.lbl_nombre_cliente = tk.Label(frame_cliente, text="Cliente: Público General", bg="#ECF0F1", fg="#2980B9", font=("Segoe UI", 10))
         self.lbl_nombre_cliente.pack(anchor="w", padx=5, pady=(0, 5))
@@ -110,13 +144,16 @@ class SalesView(tk.Frame):
         self.tree_cart.column("total", width=70, anchor="e")
         
         self.tree_cart.pack(fill="both", expand=True, pady=5)
+        self.enlace_carrito = TableBinding(self.tree_cart, formatear=lambda fila: fila[1])
         
         # Botones de manipulación de carrito
         frame_actions = tk.Frame(frame_der, bg="#ECF0F1")
         frame_actions.pack(fill="x")
         
-        tk.Button(frame_actions, text="Quitar Item", command=self._quitarDelCarrito, bg="#E74C3C", fg="white").pack(side="left", padx=2)
-        tk.Button(frame_actions, text="Aplicar Descuento Manual", command=self._aplicarDescuentoManual, bg="#F39C12", fg="white").pack(side="left", padx=2)
+        self.btn_quitar = tk.Button(frame_actions, text="Quitar Item", command=self._quitarDelCarrito, bg="#E74C3C", fg="white")
+        self.btn_quitar.pack(side="left", padx=2)
+        self.btn_descuento = tk.Button(frame_actions, text="Aplicar Descuento Manual", command=self._aplicarDescuentoManual, bg="#F39C12", fg="white")
+        self.btn_descuento.pack(side="left", padx=2)
 
 
         # 3. Totales y Pago
@@ -147,56 +184,108 @@ class SalesView(tk.Frame):
 
     # LÓGICA DE CATÁLOGO
 
-    def _cargarCatalogoInicial(self):
+    def _cargarCatalogoInicial(self, refrescar=True):
         """
         Trae el catálogo usando el controlador, que ya filtra los eliminados.
+        refrescar=False usa el cache tal cual (p.ej. tras una venta, que ya descontó el stock localmente).
         """
-        # 1. Limpiar tabla actual
-        for item in self.tree_prod.get_children():
-            self.tree_prod.delete(item)
-
-        # 2. Obtener datos del controlador (El query actualizado devuelve 7 columnas)
+        # Obtener datos del controlador (El query actualizado devuelve 7 columnas)
         # (id_var, id_prod, desc, talla, color, stock, precio)
-        datos = self.prod_ctrl.obtenerCatalogo()
-        
+        self.tareas.ejecutar(self._obtenerEIndexar, refrescar, al_terminar=self._alCargarCatalogo, clave="catalogo")
+
+    def _obtenerEIndexar(self, refrescar):
+        """Corre en un hilo de trabajo: el índice solo re-tokeniza las variantes cuyo texto cambió."""
+        if self.prod_ctrl.usaBusquedaServidor():
+            return None # Catálogo demasiado grande para tenerlo en memoria
+        datos = self.prod_ctrl.obtenerCatalogo(refrescar)
+        self.indice_busqueda.sincronizar(datos)
+        return datos
+
+    def _alCargarCatalogo(self, datos):
+        if datos is None:
+            if not self.busqueda_servidor:
+                self.busqueda_servidor = True
+                self.btn_mas_resultados.pack(side="right")
+            self._filtrarCatalogo()
+            return
         self.data_productos = datos # Guardamos en memoria para el buscador
+        self._filtrarCatalogo() # Respeta lo que se haya escrito mientras cargaba
 
-        self._llenarTablaProductos(self.data_productos)
+    def _alCambiarCatalogo(self, canal, ids):
+        """Aviso de otra terminal: el cache ya sabe que debe pedir cambios; se respeta la búsqueda actual."""
+        self._cargarCatalogoInicial(refrescar=False)
 
     def _llenarTablaProductos(self, lista_datos):
         """Llena la lista de mustra en el punto de venta con los productos existentes"""
-        for item in self.tree_prod.get_children():
-            self.tree_prod.delete(item)
-            
-        for row in lista_datos:
-            # row = (id_var, id_prod, desc, talla, color, stock, precio)
-            # El Treeview espera: (id, desc, talla, color, precio, stock)
-            
-            # Mapeo de datos para la vista:
-            id_variante = row[0]
-            desc = row[2]
-            talla = row[3]
-            color = row[4]
-            stock = row[5]
-            precio = f"${row[6]:.2f}"
-            
-            # Insertamos solo si hay stock (Opcional, pero recomendable en POS)
-            if stock > 0:
-                self.tree_prod.insert("", "end", values=(id_variante, desc, talla, color, precio, stock))
+        # Insertamos solo si hay stock (Opcional, pero recomendable en POS)
+        self._filas_mostradas = [row for row in lista_datos if row[5] > 0]
+        # Solo cambia lo distinto: una venta en otra caja no pierde la fila seleccionada
+        self.enlace_productos.actualizar(self._filas_mostradas)
+
+    def _agregarFilasProductos(self, lista_datos):
+        self._llenarTablaProductos(self._filas_mostradas + list(lista_datos))
+
+    def _formatearProducto(self, row):
+        # row = (id_var, id_prod, desc, talla, color, stock, precio)
+        # El Treeview espera: (id, desc, talla, color, precio, stock)
+        id_variante = row[0]
+        desc = row[2]
+        talla = row[3]
+        color = row[4]
+        stock = row[5]
+        precio = f"${row[6]:.2f}"
+        return (id_variante, desc, talla, color, precio, stock)
+
+    def _programarBusqueda(self, event=None):
+        """Cada tecla reinicia la espera; se busca cuando el usuario deja de escribir."""
+        if self._id_busqueda:
+            self.after_cancel(self._id_busqueda)
+        self._id_busqueda = self.after(self.espera_busqueda_ms, self._buscarSiCambio)
+
+    def _buscarSiCambio(self):
+        self._id_busqueda = None
+        if self.entry_busqueda.get() != self._texto_filtrado: # Flechas, Shift, etc. no cambian el texto
+            self._filtrarCatalogo()
 
     def _filtrarCatalogo(self, event=None):
-        texto = self.entry_busqueda.get().lower()
-        if not texto:
+        texto = self.entry_busqueda.get()
+        self._texto_filtrado = texto
+        if self.busqueda_servidor:
+            self._buscarEnServidor(texto, 0)
+            return
+
+        if not texto.strip():
             self._llenarTablaProductos(self.data_productos)
             return
             
-        # Filtramos buscando en la descripción (índice 2 de la tupla original)
-        filtrados = [p for p in self.data_productos if texto in p[2].lower()]
-        self._llenarTablaProductos(filtrados)
+        # Palabras como prefijos de descripción, talla o color, sin importar acentos ("cami m" -> "Camisa ... M")
+        self._llenarTablaProductos(self.indice_busqueda.buscar(texto))
+
+    def _buscarEnServidor(self, texto, pagina):
+        """Pide una página a la BD; una búsqueda nueva descarta la que siga en curso (misma clave)."""
+        self.btn_mas_resultados.config(state="disabled")
+        self.tareas.ejecutar(
+            self.prod_ctrl.buscarCatalogo, texto, pagina, self.TAM_PAGINA_BUSQUEDA,
+            al_terminar=lambda resultado: self._alBuscarEnServidor(pagina, resultado),
+            clave="busqueda"
+        )
+
+    def _alBuscarEnServidor(self, pagina, resultado):
+        filas, hay_mas = resultado
+        if pagina == 0:
+            self._llenarTablaProductos(filas)
+        else:
+            self._agregarFilasProductos(filas)
+        self._pagina_busqueda = pagina
+        self.btn_mas_resultados.config(state="normal" if hay_mas else "disabled")
+
+    def _cargarMasResultados(self):
+        self._buscarEnServidor(self._texto_filtrado or "", self._pagina_busqueda + 1)
 
     # LOGICA DEL CARRITO 
 
     def _agregarAlCarrito(self, event):
+        if self.cobrando: return
         seleccion = self.tree_prod.selection()
         if not seleccion: return
         
@@ -224,12 +313,21 @@ class SalesView(tk.Frame):
             messagebox.showerror("Error", "Debe ingresar un número entero.")
             return
 
-        # Consultamos si hay descuento automático
-        descuento_auto = self.sales_ctrl.obtenerDescuentoAutomatico(id_variante)
-        
+        # Consultamos si hay descuento automático (en segundo plano) y luego se agrega
+        self.tareas.ejecutar(
+            self.sales_ctrl.obtenerDescuentoAutomatico, id_variante,
+            al_terminar=lambda descuento_auto: self._sumarAlCarrito(id_variante, desc_completa, precio, stock_max, cantidad, descuento_auto)
+        )
+
+    def _sumarAlCarrito(self, id_variante, desc_completa, precio, stock_max, cantidad, descuento_auto):
         #if descuento_auto > 0:
            #messagebox.showinfo("¡Oferta!", f"Este producto tiene un {descuento_auto}% de descuento automático.")
 
+        # La consulta del descuento pudo terminar con un cobro ya en curso: no se toca ese carrito
+        if self.cobrando:
+            messagebox.showwarning("Cobro en proceso", f"No se agregó '{desc_completa}': espere a que termine el cobro.")
+            return
+
         # Verificar si ya existe en carrito
         for item in self.carrito:
             if item['id_variante'] == id_variante:
@@ -256,6 +354,7 @@ class SalesView(tk.Frame):
         self._refrescarCarrito()
 
     def _quitarDelCarrito(self):
+        if self.cobrando: return
         seleccion = self.tree_cart.selection()
         if not seleccion: return
         
@@ -264,6 +363,7 @@ class SalesView(tk.Frame):
         self._refrescarCarrito()
 
     def _aplicarDescuentoManual(self):
+        if self.cobrando: return
         seleccion = self.tree_cart.selection()
         if not seleccion: return
         
@@ -283,10 +383,8 @@ class SalesView(tk.Frame):
                 pass
 
     def _refrescarCarrito(self):
-        # Limpiar tabla visual
-        for item in self.tree_cart.get_children():
-            self.tree_cart.delete(item)
-            
+        # La tabla se actualiza con las diferencias: la línea seleccionada sigue seleccionada
+        filas = []
         total_global = 0.0
         
         for item in self.carrito:
@@ -311,7 +409,7 @@ class SalesView(tk.Frame):
             # Texto para la columna descuento
             txt_descuento = f"{desc_final:.0f}% {tipo_desc}" if desc_final > 0 else "0%"
 
-            # Insertar en treeview
+            # Fila para el treeview (la llave es la variante)
             vals = (
                 item['desc'], 
                 item['cantidad'], 
@@ -319,17 +417,21 @@ class SalesView(tk.Frame):
                 txt_descuento, 
                 f"${subtotal:.2f}"
             )
-            self.tree_cart.insert("", "end", values=vals)
-            
+            filas.append((item['id_variante'], vals))
+
+        self.enlace_carrito.actualizar(filas)
         self.lbl_total.config(text=f"TOTAL: ${total_global:.2f}")
 
     # LÓGICA DE CLIENTE
 
     def _buscarCliente(self):
         tel = self.entry_tel.get().strip()
-        if not tel: return
+        if not tel or self.cobrando: return
         
-        datos = self.cust_ctrl.buscarClientePorTelefono(tel)
+        self.tareas.ejecutar(self.cust_ctrl.buscarClientePorTelefono, tel, al_terminar=self._alBuscarCliente, clave="cliente")
+
+    def _alBuscarCliente(self, datos):
+        if self.cobrando: return # La venta en curso ya lleva su cliente
         if datos:
             self.cliente_actual = datos
             self.lbl_nombre_cliente.config(text=f"Cliente: {datos['nombre']} ✅", fg="green")
@@ -340,33 +442,56 @@ class SalesView(tk.Frame):
 
     # LÓGICA DE COBRO 
 
+    def _bloquearEdicion(self, bloquear):
+        """Mientras se cobra no se puede tocar el carrito, el cliente ni el pago (se cobra lo que se confirmó)."""
+        self.cobrando = bloquear
+        estado = "disabled" if bloquear else "normal"
+        for widget in (self.btn_cobrar, self.btn_quitar, self.btn_descuento, self.btn_buscar_cliente, self.entry_tel):
+            widget.config(state=estado)
+        self.combo_pago.config(state="disabled" if bloquear else "readonly")
+
     def _realizarCobro(self):
+        if self.cobrando: return
         if not self.carrito:
             messagebox.showwarning("Vacío", "El carrito está vacío.")
             return
 
+        # Se bloquea desde la confirmación: lo que se cobra es exactamente lo que se confirmó
+        self._bloquearEdicion(True)
         id_cli = self.cliente_actual['id'] if self.cliente_actual else None
         metodo = self.combo_pago.get()
         
         # Confirmación
         if not messagebox.askyesno("Cobrar", f"¿Confirmar venta por {self.lbl_total.cget('text')}?"):
+            self._bloquearEdicion(False)
             return
 
-        # Enviar al Backend
+        # Enviar al Backend (en segundo plano; carrito y botones se bloquean hasta la respuesta)
         # Nota: El carrito del controlador espera claves específicas, ya las tenemos alineadas.
-        exito, mensaje = self.sales_ctrl.procesarVentaNueva(
+        # Se manda una copia: el hilo de trabajo no debe leer algo que la interfaz esté modificando.
+        self.tareas.ejecutar(
+            self.sales_ctrl.procesarVentaNueva,
             self.usuario['id'],
             id_cli,
             metodo,
-            self.carrito
+            [dict(item) for item in self.carrito],
+            al_terminar=self._alCobrar,
+            al_fallar=self._alFallarCobro
         )
-        
+
+    def _alCobrar(self, resultado):
+        exito, mensaje = resultado
+        self._bloquearEdicion(False)
         if exito:
             messagebox.showinfo("Venta Exitosa", mensaje)
             self.carrito = [] # Limpiar
             self.cliente_actual = None
             self.lbl_nombre_cliente.config(text="Cliente: Público General", fg="#2980B9")
             self._refrescarCarrito()
-            self._cargarCatalogoInicial() # Recargar stock
+            self._cargarCatalogoInicial(refrescar=False) # El cache ya tiene el stock descontado
         else:
-            messagebox.showerror("Error en Venta", mensaje)
\ No newline at end of file
+            messagebox.showerror("Error en Venta", mensaje)
+
+    def _alFallarCobro(self, error):
+        self._bloquearEdicion(False)
+        messagebox.showerror("Error en Venta", f"No se pudo procesar la venta: {error}")
\ No newline at end of file
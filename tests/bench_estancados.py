@@ -0,0 +1,198 @@
+"""
+Benchmark del reporte de productos estancados: consulta original (NOT IN sobre todo el historial)
+contra la búsqueda por Variantes_Producto.fecha_ultima_venta (migración V008).
+
+Todo corre en UNA transacción que se revierte al final: la BD queda como estaba.
+Si la migración V008 no está aplicada, la columna y su índice se crean dentro de la misma
+transacción (y también se revierten).
+
+Uso (desde la raíz del proyecto, con una BD local de pruebas en el .env):
+    python tests/bench_estancados.py
+    python tests/bench_estancados.py --detalles 200000 --variantes 500 --repeticiones 3
+"""
+import sys
+import os
+import time
+import json
+import argparse
+import statistics
+
+# Ajuste de ruta para importar desde 'src'
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mis_trapitos.database_conexion.db_manager import DBManager
+from mis_trapitos.database_conexion.reporte_queries import ReportQueries
+
+def sembrarHistorial(cursor, variantes, detalles, lineas_por_ticket, dias_historial, porcentaje_sin_ventas):
+    """
+    Catálogo de prueba y 'detalles' líneas de venta repartidas en los últimos 'dias_historial' días.
+    Un 'porcentaje_sin_ventas' de las variantes nunca se vende.
+    """
+    cursor.execute("""
+        INSERT INTO Empleados (nombre_completo, usuario, hash_contrasena, rol)
+        VALUES ('Tester Estancados', 'bench_estancados', 'x', 'admin')
+        RETURNING id_empleado
+    """)
+    id_empleado = cursor.fetchone()[0]
+
+    cursor.execute("""
+        INSERT INTO Categorias (nombre_categoria, descripcion)
+        VALUES ('Benchmark Estancados', 'Generada por tests/bench_estancados.py')
+        RETURNING id_categoria
+    """)
+    id_categoria = cursor.fetchone()[0]
+
+    productos = max(variantes // 5, 1)
+    cursor.execute("""
+        INSERT INTO Productos (id_categoria, descripcion, precio_base)
+        SELECT %s, 'Prenda estancada #' || n, 100 + (n %% 800)
+        FROM generate_series(1, %s) AS n
+    """, (id_categoria, productos))
+    cursor.execute("""
+        INSERT INTO Variantes_Producto (id_producto, talla, color, stock_disponible)
+        SELECT p.id_producto, 'T' || t, 'Color bench', 1000
+        FROM Productos p
+        CROSS JOIN generate_series(1, 5) AS t
+        WHERE p.id_categoria = %s
+    """, (id_categoria,))
+    cursor.execute("""
+        SELECT v.id_variante
+        FROM Variantes_Producto v JOIN Productos p ON p.id_producto = v.id_producto
+        WHERE p.id_categoria = %s
+        ORDER BY v.id_variante
+    """, (id_categoria,))
+    ids = [fila[0] for fila in cursor.fetchall()]
+    vendibles = ids[int(len(ids) * porcentaje_sin_ventas / 100):]
+
+    tickets = max(detalles // lineas_por_ticket, 1)
+    cursor.execute("""
+        INSERT INTO Ventas (id_empleado, fecha_venta, metodo_pago, monto_total_venta)
+        SELECT %s,
+               now() - random() * make_interval(days => %s),
+               (ARRAY['efectivo', 'tarjeta de credito', 'transferencia bancaria']::METODO_PAGO[])[1 + (n %% 3)],
+               100
+        FROM generate_series(1, %s) AS n
+        RETURNING id_venta
+    """, (id_empleado, dias_historial, tickets))
+    ids_ventas = [fila[0] for fila in cursor.fetchall()]
+
+    cursor.execute("""
+        INSERT INTO Detalles_Venta (id_venta, id_variante, cantidad, precio_unitario_venta, descuento_aplicado)
+        SELECT ventas.id_venta, vendibles.ids[1 + floor(random() * array_length(vendibles.ids, 1))::int], 1, 100, 0
+        FROM unnest(%s::int[]) AS ventas(id_venta)
+        CROSS JOIN generate_series(1, %s) AS linea
+        CROSS JOIN (SELECT %s::int[] AS ids) AS vendibles
+    """, (ids_ventas, lineas_por_ticket, vendibles))
+    return tickets, tickets * lineas_por_ticket
+
+def prepararColumna(cursor):
+    """Backfill de fecha_ultima_venta. Retorna los segundos que tardó."""
+    cursor.execute("""
+        SELECT EXISTS (
+            SELECT 1 FROM information_schema.columns
+            WHERE table_name = 'variantes_producto' AND column_name = 'fecha_ultima_venta'
+        )
+    """)
+    if not cursor.fetchone()[0]:
+        print("  (V008 no aplicada: se crea la columna dentro de la transacción)")
+        cursor.execute("ALTER TABLE Variantes_Producto ADD COLUMN fecha_ultima_venta TIMESTAMPTZ")
+
+    inicio = time.perf_counter()
+    cursor.execute("""
+        UPDATE Variantes_Producto v
+        SET fecha_ultima_venta = u.ultima_venta
+        FROM (
+            SELECT dv.id_variante, MAX(ve.fecha_venta) AS ultima_venta
+            FROM Detalles_Venta dv JOIN Ventas ve ON ve.id_venta = dv.id_venta
+            GROUP BY dv.id_variante
+        ) u
+        WHERE v.id_variante = u.id_variante
+    """)
+    cursor.execute("CREATE INDEX IF NOT EXISTS idx_variantes_fecha_ultima_venta ON Variantes_Producto (fecha_ultima_venta)")
+    segundos = time.perf_counter() - inicio
+    cursor.execute("ANALYZE Ventas, Detalles_Venta, Variantes_Producto, Productos")
+    return segundos
+
+def medirConsulta(cursor, sql, dias, repeticiones):
+    """Ejecuta la consulta 'repeticiones' veces. Retorna (tiempos_ms, filas, plan_json)."""
+    tiempos = []
+    filas = None
+    for _ in range(repeticiones):
+        inicio = time.perf_counter()
+        cursor.execute(sql, (dias,))
+        filas = cursor.fetchall()
+        tiempos.append((time.perf_counter() - inicio) * 1000)
+
+    cursor.execute("EXPLAIN (ANALYZE, BUFFERS, FORMAT JSON) " + sql, (dias,))
+    plan = cursor.fetchone()[0]
+    if isinstance(plan, str):
+        plan = json.loads(plan)
+    return tiempos, filas, plan[0]
+
+def resumirPlan(plan):
+    nodo = plan['Plan']
+    tipos = []
+
+    def recorrer(n):
+        tipos.append(n['Node Type'] + (f" ({n['Index Name']})" if 'Index Name' in n else ""))
+        for hijo in n.get('Plans', []):
+            recorrer(hijo)
+
+    recorrer(nodo)
+    bloques = nodo.get('Shared Hit Blocks', 0) + nodo.get('Shared Read Blocks', 0)
+    return f"{plan['Execution Time']:.1f} ms, {bloques} bloques | " + " > ".join(tipos[:6])
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark del reporte de productos estancados")
+    parser.add_argument('--detalles', type=int, default=1_000_000, help="Líneas de venta a generar")
+    parser.add_argument('--lineas-por-ticket', type=int, default=5)
+    parser.add_argument('--variantes', type=int, default=2000, help="Variantes del catálogo de prueba")
+    parser.add_argument('--dias-historial', type=int, default=730, help="Antigüedad máxima de las ventas generadas")
+    parser.add_argument('--sin-ventas', type=float, default=10, help="%% de variantes que nunca se venden")
+    parser.add_argument('--dias', type=int, default=90, help="Periodo del reporte")
+    parser.add_argument('--repeticiones', type=int, default=5)
+    opciones = parser.parse_args()
+
+    db = DBManager()
+    conn = db.obtenerConexion()
+    if not conn:
+        print("No hay conexión a la BD.")
+        return 1
+
+    cursor = conn.cursor()
+    try:
+        print(f"Generando {opciones.detalles:,} líneas de venta sobre {opciones.variantes:,} variantes...")
+        inicio = time.perf_counter()
+        tickets, lineas = sembrarHistorial(
+            cursor, opciones.variantes, opciones.detalles, opciones.lineas_por_ticket,
+            opciones.dias_historial, opciones.sin_ventas
+        )
+        print(f"  {tickets:,} tickets / {lineas:,} líneas en {time.perf_counter() - inicio:.1f}s")
+
+        segundos_backfill = prepararColumna(cursor)
+        print(f"Backfill de fecha_ultima_venta + índice: {segundos_backfill:.1f}s")
+
+        print(f"\nProductos sin ventas en {opciones.dias} días ({opciones.repeticiones} repeticiones):")
+        resultados = {}
+        for nombre, sql in (
+            ("original (NOT IN)", ReportQueries.SQL_PRODUCTOS_SIN_VENTAS),
+            ("fecha_ultima_venta", ReportQueries.SQL_PRODUCTOS_SIN_VENTAS_COLUMNA),
+        ):
+            tiempos, filas, plan = medirConsulta(cursor, sql, opciones.dias, opciones.repeticiones)
+            resultados[nombre] = (tiempos, filas)
+            print(f"  {nombre:<20} mediana {statistics.median(tiempos):9.1f} ms | mín {min(tiempos):9.1f} ms | {len(filas):,} filas")
+            print(f"  {'':<20} plan: {resumirPlan(plan)}")
+
+        (t_original, f_original), (t_nueva, f_nueva) = resultados.values()
+        if sorted(f_original) != sorted(f_nueva):
+            print("\n⚠️  Las dos consultas NO devuelven las mismas filas.")
+        else:
+            print(f"\nMismas filas en ambas. Aceleración: x{statistics.median(t_original) / statistics.median(t_nueva):.1f}")
+        return 0
+    finally:
+        conn.rollback() # Nada de lo generado se queda en la BD
+        cursor.close()
+        db.cerrarConexion(conn)
+
+if __name__ == "__main__":
+    sys.exit(main())
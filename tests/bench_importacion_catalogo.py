@@ -0,0 +1,123 @@
+"""
+Benchmark de la importación masiva de catálogo (logica/carga_masiva.py): COPY + SQL por conjuntos
+contra el alta de siempre (un INSERT por producto y otro por variante, como registrarProductoNuevo).
+
+Genera un CSV de prueba con algunas filas inválidas a propósito, lo importa dos veces
+(la segunda solo debe actualizar) y revisa que los rechazos sean los esperados.
+Todo corre en UNA transacción que se revierte al final: la BD queda como estaba.
+
+Uso (desde la raíz del proyecto, con una BD local de pruebas en el .env):
+    python tests/bench_importacion_catalogo.py
+    python tests/bench_importacion_catalogo.py --variantes 50000 --por-fila 2000
+"""
+import sys
+import os
+import io
+import csv
+import time
+import argparse
+
+# Ajuste de ruta para importar desde 'src'
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mis_trapitos.database_conexion.db_manager import DBManager
+from mis_trapitos.database_conexion.queries import InventarioQueries
+from mis_trapitos.database_conexion.carga_masiva_queries import BulkLoadQueries, COLUMNAS_CATALOGO
+
+TALLAS = ('CH', 'M', 'G', 'XG', 'XXG')
+INVALIDAS = (
+    ('', 'Sin categoría', '100', 'M', 'Rojo', '1'),
+    ('Bench Importación', 'Precio raro', 'cien', 'M', 'Rojo', '1'),
+    ('Bench Importación', 'Precio cero', '0', 'M', 'Rojo', '1'),
+    ('Bench Importación', 'Stock negativo', '100', 'M', 'Rojo', '-3'),
+    ('Bench Importación', 'Sin color', '100', 'M', '', '1'),
+)
+
+
+def generarCsv(variantes):
+    """CSV en memoria (separado por ';', con coma decimal) + las filas inválidas al final."""
+    salida = io.StringIO()
+    escritor = csv.writer(salida, delimiter=';')
+    escritor.writerow(COLUMNAS_CATALOGO)
+    for n in range(variantes):
+        producto = n // len(TALLAS)
+        escritor.writerow((
+            f"Bench Importación {producto % 20}", f"Prenda importada #{producto}",
+            f"{100 + producto % 800},50", TALLAS[n % len(TALLAS)], "Azul", n % 40
+        ))
+    escritor.writerows(INVALIDAS)
+    salida.seek(0)
+    return salida
+
+
+def importar(bulk, conn, archivo):
+    bulk.prepararImportacionCatalogo(conexion_externa=conn)
+    leidas = bulk.copiarCatalogo(archivo, list(COLUMNAS_CATALOGO), ';', conexion_externa=conn)
+    rechazadas = bulk.validarCatalogo(conexion_externa=conn)
+    resumen = bulk.aplicarCatalogo(conexion_externa=conn)
+    # Las tablas temporales se borran al confirmar; aquí se revierte todo al final, así que se quitan a mano
+    cursor = conn.cursor()
+    cursor.execute("DROP TABLE tmp_importacion_catalogo, tmp_importacion_productos")
+    cursor.close()
+    return leidas, rechazadas, resumen
+
+
+def altaPorFila(inv, conn, variantes):
+    """Lo que haría registrarProductoNuevo fila por fila (una ida y vuelta por INSERT)."""
+    id_categoria = inv.db.ejecutarInsertReturning(
+        "INSERT INTO Categorias (nombre_categoria) VALUES ('Bench Alta Por Fila') RETURNING id_categoria",
+        None, conn
+    )[0]
+    id_producto = None
+    for n in range(variantes):
+        if n % len(TALLAS) == 0:
+            id_producto = inv.crearProducto(id_categoria, f"Prenda por fila #{n}", 100, conexion_externa=conn)
+        inv.crearVarianteProducto(id_producto, TALLAS[n % len(TALLAS)], "Azul", n % 40, conexion_externa=conn)
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmark de la importación masiva de catálogo")
+    parser.add_argument('--variantes', type=int, default=20_000, help="Filas (variantes) del archivo")
+    parser.add_argument('--por-fila', type=int, default=1_000, help="Variantes para medir el alta fila por fila")
+    opciones = parser.parse_args()
+
+    db = DBManager()
+    conn = db.obtenerConexion()
+    if not conn:
+        print("No hay conexión a la BD.")
+        return 1
+
+    bulk = BulkLoadQueries()
+    inv = InventarioQueries()
+    try:
+        print(f"Importando {opciones.variantes:,} variantes (+{len(INVALIDAS)} inválidas)...")
+        inicio = time.perf_counter()
+        leidas, rechazadas, resumen = importar(bulk, conn, generarCsv(opciones.variantes))
+        segundos = time.perf_counter() - inicio
+        print(f"  1ª carga: {leidas:,} filas en {segundos:.2f}s ({leidas / segundos:,.0f} filas/s) | {resumen}")
+
+        inicio = time.perf_counter()
+        _, _, resumen_2 = importar(bulk, conn, generarCsv(opciones.variantes))
+        print(f"  2ª carga (mismo archivo): {time.perf_counter() - inicio:.2f}s | {resumen_2}")
+
+        ok = (
+            rechazadas == len(INVALIDAS)
+            and resumen['variantes_creadas'] == opciones.variantes
+            and resumen_2['variantes_creadas'] == 0 and resumen_2['variantes_actualizadas'] == 0
+            and resumen_2['productos_creados'] == 0 and resumen_2['productos_actualizados'] == 0
+        )
+        print("  ✅ Rechazos y conteos correctos" if ok else f"  ⚠️  Resultado inesperado ({rechazadas} rechazadas)")
+
+        print(f"\nAlta fila por fila de {opciones.por_fila:,} variantes...")
+        inicio = time.perf_counter()
+        altaPorFila(inv, conn, opciones.por_fila)
+        segundos_fila = time.perf_counter() - inicio
+        print(f"  {segundos_fila:.2f}s ({opciones.por_fila / segundos_fila:,.0f} filas/s)")
+        print(f"\nAceleración por fila: x{(leidas / segundos) / (opciones.por_fila / segundos_fila):.1f}")
+        return 0 if ok else 1
+    finally:
+        conn.rollback() # Nada de lo generado se queda en la BD
+        db.cerrarConexion(conn)
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,103 @@
+import sys
+import os
+import time
+import random
+import statistics
+
+# Ajuste de ruta para importar desde 'src'
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+from mis_trapitos.logica.ventas_control import SalesController
+from mis_trapitos.database_conexion.queries import InventarioQueries, UsuariosQueries
+
+VENTAS_POR_CAMINO = 200   # tickets a registrar con cada camino
+ARTICULOS_POR_TICKET = 10 # líneas por ticket
+VARIANTES_PRUEBA = 30     # variantes disponibles para armar carritos
+
+def prepararDatos():
+    """
+    Crea (si no existen) un empleado y un producto con muchas variantes y stock de sobra.
+    Retorna: (id_empleado, [(id_variante, precio), ...])
+    """
+    inv_queries = InventarioQueries()
+    usr_queries = UsuariosQueries()
+
+    usuario = usr_queries.obtenerUsuarioPorUser('testuser')
+    if usuario:
+        id_empleado = usuario[0]
+    else:
+        id_empleado = usr_queries.crearEmpleado("Tester Benchmark", "testuser", "1234", "admin")
+
+    nombre_cat = "Benchmark Ventas"
+    id_cat = next((c[0] for c in inv_queries.obtenerCategorias() if c[1] == nombre_cat), None)
+    if not id_cat:
+        inv_queries.crearCategoria(nombre_cat, "Categoría temporal para benchmarks")
+        id_cat = next(c[0] for c in inv_queries.obtenerCategorias() if c[1] == nombre_cat)
+
+    id_producto = inv_queries.crearProducto(id_cat, "Playera Benchmark", 199.90)
+    for numero in range(VARIANTES_PRUEBA):
+        inv_queries.crearVarianteProducto(id_producto, f"T{numero}", "Gris", 1_000_000)
+
+    sql_variantes = """
+        SELECT v.id_variante, p.precio_base
+        FROM Variantes_Producto v
+        JOIN Productos p ON v.id_producto = p.id_producto
+        WHERE p.id_producto = %s
+    """
+    variantes = inv_queries.db.obtenerDatos(sql_variantes, (id_producto,))
+    return id_empleado, variantes
+
+def medirCamino(controller, usar_servidor, id_empleado, variantes):
+    """Registra VENTAS_POR_CAMINO tickets y retorna la lista de latencias en milisegundos."""
+    controller.usar_funcion_servidor = usar_servidor
+    latencias = []
+    fallidas = 0
+
+    for _ in range(VENTAS_POR_CAMINO):
+        carrito = [
+            {'id_variante': id_var, 'cantidad': random.randint(1, 3), 'precio': float(precio), 'descuento_manual': 0}
+            for id_var, precio in random.sample(variantes, ARTICULOS_POR_TICKET)
+        ]
+        inicio = time.perf_counter()
+        exito, _ = controller.procesarVentaNueva(id_empleado, None, 'efectivo', carrito)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+        if not exito:
+            fallidas += 1
+
+    return latencias, fallidas
+
+def imprimirResultado(nombre, latencias, fallidas):
+    ordenadas = sorted(latencias)
+    p95 = ordenadas[int(len(ordenadas) * 0.95) - 1]
+    total_seg = sum(latencias) / 1000
+    print(f"{nombre:<22} | media {statistics.mean(latencias):7.2f} ms | p50 {statistics.median(latencias):7.2f} ms "
+          f"| p95 {p95:7.2f} ms | {len(latencias) / total_seg:7.1f} tickets/s | fallidas {fallidas}")
+
+def ejecutarBenchmark():
+    print("--- Benchmark: registro de venta (Python vs función en servidor) ---")
+    id_empleado, variantes = prepararDatos()
+    if not id_empleado or len(variantes) < ARTICULOS_POR_TICKET:
+        print("Error: No se pudieron preparar los datos de prueba.")
+        return
+
+    controller = SalesController()
+    if not controller.ventas_queries.existeFuncionRegistrarVenta():
+        print("La función registrar_venta no está instalada. Aplica las migraciones primero.")
+        return
+
+    print(f"{VENTAS_POR_CAMINO} tickets por camino, {ARTICULOS_POR_TICKET} artículos por ticket\n")
+
+    # Calentamos el pool y los planes de ambos caminos antes de medir
+    for usar_servidor in (False, True):
+        controller.usar_funcion_servidor = usar_servidor
+        carrito = [{'id_variante': id_var, 'cantidad': 1, 'precio': float(precio)} for id_var, precio in variantes[:ARTICULOS_POR_TICKET]]
+        controller.procesarVentaNueva(id_empleado, None, 'efectivo', carrito)
+
+    resultado_python = medirCamino(controller, False, id_empleado, variantes)
+    resultado_servidor = medirCamino(controller, True, id_empleado, variantes)
+
+    imprimirResultado("Python (sentencias)", *resultado_python)
+    imprimirResultado("Función registrar_venta", *resultado_servidor)
+
+if __name__ == "__main__":
+    ejecutarBenchmark()
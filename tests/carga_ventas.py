@@ -0,0 +1,176 @@
+"""
+Prueba de carga del punto de venta: varias cajas cobrando al mismo tiempo.
+
+Uso (desde la raíz del proyecto, con una BD local de pruebas en el .env):
+    python tests/carga_ventas.py --cajas 8 --ventas 100
+    python tests/carga_ventas.py --cajas 4 --ventas 200 --modo procesos --productos 50
+"""
+import sys
+import os
+import time
+import random
+import argparse
+import multiprocessing
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+
+# Ajuste de ruta para importar desde 'src'
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+# Distribución de artículos por ticket observada en tienda: la mayoría lleva 1 a 3 prendas
+DISTRIBUCION_ARTICULOS = {1: 30, 2: 25, 3: 15, 4: 10, 5: 7, 6: 5, 7: 3, 8: 2, 10: 2, 15: 1}
+# Unidades por línea: casi siempre una, a veces un par
+DISTRIBUCION_CANTIDAD = {1: 80, 2: 15, 3: 5}
+METODOS_PAGO = ['efectivo', 'tarjeta de credito', 'transferencia bancaria']
+
+def _elegirPonderado(distribucion):
+    return random.choices(list(distribucion.keys()), weights=list(distribucion.values()))[0]
+
+def sembrarDatos(productos, variantes_por_producto, stock_inicial):
+    """
+    Crea un catálogo de prueba (categoría, productos y variantes) con stock conocido.
+    Retorna: (id_empleado, [(id_variante, precio), ...])
+    """
+    from mis_trapitos.database_conexion.queries import InventarioQueries, UsuariosQueries
+
+    inv_queries = InventarioQueries()
+    usr_queries = UsuariosQueries()
+
+    usuario = usr_queries.obtenerUsuarioPorUser('testuser')
+    id_empleado = usuario[0] if usuario else usr_queries.crearEmpleado("Tester Carga", "testuser", "1234", "admin")
+
+    nombre_cat = "Prueba de Carga"
+    id_cat = next((c[0] for c in inv_queries.obtenerCategorias() if c[1] == nombre_cat), None)
+    if not id_cat:
+        inv_queries.crearCategoria(nombre_cat, "Catálogo generado por tests/carga_ventas.py")
+        id_cat = next(c[0] for c in inv_queries.obtenerCategorias() if c[1] == nombre_cat)
+
+    tallas = ['XS', 'S', 'M', 'L', 'XL', 'XXL']
+    ids_productos = []
+    for numero in range(productos):
+        precio = round(random.uniform(99, 899), 2)
+        id_producto = inv_queries.crearProducto(id_cat, f"Prenda de carga #{numero}", precio)
+        ids_productos.append(id_producto)
+        for indice in range(variantes_por_producto):
+            inv_queries.crearVarianteProducto(
+                id_producto, tallas[indice % len(tallas)], f"Color {indice // len(tallas)}", stock_inicial
+            )
+
+    sql_variantes = """
+        SELECT v.id_variante, p.precio_base
+        FROM Variantes_Producto v
+        JOIN Productos p ON v.id_producto = p.id_producto
+        WHERE p.id_producto = ANY(%s)
+    """
+    variantes = inv_queries.db.obtenerDatos(sql_variantes, (ids_productos,))
+    return id_empleado, [(fila[0], float(fila[1])) for fila in variantes]
+
+def simularCaja(id_empleado, variantes, ventas, semilla):
+    """
+    Una caja registrando 'ventas' tickets seguidos.
+    Es una función de módulo para poder ejecutarse tanto en hilos como en procesos.
+    Retorna: (latencias_ms, estadisticas_del_controlador)
+    """
+    from mis_trapitos.logica.ventas_control import SalesController
+
+    random.seed(semilla)
+    controller = SalesController()
+    latencias = []
+
+    for _ in range(ventas):
+        articulos = min(_elegirPonderado(DISTRIBUCION_ARTICULOS), len(variantes))
+        carrito = [
+            {'id_variante': id_var, 'cantidad': _elegirPonderado(DISTRIBUCION_CANTIDAD), 'precio': precio}
+            for id_var, precio in random.sample(variantes, articulos)
+        ]
+        inicio = time.perf_counter()
+        controller.procesarVentaNueva(id_empleado, None, random.choice(METODOS_PAGO), carrito)
+        latencias.append((time.perf_counter() - inicio) * 1000)
+
+    return latencias, controller.estadisticas
+
+def verificarStock(variantes, stock_inicial):
+    """Compara stock inicial - unidades vendidas contra el stock actual de cada variante sembrada."""
+    from mis_trapitos.database_conexion.db_manager import DBManager
+
+    sql = """
+        SELECT v.id_variante, v.stock_disponible, COALESCE(SUM(dv.cantidad), 0)
+        FROM Variantes_Producto v
+        LEFT JOIN Detalles_Venta dv ON dv.id_variante = v.id_variante
+        WHERE v.id_variante = ANY(%s)
+        GROUP BY v.id_variante, v.stock_disponible
+    """
+    filas = DBManager().obtenerDatos(sql, ([id_var for id_var, _ in variantes],))
+    descuadres = [fila for fila in filas if fila[1] + fila[2] != stock_inicial or fila[1] < 0]
+    unidades_vendidas = sum(fila[2] for fila in filas)
+    return descuadres, unidades_vendidas
+
+def percentil(valores_ordenados, porcentaje):
+    if not valores_ordenados:
+        return 0.0
+    indice = min(len(valores_ordenados) - 1, int(round(porcentaje / 100 * (len(valores_ordenados) - 1))))
+    return valores_ordenados[indice]
+
+def ejecutarPruebaCarga(argumentos):
+    print("--- PRUEBA DE CARGA: PUNTO DE VENTA ---")
+    print(f"Cajas: {argumentos.cajas} ({argumentos.modo}) | Ventas por caja: {argumentos.ventas} | "
+          f"Catálogo: {argumentos.productos} productos x {argumentos.variantes} variantes")
+
+    if argumentos.modo == 'hilos':
+        # Cada hilo necesita su propia conexión del pool
+        os.environ.setdefault('DB_POOL_MAX', str(argumentos.cajas + 2))
+
+    id_empleado, variantes = sembrarDatos(argumentos.productos, argumentos.variantes, argumentos.stock)
+    if not id_empleado or not variantes:
+        print("Error: No se pudo sembrar el catálogo de prueba.")
+        return
+
+    if argumentos.modo == 'procesos':
+        # 'spawn' para que cada proceso abra su propio pool (no heredar sockets del padre)
+        ejecutor = ProcessPoolExecutor(max_workers=argumentos.cajas, mp_context=multiprocessing.get_context('spawn'))
+    else:
+        ejecutor = ThreadPoolExecutor(max_workers=argumentos.cajas)
+
+    inicio = time.perf_counter()
+    with ejecutor:
+        futuros = [
+            ejecutor.submit(simularCaja, id_empleado, variantes, argumentos.ventas, caja)
+            for caja in range(argumentos.cajas)
+        ]
+        resultados = [futuro.result() for futuro in futuros]
+    duracion = time.perf_counter() - inicio
+
+    latencias = sorted(lat for lista, _ in resultados for lat in lista)
+    exitosas = sum(est['exitosas'] for _, est in resultados)
+    fallidas = sum(est['fallidas'] for _, est in resultados)
+    reintentos = sum(est['reintentos'] for _, est in resultados)
+
+    print(f"\nDuración total: {duracion:.2f}s")
+    print(f"Throughput: {exitosas / duracion:.1f} tickets/s (exitosos)")
+    print(f"Latencia: p50 {percentil(latencias, 50):.1f} ms | p95 {percentil(latencias, 95):.1f} ms | "
+          f"p99 {percentil(latencias, 99):.1f} ms | máx {latencias[-1]:.1f} ms")
+    print(f"Ventas exitosas: {exitosas} | Rollbacks (ventas fallidas): {fallidas} | Reintentos por conflicto: {reintentos}")
+
+    descuadres, unidades = verificarStock(variantes, argumentos.stock)
+    print(f"Unidades vendidas: {unidades}")
+    if descuadres:
+        print(f"ERROR: {len(descuadres)} variantes con stock inconsistente. Ej: {descuadres[:5]}")
+    else:
+        print("Stock consistente: stock inicial - vendido == stock actual en todas las variantes.")
+
+    if argumentos.modo == 'hilos':
+        # En modo procesos cada hijo tiene sus propias métricas; aquí solo se ven las de los hilos
+        from mis_trapitos.core.metricas import metricas
+        metricas.registrarEnLog()
+
+def leerArgumentos():
+    parser = argparse.ArgumentParser(description="Prueba de carga de SalesController.procesarVentaNueva")
+    parser.add_argument('--cajas', type=int, default=8, help="Cajas (hilos o procesos) simultáneas")
+    parser.add_argument('--ventas', type=int, default=100, help="Tickets que registra cada caja")
+    parser.add_argument('--modo', choices=['hilos', 'procesos'], default='hilos')
+    parser.add_argument('--productos', type=int, default=20, help="Productos a sembrar")
+    parser.add_argument('--variantes', type=int, default=6, help="Variantes por producto")
+    parser.add_argument('--stock', type=int, default=1000, help="Stock inicial por variante")
+    return parser.parse_args()
+
+if __name__ == "__main__":
+    ejecutarPruebaCarga(leerArgumentos())
@@ -35,6 +35,11 @@ def ejecutarPruebaConexion():
             
         # Siempre cerramos la conexión al finalizar
         gestor_db.cerrarConexion(conexion_activa)
+
+        # La segunda conexión debe salir del pool (sin abrir una nueva)
+        conexion_reutilizada = gestor_db.obtenerConexion()
+        gestor_db.cerrarConexion(conexion_reutilizada)
+        print(f"Estadísticas del pool: {gestor_db.obtenerEstadisticasPool()}")
         
     else:
         print("FALLO: No se pudo conectar.")
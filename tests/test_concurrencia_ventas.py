@@ -0,0 +1,111 @@
+import sys
+import os
+import random
+import threading
+
+# Ajuste de ruta para importar desde 'src'
+sys.path.append(os.path.join(os.path.dirname(os.path.dirname(os.path.abspath(__file__))), 'src'))
+
+HILOS = 16             # cajas vendiendo al mismo tiempo
+VENTAS_POR_HILO = 25   # tickets por caja
+VARIANTES_PRUEBA = 6   # pocas variantes para forzar que las cajas choquen
+STOCK_INICIAL = 500
+
+# Cada hilo necesita su propia conexión del pool (no sobrescribe un valor ya configurado)
+os.environ.setdefault('DB_POOL_MAX', str(HILOS + 2))
+
+from mis_trapitos.logica.ventas_control import SalesController
+from mis_trapitos.database_conexion.queries import InventarioQueries, UsuariosQueries
+
+def prepararEscenario():
+    """
+    Crea un producto con pocas variantes y stock conocido.
+    Retorna: (id_empleado, id_producto, [(id_variante, precio), ...])
+    """
+    inv_queries = InventarioQueries()
+    usr_queries = UsuariosQueries()
+
+    usuario = usr_queries.obtenerUsuarioPorUser('testuser')
+    id_empleado = usuario[0] if usuario else usr_queries.crearEmpleado("Tester Concurrencia", "testuser", "1234", "admin")
+
+    nombre_cat = "Test Concurrencia"
+    id_cat = next((c[0] for c in inv_queries.obtenerCategorias() if c[1] == nombre_cat), None)
+    if not id_cat:
+        inv_queries.crearCategoria(nombre_cat, "Categoría temporal para pruebas de concurrencia")
+        id_cat = next(c[0] for c in inv_queries.obtenerCategorias() if c[1] == nombre_cat)
+
+    id_producto = inv_queries.crearProducto(id_cat, "Sudadera Concurrencia", 350.00)
+    for numero in range(VARIANTES_PRUEBA):
+        inv_queries.crearVarianteProducto(id_producto, f"C{numero}", "Azul", STOCK_INICIAL)
+
+    variantes = inv_queries.db.obtenerDatos(
+        "SELECT v.id_variante, p.precio_base FROM Variantes_Producto v JOIN Productos p ON p.id_producto = v.id_producto WHERE p.id_producto = %s",
+        (id_producto,)
+    )
+    return id_empleado, id_producto, variantes
+
+def simularCaja(id_empleado, variantes, resultados):
+    """Registra varias ventas con carritos que comparten variantes en ORDEN ALEATORIO."""
+    controller = SalesController()
+    for _ in range(VENTAS_POR_HILO):
+        seleccion = random.sample(variantes, random.randint(2, len(variantes)))
+        carrito = [
+            {'id_variante': id_var, 'cantidad': random.randint(1, 4), 'precio': float(precio)}
+            for id_var, precio in seleccion
+        ]
+        exito, mensaje = controller.procesarVentaNueva(id_empleado, None, 'efectivo', carrito)
+        resultados.append((exito, mensaje))
+
+def ejecutarPruebaConcurrencia():
+    """
+    Lanza muchas ventas simultáneas sobre las mismas variantes y verifica:
+    1. Que ninguna falle por deadlock (se reintentan o se evitan por el orden de bloqueo).
+    2. Que el stock final cuadre exactamente con lo vendido.
+    """
+    print("--- TEST DE CONCURRENCIA EN VENTAS ---")
+    id_empleado, id_producto, variantes = prepararEscenario()
+    if not id_empleado or not variantes:
+        print("Error: No se pudo preparar el escenario.")
+        return
+
+    resultados = []
+    hilos = [
+        threading.Thread(target=simularCaja, args=(id_empleado, variantes, resultados))
+        for _ in range(HILOS)
+    ]
+    for hilo in hilos:
+        hilo.start()
+    for hilo in hilos:
+        hilo.join()
+
+    exitosas = sum(1 for exito, _ in resultados if exito)
+    sin_stock = sum(1 for exito, msg in resultados if not exito and "Stock" in msg)
+    otros_errores = [msg for exito, msg in resultados if not exito and "Stock" not in msg]
+
+    print(f"Ventas exitosas: {exitosas} | Rechazadas por stock: {sin_stock} | Otros errores: {len(otros_errores)}")
+    for msg in otros_errores[:5]:
+        print(f"   -> {msg}")
+
+    # Verificación de integridad: stock inicial - vendido == stock actual
+    db = InventarioQueries().db
+    sql_cuadre = """
+        SELECT v.id_variante, v.stock_disponible, COALESCE(SUM(dv.cantidad), 0)
+        FROM Variantes_Producto v
+        LEFT JOIN Detalles_Venta dv ON dv.id_variante = v.id_variante
+        WHERE v.id_producto = %s
+        GROUP BY v.id_variante, v.stock_disponible
+    """
+    descuadres = [
+        fila for fila in db.obtenerDatos(sql_cuadre, (id_producto,))
+        if fila[1] + fila[2] != STOCK_INICIAL
+    ]
+
+    if not otros_errores and not descuadres:
+        print("Resultado Correcto: sin deadlocks y el stock cuadra con lo vendido.")
+    else:
+        print(f"ERROR: {len(descuadres)} variantes con stock descuadrado: {descuadres}")
+
+    print("\n--- Fin del Test ---")
+
+if __name__ == "__main__":
+    ejecutarPruebaConcurrencia()